@@ -8,6 +8,8 @@ api_router.include_router(endpoints.users.router, prefix="/users", tags=["users"
 api_router.include_router(endpoints.utils.router, prefix="/utils", tags=["UI"])
 api_router.include_router(endpoints.scenario.router, prefix="/utils", tags=["UI"])
 api_router.include_router(endpoints.ue_movement.router, prefix="/ue_movement", tags=["Movement"])
+api_router.include_router(endpoints.simulation.router, prefix="/simulation", tags=["Simulation"])
+api_router.include_router(endpoints.coverage.router, prefix="/coverage", tags=["Coverage"])
 api_router.include_router(endpoints.paths.router, prefix="/paths", tags=["Paths"])
 api_router.include_router(endpoints.gNB.router, prefix="/gNBs", tags=["gNBs"])
 api_router.include_router(endpoints.Cell.router, prefix="/Cells", tags=["Cells"])
@@ -85,10 +85,11 @@ def update_Cell(
     
     #check if the requested cell_id (hex) exists in db
     if item_in.cell_id != cell_id:
-        cells = crud.cell.get_multi_by_owner(db=db, owner_id=current_user.id, skip=0, limit=100)
-        for cell_in in cells:
-            if item_in.cell_id == cell_in.cell_id:
-                raise HTTPException(status_code=409, detail=f"Cell with id {item_in.cell_id} already exists")
+        # Queried directly, the topology snapshot is rebuilt after the update anyway
+        if crud.cell.get_owner_Cell_id(
+            db=db, owner_id=current_user.id, id=item_in.cell_id
+        ):
+            raise HTTPException(status_code=409, detail=f"Cell with id {item_in.cell_id} already exists")
         
     Cell = crud.cell.update(db=db, db_obj=Cell, obj_in=item_in)
     return Cell
@@ -8,14 +8,11 @@ from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 from app.api import deps
 from app import crud, models, schemas
-from app.db.session import client
 from app.api.api_v1.endpoints.ue_movement import retrieve_ue_state
 from app.api.api_v1.endpoints.paths import get_random_point
 from app.schemas.monitoringevent import MonitoringType
-from app.tools.monitoring_callbacks import (
-    get_subscription_mon_types,
-    send_roaming_status_callback,
-)
+from app.tools.monitoring_callbacks import send_roaming_status_callback
+from app.tools.subscription_index import subscription_index
 
 # from app.api.api_v1.endpoints.ue_movement import retrieve_ue, retrieve_ue_distances, retrieve_ue_path_losses, retrieve_ue_rsrps, retrieve_ue_handovers
 from .utils import ReportLogging
@@ -172,17 +169,11 @@ def _update_roaming_status(ue: models.UE, new_vplmnid: Optional[str]):
     if ue.visiting_plmnid == new_vplmnid:
         return
 
-    db_mongo = client.fastapi
+    for record in subscription_index.for_supi(ue.supi):
+        doc_id = record.doc_id
+        sub = record.subscription
 
-    subscriptions = db_mongo["MonitoringEvent"].find(
-        {"supi": str(ue.supi)}, {"subscription": True}
-    )
-
-    for doc in subscriptions:
-        doc_id = doc.get("_id")
-        sub = doc["subscription"]
-
-        for monType in get_subscription_mon_types(sub):
+        for monType in record.types:
             if monType == MonitoringType.ROAMING_STATUS:
                 if (
                     not sub.get("plmnIndication")
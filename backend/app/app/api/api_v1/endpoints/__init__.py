@@ -21,3 +21,5 @@ from .analyticsExposure import router
 from .broker import router
 from .tests import router
 from .scenario import router
+from .simulation import router
+from .coverage import router
@@ -0,0 +1,70 @@
+from typing import Any, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.api import deps
+from app.tools.coverage import (
+    coverage_rasters,
+    encode_png,
+    rsrp_colors,
+    sample_tile,
+    server_colors,
+)
+from app.tools.topology import topology_snapshots
+
+router = APIRouter()
+
+
+@router.get("", response_model=schemas.CoverageRaster)
+def read_coverage(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get the coverage raster of the current user's cells, computing it if the
+    cells changed since it was last computed
+    """
+    raster = coverage_rasters.get(topology_snapshots.get(db, current_user.id))
+    if raster is None:
+        raise HTTPException(status_code=404, detail="There are no cells")
+    return raster.to_dict()
+
+
+@router.get("/tiles/{layer}/{z}/{x}/{y}.{fmt}")
+def read_coverage_tile(
+    *,
+    layer: Literal["rsrp", "server"],
+    z: int,
+    x: int,
+    y: int,
+    fmt: Literal["png", "raw"],
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get a 256 x 256 web mercator map tile of the coverage
+
+    The "rsrp" layer is the RSRP of the best server and the "server" layer the id
+    of the best server. PNG tiles are coloured for the map, raw tiles are the
+    pixel values row by row, little-endian float32 dBm (NaN outside coverage) or
+    int32 cell ids (-1 outside coverage).
+    """
+    if z < 0 or z > 30 or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=404, detail="Tile not found")
+
+    raster = coverage_rasters.get(topology_snapshots.get(db, current_user.id))
+    best_server, rsrp = sample_tile(raster, z, x, y)
+
+    if fmt == "png":
+        pixels = rsrp_colors(rsrp) if layer == "rsrp" else server_colors(best_server)
+        content, media_type = encode_png(pixels), "image/png"
+    else:
+        values = rsrp.astype("<f4") if layer == "rsrp" else best_server.astype("<i4")
+        content, media_type = values.tobytes(), "application/octet-stream"
+
+    headers = {"Cache-Control": "private, max-age=60"}
+    if raster is not None:
+        headers["X-Topology-Version"] = str(raster.version)
+    return Response(content=content, media_type=media_type, headers=headers)
@@ -1,4 +1,5 @@
 import asyncio
+import logging
 from ipaddress import IPv4Address
 from typing import Any, List
 
@@ -39,6 +40,8 @@ from app.tools.monitoring_callbacks import (
     send_roaming_status_callback,
     send_ue_reachability_callback,
 )
+from app.tools.sim_clock import sim_clock
+from app.tools.subscription_index import subscription_index
 
 from .utils import ReportLogging
 
@@ -47,6 +50,15 @@ router.route_class = ReportLogging
 db_collection = "MonitoringEvent"
 
 
+@router.on_event("startup")
+def startup():
+    try:
+        subscription_index.load()
+    except Exception as ex:
+        # Loaded on first use instead
+        logging.error("Monitoring subscriptions not indexed on startup: %s", ex)
+
+
 def filter_active_subscription(db_mongo, sub):
     sub_validate_time = tools.check_expiration_time(
         expire_time=sub.get("monitorExpireTime")
@@ -263,6 +275,7 @@ async def create_subscription(
             "owner_id": current_user.id,
         },
     )
+    record = subscription_index.add(id, ue.supi, current_user.id, json_data)
 
     if item_in.immediateRep:
         for monType in allMonitoringTypes:
@@ -275,6 +288,13 @@ async def create_subscription(
             elif monType == MonitoringType.UE_REACHABILITY and ue.Cell_id is not None:
                 asyncio.create_task(send_ue_reachability_callback(json_data, ue, id))
             elif monType == MonitoringType.LOCATION_REPORTING:
+                # The movement reports then follow on from this location
+                record.location_filter.due(
+                    ue.latitude,
+                    ue.longitude,
+                    ue.Cell.cell_id if ue.Cell is not None else None,
+                    sim_clock.time,
+                )
                 asyncio.create_task(handle_location_report_callback(json_data, ue, id))
             elif monType == MonitoringType.ROAMING_STATUS:
                 asyncio.create_task(send_roaming_status_callback(json_data, ue, id))
@@ -326,6 +346,7 @@ def update_subscription(
             projection={"_id": False, "subscription": True},
             return_document=ReturnDocument.AFTER,
         )["subscription"]
+        subscription_index.update(ObjectId(subscriptionId), updated_doc)
 
         http_response = JSONResponse(content=updated_doc, status_code=200)
         add_notifications(http_request, http_response, False)
@@ -396,6 +417,7 @@ def delete_subscription(
         raise HTTPException(status_code=404, detail="Subscription not found")
 
     db_mongo[db_collection].delete_one({"_id": ObjectId(subscriptionId)})
+    subscription_index.remove(ObjectId(subscriptionId))
 
     http_response = JSONResponse(content=retrieved_doc, status_code=200)
     add_notifications(http_request, http_response, False)
@@ -6,18 +6,19 @@ from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.tools.path_cache import path_cache
 
 router = APIRouter()
 
 def get_random_point(db: Session, path_id: int):
 
-    points = crud.points.get_points(db=db, path_id=path_id)
-    points_json = jsonable_encoder(points)
+    path = path_cache.get(db, path_id)
 
     #Get the random index (this index should be within the range of points' list)
-    random_index = random.randrange(0, len(points_json))
+    random_index = random.randrange(0, len(path))
+    latitude, longitude = path.point(random_index)
 
-    return points_json[random_index]
+    return {'latitude' : latitude, 'longitude' : longitude}
 
 @router.get("", response_model=List[schemas.Paths])
 def read_paths(
@@ -125,11 +126,8 @@ def read_path(
     item_json["end_point"]["latitude"] = path.end_lat
     item_json["end_point"]["longitude"] = path.end_long
 
-    points = crud.points.get_points(db=db, path_id=path.id)
-    item_json["points"] = []
-
-    for obj in jsonable_encoder(points):
-        item_json["points"].append({'latitude' : obj.get('latitude'), 'longitude' : obj.get('longitude')})
+    points = path_cache.get(db, path.id)
+    item_json["points"] = points.to_list() if points is not None else []
    
     return item_json
 
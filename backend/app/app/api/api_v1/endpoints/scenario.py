@@ -10,6 +10,9 @@ from app import models, schemas, crud
 from app.api import deps
 from app.api.api_v1.endpoints.paths import get_random_point
 from app.api.api_v1.endpoints.ue_movement import retrieve_ue_state
+from app.tools.path_cache import path_cache
+from app.tools.spatial_index import cell_index
+from app.tools.topology import topology_snapshots, topology_versions
 
 router = APIRouter()
 
@@ -31,6 +34,11 @@ def create_scenario(
     ue_path_association = scenario_in.ue_path_association
 
     db.execute('TRUNCATE TABLE cell, gnb, monitoring, path, points, ue RESTART IDENTITY')
+    current_user.propagation_model = scenario_in.propagation_model
+    db.commit()
+    path_cache.clear()
+    cell_index.clear()
+    topology_versions.bump_all()
     
     for gNB_in in gNBs:
         gNB = crud.gnb.get_gNB_id(db=db, id=gNB_in.gNB_id)
@@ -103,10 +111,11 @@ def get_scenario(
     """
     Export the scenario
     """
-    gNBs = crud.gnb.get_multi_by_owner(db=db, owner_id=current_user.id, skip=0, limit=100)
-    Cells = crud.cell.get_multi_by_owner(db=db, owner_id=current_user.id, skip=0, limit=100)
-    UEs = crud.ue.get_multi_by_owner(db=db, owner_id=current_user.id, skip=0, limit=100)
-    paths = crud.path.get_multi_by_owner(db=db, owner_id=current_user.id, skip=0, limit=100)
+    topology = topology_snapshots.get(db, current_user.id)
+    gNBs = list(topology.gnbs)
+    Cells = list(topology.cells)
+    UEs = crud.ue.get_multi_by_owner(db=db, owner_id=current_user.id, skip=0, limit=None)
+    paths = crud.path.get_multi_by_owner(db=db, owner_id=current_user.id, skip=0, limit=None)
 
     
     json_gNBs= jsonable_encoder(gNBs)
@@ -125,10 +134,8 @@ def get_scenario(
                 item_json["end_point"]["latitude"] = path.end_lat
                 item_json["end_point"]["longitude"] = path.end_long
                 item_json["id"] = path.id
-                points = crud.points.get_points(db=db, path_id=path.id)
-                item_json["points"] = []
-                for obj in jsonable_encoder(points):
-                    item_json["points"].append({'latitude' : obj.get('latitude'), 'longitude' : obj.get('longitude')})
+                points = path_cache.get(db, path.id)
+                item_json["points"] = points.to_list() if points is not None else []
 
     for ue in UEs:
         if ue.path_id:
@@ -145,7 +152,8 @@ def get_scenario(
         "cells" : json_Cells,
         "UEs" : json_UEs,
         "paths" : json_path,
-        "ue_path_association" : ue_path_association
+        "ue_path_association" : ue_path_association,
+        "propagation_model" : topology.model.name
     }
 
     return export_json
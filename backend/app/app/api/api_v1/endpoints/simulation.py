@@ -0,0 +1,150 @@
+from typing import Any, List
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.api import deps
+from app.api.api_v1.endpoints.scenario import get_scenario
+from app.core.config import settings
+from app.tools.batch_simulation import (
+    BatchSimulationJob,
+    batch_jobs,
+    format_available,
+)
+from app.tools.sim_clock import sim_clock
+
+router = APIRouter()
+
+
+def job_state(job: BatchSimulationJob) -> dict:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "created": job.created,
+        "finished": job.finished,
+        "ticks": job.ticks,
+        "tick_interval": job.tick_interval,
+        "format": job.format,
+        "handover": job.handover,
+        "tables": list(job.files),
+        "error": job.error,
+    }
+
+
+def get_job(job_id: str, current_user: models.User) -> BatchSimulationJob:
+    job = batch_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Batch simulation not found")
+    if not current_user.is_superuser and (job.owner_id != current_user.id):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    return job
+
+
+@router.post("/batch", response_model=schemas.BatchSimulationJob, status_code=202)
+def create_batch_simulation(
+    *,
+    db: Session = Depends(deps.get_db),
+    simulation_in: schemas.BatchSimulationCreate,
+    background_tasks: BackgroundTasks,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Start a headless simulation of a scenario.
+
+    The run is done offline: it does not touch the UEs of the live simulation and
+    sends no notification. Its trajectories and handover events can be downloaded
+    once the job is finished.
+    """
+    if not format_available(simulation_in.format):
+        raise HTTPException(
+            status_code=422,
+            detail=f"pyarrow must be installed to write {simulation_in.format} files",
+        )
+
+    scenario = simulation_in.scenario
+    if scenario is None:
+        scenario = schemas.scenario(**get_scenario(db=db, current_user=current_user))
+
+    job = batch_jobs.add(
+        BatchSimulationJob(
+            owner_id=current_user.id,
+            scenario=scenario,
+            ticks=simulation_in.ticks,
+            tick_interval=simulation_in.tick_interval or sim_clock.tick_interval,
+            fmt=simulation_in.format,
+            supis=simulation_in.supis,
+            directory=settings.BATCH_SIMULATION_PATH,
+            handover=simulation_in.handover,
+        )
+    )
+    background_tasks.add_task(job.run)
+    return job_state(job)
+
+
+@router.get("/batch", response_model=List[schemas.BatchSimulationJob])
+def read_batch_simulations(
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve the batch simulations of the current user
+    """
+    return [job_state(job) for job in batch_jobs.by_owner(current_user.id)]
+
+
+@router.get("/batch/{job_id}", response_model=schemas.BatchSimulationJob)
+def read_batch_simulation(
+    *,
+    job_id: str,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get the status of a batch simulation
+    """
+    return job_state(get_job(job_id, current_user))
+
+
+@router.get("/batch/{job_id}/{table}")
+def download_batch_simulation(
+    *,
+    job_id: str,
+    table: str,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Download an output table ("trajectories" or "handovers") of a batch simulation
+    """
+    job = get_job(job_id, current_user)
+
+    if job.status != "finished":
+        raise HTTPException(
+            status_code=409, detail=f"Batch simulation is {job.status}"
+        )
+
+    filename = job.files.get(table)
+    if filename is None:
+        raise HTTPException(status_code=404, detail=f"Table {table} not found")
+
+    return FileResponse(filename, filename=f"{table}.{job.format}")
+
+
+@router.delete("/batch/{job_id}", response_model=schemas.BatchSimulationJob)
+def delete_batch_simulation(
+    *,
+    job_id: str,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Delete a finished or failed batch simulation and its output. They are also
+    deleted BATCH_SIMULATION_RETENTION seconds after the simulation is over.
+    """
+    job = get_job(job_id, current_user)
+
+    if not job.done:
+        raise HTTPException(
+            status_code=409, detail=f"Batch simulation is {job.status}"
+        )
+
+    batch_jobs.remove(job.id)
+    return job_state(job)
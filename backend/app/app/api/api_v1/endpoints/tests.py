@@ -1,7 +1,8 @@
-from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, Path
+from datetime import datetime
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
 from sqlalchemy.orm import Session
-from app import crud, models
+from app import crud, models, schemas
 from app.api import deps
 from app.api.api_v1.endpoints.ue_movement import (
     retrieve_ue,
@@ -9,6 +10,7 @@ from app.api.api_v1.endpoints.ue_movement import (
     retrieve_ue_path_losses,
     retrieve_ue_rsrps,
     retrieve_ue_handovers,
+    retrieve_ue_radio,
 )
 from .utils import ReportLogging
 
@@ -100,21 +102,45 @@ def read_UE_rsrps(
     return retrieve_ue_rsrps(supi, current_user.id, db)
 
 
-@router.get("/{supi}/handovers")
-def read_UE_handovers(
+@router.get("/{supi}/radio")
+def read_UE_radio(
     *,
     db: Session = Depends(deps.get_db),
     supi: str = Path(..., description="The SUPI of the UE you want to retrieve"),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     UE = crud.ue.get_supi(db=db, supi=supi)
-    print(UE)
     if not UE:
         raise HTTPException(status_code=404, detail="UE not found")
     if not crud.user.is_superuser(current_user) and (UE.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
 
-    if retrieve_ue(supi, db) is None:
+    radio = retrieve_ue_radio(supi)
+    if radio is None:
         raise HTTPException(status_code=400, detail="The emulation needs to be ongoing")
 
-    return retrieve_ue_handovers(supi)
+    return radio
+
+
+@router.get("/{supi}/handovers", response_model=schemas.HandoverPage)
+def read_UE_handovers(
+    *,
+    db: Session = Depends(deps.get_db),
+    supi: str = Path(..., description="The SUPI of the UE you want to retrieve"),
+    since: Optional[datetime] = Query(
+        None, description="Only handovers at or after this simulated time"
+    ),
+    until: Optional[datetime] = Query(
+        None, description="Only handovers before this simulated time"
+    ),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    UE = crud.ue.get_supi(db=db, supi=supi)
+    if not UE:
+        raise HTTPException(status_code=404, detail="UE not found")
+    if not crud.user.is_superuser(current_user) and (UE.owner_id != current_user.id):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+
+    return retrieve_ue_handovers(supi, since, until, skip, limit)
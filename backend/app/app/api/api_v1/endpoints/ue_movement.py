@@ -1,117 +1,61 @@
-import asyncio
+import json
 import logging
-from typing import Any, Literal, Optional, List
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional, List, Tuple, Union
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Path
+import numpy as np
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Path, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from fastapi.encoders import jsonable_encoder
 
-from app import crud, models, tools
+from app import crud, models, schemas
 from app.api import deps
-from app.crud import crud_mongo
-from app.db.session import client
 from app.models.UE import UE
-from app.models.Cell import Cell
 from app.schemas import Msg
-from app.schemas.monitoringevent import (
-    MonitoringType,
-    Point,
+from app.schemas.monitoringevent import Point
+from app.tools.distance import check_distance, distance_matrix
+from app.tools.radio_memo import radio_memo
+from app.tools.rsrp_calculation import check_rsrp, check_path_loss, radio_matrices
+from app.tools.handover_history import handover_history
+from app.tools.monitoring_callbacks import location_notification
+from app.tools.movement_checkpoint import movement_checkpoints
+from app.tools.movement_engine import (
+    MovingUE,
+    may_move,
+    movement_engine,
+    movement_error,
 )
-from app.tools.distance import check_distance
-from app.tools.rsrp_calculation import check_rsrp, check_path_loss
-from app.api.deps import db_context
-from app.tools.monitoring_callbacks import (
-    get_subscription_mon_types,
-    handle_location_report_callback,
-    handle_ue_reachability_callback,
-    handle_loss_connectivity_callback,
-)
-
-# Moving devices state
-handovers = dict()
-moving_devices = dict()
+from app.tools.path_cache import path_cache
+from app.tools.sim_clock import sim_clock
+from app.tools.spatial_index import CellRecord, cell_index
+from app.tools.topology import TopologySnapshot, topology_snapshots
+from app.tools.ue_store import UEState, ue_store
 
 # API
 router = APIRouter()
 
 
+@router.on_event("startup")
+def startup():
+    handover_history.load()
+    movement_checkpoints.start()
+    movement_engine.start()
+    ue_store.start()
+
+
 @router.on_event("shutdown")
 def shutdown():
     logging.warning("Shut down detected stopping all UE movement")
-    moving_devices.clear()
-
-
-Speed = Literal["HIGH", "LOW"]
-
-
-def increment_position(speed: Speed) -> int:
-    if speed == "LOW":
-        return 1
-
-    if speed == "HIGH":
-        return 10
-
-
-def validate_ue(*, ue: Optional[UE], user: models.User, db) -> Optional[UE]:
-    if ue is None:
-        logging.warning("UE not found")
-        return None
-
-    if not user.is_superuser or ue.owner_id != user.id:
-        logging.warning("Not enough permissions")
-        return None
-
-    path = crud.path.get(db=db, id=ue.path_id)
-
-    if path is None:
-        logging.warning("Path not found")
-        return None
-
-    return ue
-
-
-async def movement_loop(supi: str, user: models.User):
-    with db_context() as db:
-        ue = validate_ue(ue=crud.ue.get_supi(db=db, supi=supi), user=user, db=db)
-
-        if ue is None:
-            moving_devices.pop(supi)
-            return
-
-        points = crud.points.get_points(db=db, path_id=ue.path_id)
-
-        # Assume end of path
-        current_position_index = -1
-        cells = crud.cell.get_multi_by_owner(db=db, owner_id=user.id)
-
-        # Find current position if one exists
-        for index, point in enumerate(points):
-            if (ue.latitude == point.latitude) and (ue.longitude == point.longitude):
-                current_position_index = index
-                break
-
-        handovers[ue.supi] = []
-
-        while True:
-            if supi not in moving_devices:
-                break
-
-            current_position_index = (
-                increment_position(ue.speed) + current_position_index
-            ) % len(points)
-            point = points[current_position_index]
-
-            ue, old_cell, new_cell = await update_ue(
-                db, ue, cells, point.latitude, point.longitude
-            )
-
-            await location_notification(ue, old_cell, new_cell)
-
-            await asyncio.sleep(1)
+    # Saved before the engine lets go of the moving UEs, to resume them on startup
+    movement_checkpoints.shutdown()
+    movement_engine.shutdown()
+    ue_store.shutdown()
+    handover_history.save()
 
 
 async def update_ue(
-    db: Session, ue: UE, cells: List[Cell], latitude: float, longitude: float
+    db: Session, ue: UE, cells: List[CellRecord], latitude: float, longitude: float
 ) -> tuple[UE, Optional[str], Optional[str]]:
     cell_now, _ = check_distance(latitude, longitude, cells)
 
@@ -124,8 +68,11 @@ async def update_ue(
 
     new_cell_id = cell_now.id if cell_now is not None else None
     if ue.Cell_id != new_cell_id:
+        if cell_now:
+            movement_engine.record_handover(ue.supi, ue.Cell_id, cell_now.id)
+
+        # Only the key is set, the cached cell is not an instance of this session
         ue.Cell_id = new_cell_id
-        ue.Cell = cell_now
 
         crud.ue.update(
             db=db,
@@ -133,55 +80,9 @@ async def update_ue(
             obj_in={"Cell_id": ue.Cell_id},
         )
 
-        if cell_now:
-            handovers[ue.supi].append(cell_now.id)
-
     return ue, old_cell, new_cell
 
 
-async def location_notification(
-    ue: UE, old_cell_id: Optional[str], current_cell_id: Optional[str]
-):
-    db_mongo = client.fastapi
-
-    subscriptions = db_mongo["MonitoringEvent"].find(
-        {"supi": str(ue.supi)}, {"subscription": True}
-    )
-
-    for doc in subscriptions:
-        doc_id = doc.get("_id")
-        sub = doc["subscription"]
-        sub_validate_time = tools.check_expiration_time(
-            expire_time=sub.get("monitorExpireTime")
-        )
-
-        sub_validate_number_of_reports = tools.check_numberOfReports(
-            sub.get("maximumNumberOfReports")
-        )
-
-        if not sub_validate_time or not sub_validate_number_of_reports:
-            crud_mongo.delete_by_uuid(db_mongo, "MonitoringEvent", doc_id)
-            continue
-
-        for monType in get_subscription_mon_types(sub):
-            if monType == MonitoringType.LOCATION_REPORTING:
-                asyncio.create_task(handle_location_report_callback(sub, ue, doc_id))
-
-            elif monType == MonitoringType.LOSS_OF_CONNECTIVITY:
-                asyncio.create_task(
-                    handle_loss_connectivity_callback(
-                        sub, ue, doc_id, old_cell_id, current_cell_id
-                    )
-                )
-
-            elif monType == MonitoringType.UE_REACHABILITY:
-                asyncio.create_task(
-                    handle_ue_reachability_callback(
-                        sub, ue, doc_id, old_cell_id, current_cell_id
-                    )
-                )
-
-
 @router.post("/update_location/{supi}", status_code=204)
 async def update_location(
     *,
@@ -199,13 +100,29 @@ async def update_location(
             detail="No device found",
         )
 
-    ue, old_cell, new_cell = await update_ue(
-        db,
-        ue,
-        crud.cell.get_multi_by_owner(db=db, owner_id=current_user.id),
-        new_location.point.lat,
-        new_location.point.lon,
+    # Only the cells that may cover the new location are evaluated
+    cells = cell_index.get(db, current_user.id).candidates(
+        new_location.point.lat, new_location.point.lon
     )
+    state = ue_store.get(supi)
+
+    if state is not None:
+        # The UE is moving, its state is owned by the store and written behind
+        cell_now, _ = check_distance(
+            new_location.point.lat, new_location.point.lon, cells
+        )
+        ue = state
+        old_cell, new_cell = movement_engine.apply(
+            ue, new_location.point.lat, new_location.point.lon, cell_now
+        )
+    else:
+        ue, old_cell, new_cell = await update_ue(
+            db,
+            ue,
+            cells,
+            new_location.point.lat,
+            new_location.point.lon,
+        )
 
     background_tasks.add_task(location_notification, ue, old_cell, new_cell)
 
@@ -217,19 +134,17 @@ def initiate_movement(
     *,
     msg: Msg,
     current_user: models.User = Depends(deps.get_current_active_user),
-    background_tasks: BackgroundTasks,
 ) -> Any:
     """
     Start the loop.
     """
-    if msg.supi in moving_devices:
+    if movement_engine.is_moving(msg.supi):
         raise HTTPException(
             status_code=409,
             detail=f"There is a thread already running for this supi:{msg.supi}",
         )
 
-    moving_devices[msg.supi] = current_user.id
-    background_tasks.add_task(movement_loop, msg.supi, current_user)
+    movement_engine.register(msg.supi, current_user)
 
     return {"msg": "Loop started"}
 
@@ -244,7 +159,7 @@ def terminate_movement(
     Stop the loop.
     """
     try:
-        moving_devices.pop(msg.supi)
+        movement_engine.unregister(msg.supi)
         return {"msg": "Loop ended"}
     except KeyError as ke:
         logging.warning("Key Not Found in Moving Devices Dictionary:", ke)
@@ -254,6 +169,101 @@ def terminate_movement(
         )
 
 
+def select_ues(
+    db: Session, selection: schemas.MovementSelection, current_user: models.User
+) -> tuple[List[UE], List[str]]:
+    """The selected UEs and the requested SUPIs that do not exist"""
+    if selection.supis is not None:
+        ues = crud.ue.get_supi_multi(db, selection.supis)
+        found = {ue.supi for ue in ues}
+        return ues, [supi for supi in selection.supis if supi not in found]
+
+    if selection.path_id is not None:
+        ues = crud.ue.get_by_path(
+            db=db, path_id=selection.path_id, owner_id=current_user.id
+        )
+        return ues, []
+
+    return crud.ue.get_multi_by_owner(db=db, owner_id=current_user.id, limit=None), []
+
+
+@router.post("/start-loops", response_model=schemas.MovementBulkResult)
+def initiate_movements(
+    *,
+    selection: schemas.MovementSelection,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Start the loop of several UEs: the listed SUPIs, the current user's UEs on a
+    path or, when nothing is selected, all the current user's UEs.
+
+    The UEs that can be moved are registered together and start on the same tick.
+    """
+    ues, missing = select_ues(db, selection, current_user)
+    results = [{"supi": supi, "status": "UE not found"} for supi in missing]
+    started: Dict[str, None] = {}
+    # A SUPI listed, or stored, more than once is registered once and its repeats
+    # are reported like the UEs already moving
+    repeated = Counter(selection.supis or ())
+
+    for ue in ues:
+        status = movement_error(ue, current_user)
+        if status is None and (
+            movement_engine.is_moving(ue.supi) or ue.supi in started
+        ):
+            status = "Already moving"
+        if status is None and path_cache.get(db, ue.path_id) is None:
+            status = "Path not found"
+        if status is None:
+            status = "started"
+            started[ue.supi] = None
+        results.append({"supi": ue.supi, "status": status})
+        results.extend(
+            {"supi": ue.supi, "status": "Already moving"}
+            for _ in range(repeated.pop(ue.supi, 1) - 1)
+        )
+
+    movement_engine.register_many(list(started), current_user)
+
+    return {"msg": f"{len(started)} loops started", "results": results}
+
+
+@router.post("/stop-loops", response_model=schemas.MovementBulkResult)
+def terminate_movements(
+    *,
+    selection: schemas.MovementSelection,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Stop the loop of several UEs, selected like in start-loops.
+    """
+    if selection.supis is not None:
+        # Only the engine needs to know the UEs, no DB lookup
+        supis = selection.supis
+    else:
+        supis = [ue.supi for ue in select_ues(db, selection, current_user)[0]]
+
+    # Only the UEs the current user may move are stopped
+    statuses = {}
+    for supi in supis:
+        state = movement_engine.moving.get(supi)
+        if state is None:
+            statuses[supi] = "Not moving"
+        elif not may_move(state.owner_id, current_user):
+            statuses[supi] = "Not enough permissions"
+    stopped = movement_engine.unregister_many(
+        [supi for supi in dict.fromkeys(supis) if supi not in statuses]
+    )
+    statuses.update(dict.fromkeys(stopped, "stopped"))
+    results = [
+        {"supi": supi, "status": statuses.get(supi, "Not moving")} for supi in supis
+    ]
+
+    return {"msg": f"{len(stopped)} loops ended", "results": results}
+
+
 @router.get("/state-loop/{supi}", status_code=200)
 def state_movement(
     *,
@@ -274,52 +284,267 @@ def state_ues(
     """
     Get the state
     """
-    return crud.ue.get_multi_by_owner(db, owner_id=current_user.id)
+    return ue_store.overlay(crud.ue.get_multi_by_owner(db, owner_id=current_user.id))
+
+
+@router.post("/measurements", response_model=schemas.RadioMeasurementMatrix)
+def read_measurements(
+    *,
+    query: schemas.RadioMeasurementQuery,
+    stream: bool = Query(
+        False, description="Stream the rows as newline delimited JSON"
+    ),
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Distances, path losses and RSRPs of many moving UEs to the current user's
+    cells, computed in one pass over the cached topology.
+
+    With `stream` the response is NDJSON: a first line with the cells and the
+    skipped UEs, then one line per measured UE.
+    """
+    states, skipped = select_moving_ues(query.supis, current_user)
+    snapshot = topology_snapshots.get(db, current_user.id)
+    supis = [state.supi for state in states]
+    cells = snapshot.cell_ids.tolist()
+    blocks = radio_matrices(
+        [state.ue.latitude for state in states],
+        [state.ue.longitude for state in states],
+        snapshot.table,
+        path_loss=snapshot.path_loss,
+        link_gain=snapshot.link_gain,
+    )
+
+    if stream:
+        def lines():
+            yield json.dumps({"cells": cells, "skipped": skipped}) + "\n"
+            for rows, *matrices in blocks:
+                values = measurement_values(query.quantities, matrices)
+                for i, supi in enumerate(supis[rows]):
+                    row = {name: value[i] for name, value in values.items()}
+                    yield json.dumps({"supi": supi, **row}) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    result = {"cells": cells, "supis": supis, "skipped": skipped}
+    result.update({name: [] for name in query.quantities})
+    for _, *matrices in blocks:
+        for name, value in measurement_values(query.quantities, matrices).items():
+            result[name].extend(value)
+    return result
+
+
+@router.get("/radio-memo", response_model=schemas.RadioMemoStats)
+def read_radio_memo(
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get the size and hit rate of the memo of the radio conditions per path point
+    """
+    return radio_memo.stats()
+
+
+@router.get("/clock", response_model=schemas.SimulationClock)
+def read_clock(
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get the simulation clock
+    """
+    return clock_state()
+
+
+@router.put("/clock", response_model=schemas.SimulationClock)
+async def update_clock(
+    *,
+    item_in: schemas.SimulationClockUpdate,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Change the speed factor of the simulation clock or switch to step mode
+    """
+    if item_in.speed is not None:
+        sim_clock.set_speed(item_in.speed)
+
+    if item_in.step_mode is not None:
+        sim_clock.set_step_mode(item_in.step_mode)
+
+    return clock_state()
+
+
+@router.post("/clock/advance", response_model=schemas.SimulationClock)
+async def advance_clock(
+    *,
+    item_in: schemas.SimulationClockAdvance,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Advance the simulation clock by a number of ticks (step mode only)
+    """
+    if not sim_clock.step_mode:
+        raise HTTPException(
+            status_code=409,
+            detail="The simulation clock must be in step mode to be advanced manually",
+        )
+
+    await sim_clock.advance(item_in.ticks)
+
+    return clock_state()
 
 
 # Functions
+def clock_state() -> dict:
+    return {
+        "ticks": sim_clock.ticks,
+        "time": sim_clock.time,
+        "now": sim_clock.now(),
+        "tick_interval": sim_clock.tick_interval,
+        "speed": sim_clock.speed,
+        "step_mode": sim_clock.step_mode,
+    }
+
+
 def retrieve_ue_state(supi: str, user_id: int) -> bool:
-    return moving_devices.get(supi) is not None
+    return movement_engine.is_moving(supi)
 
 
-def retrieve_ue(supi: str, db: Session) -> Optional[UE]:
-    if moving_devices.get(supi):
-        return crud.ue.get_supi(db, supi)
+def retrieve_ue(supi: str, db: Session) -> Optional[Union[UE, UEState]]:
+    if movement_engine.is_moving(supi):
+        return current_ue(supi, db)
 
     return None
 
 
+def current_ue(supi: str, db: Session) -> Optional[Union[UE, UEState]]:
+    """Moving UEs are read from the store, which is ahead of the DB"""
+    return ue_store.get(supi) or crud.ue.get_supi(db, supi)
+
+
+def memoized_radio(
+    supi: str, snapshot: TopologySnapshot
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Distances and RSRPs of a moving UE from the radio memo, None if not moving"""
+    state = movement_engine.moving.get(supi)
+    if state is None or not state.admitted:
+        return None
+
+    distances, rsrps = radio_memo.lookup(snapshot, [state.path], [state.distance])
+    return distances[0], rsrps[0]
+
+
 def retrieve_ue_distances(supi: str, user_id: int, db: Session) -> dict:
-    ue = crud.ue.get_supi(db, supi)
+    ue = current_ue(supi, db)
     if ue is None:
         return {}
 
-    cells = crud.cell.get_multi_by_owner(db=db, owner_id=user_id)
+    snapshot = topology_snapshots.get(db, user_id)
+    memoized = memoized_radio(supi, snapshot)
+    if memoized is not None:
+        distances = memoized[0]
+    else:
+        distances = distance_matrix(ue.latitude, ue.longitude, snapshot.table)[0]
 
-    _, distances = check_distance(ue.latitude, ue.longitude, cells)
-    return distances
+    return {
+        f"{cell.id}": dist for cell, dist in zip(snapshot.cells, distances.tolist())
+    }
 
 
 def retrieve_ue_path_losses(supi: str, id, db: Session) -> dict:
-    ue = crud.ue.get_supi(db, supi=supi)
+    ue = current_ue(supi, db)
     if ue is None:
         return {}
 
-    cells = crud.cell.get_multi_by_owner(db, owner_id=id)
+    snapshot = topology_snapshots.get(db, id)
+    memoized = memoized_radio(supi, snapshot)
+    if memoized is not None:
+        losses = snapshot.path_loss(memoized[0])
+        return {cell.id: loss for cell, loss in zip(snapshot.cells, losses.tolist())}
 
-    return check_path_loss(ue.latitude, ue.longitude, jsonable_encoder(cells))
+    return check_path_loss(
+        ue.latitude, ue.longitude, snapshot.cells, path_loss=snapshot.path_loss
+    )
 
 
 def retrieve_ue_rsrps(supi: str, id, db: Session) -> dict:
-    ue = crud.ue.get_supi(db, supi=supi)
+    ue = current_ue(supi, db)
     if ue is None:
         return {}
 
-    cells = crud.cell.get_multi_by_owner(db, owner_id=id)
+    snapshot = topology_snapshots.get(db, id)
+    memoized = memoized_radio(supi, snapshot)
+    if memoized is not None:
+        rsrps = memoized[1].tolist()
+        return {f"{cell.id}": rsrp for cell, rsrp in zip(snapshot.cells, rsrps)}
+
+    return check_rsrp(
+        ue.latitude,
+        ue.longitude,
+        snapshot.cells,
+        path_loss=snapshot.path_loss,
+        link_gain=snapshot.link_gain,
+    )
 
-    return check_rsrp(ue.latitude, ue.longitude, cells)
 
+def select_moving_ues(
+    supis: Optional[List[str]], current_user: models.User
+) -> Tuple[List[MovingUE], Dict[str, str]]:
+    """
+    The listed (or all the current user's) moving UEs, and why the other listed
+    UEs were skipped. Only the movement engine is read, not the DB.
+    """
+    if supis is None:
+        states = [
+            state
+            for state in list(movement_engine.moving.values())
+            if state.admitted and state.user.id == current_user.id
+        ]
+        return states, {}
+
+    states, skipped = [], {}
+    for supi in dict.fromkeys(supis):
+        state = movement_engine.moving.get(supi)
+        if state is None or not state.admitted:
+            skipped[supi] = "The emulation needs to be ongoing"
+        elif not may_move(state.ue.owner_id, current_user):
+            skipped[supi] = "Not enough permissions"
+        else:
+            states.append(state)
+    return states, skipped
+
+
+def measurement_values(quantities: List[str], matrices: List[np.ndarray]) -> dict:
+    """The requested matrices of a block as rounded nested lists"""
+    distances, losses, rsrps = matrices
+    values = {
+        "distances": lambda: np.round(distances, 1).tolist(),
+        "path_losses": lambda: np.round(losses, 2).tolist(),
+        "rsrps": lambda: np.round(rsrps, 2).tolist(),
+    }
+    return {name: values[name]() for name in quantities}
+
+
+def retrieve_ue_radio(supi: str) -> Optional[dict]:
+    """Radio conditions of a moving UE, as measured by the engine on the last tick"""
+    state = movement_engine.moving.get(supi)
+    if state is None or not state.admitted:
+        return None
 
-def retrieve_ue_handovers(supi: str) -> list:
-    result = handovers.get(supi)
-    return result if result is not None else []
+    return {
+        "serving_cell_id": state.ue.Cell.cell_id if state.ue.Cell else None,
+        "best_cell_id": state.best_cell.cell_id if state.best_cell else None,
+        "rsrp": state.rsrp,
+        "sinr": state.sinr,
+        "throughput": state.throughput,
+    }
+
+
+def retrieve_ue_handovers(
+    supi: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> dict:
+    total, records = handover_history.query(supi, since, until, skip, limit)
+    return {"total": total, "skip": skip, "limit": limit, "records": records}
@@ -0,0 +1,76 @@
+"""
+Serving cell selection for many UEs: vectorized batch API vs. one scalar
+`check_distance` call per UE, as the movement loop used to do.
+
+    python -m app.benchmarks.distance --ues 1000 --cells 1000
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from app.models.Cell import Cell
+from app.tools.distance import CellTable, serving_cells
+
+
+def scalar_serving_cells(latitudes, longitudes, cells):
+    # The original implementation: a Python loop over the cells for every UE
+    def distance(lat1, lon1, lat2, lon2):
+        φ1 = lat1 * math.pi / 180
+        φ2 = lat2 * math.pi / 180
+        Δλ = (lon2 - lon1) * math.pi / 180
+        Δφ = (lat2 - lat1) * math.pi / 180
+        a = math.sin(Δφ / 2) * math.sin(Δφ / 2) + math.cos(φ1) * math.cos(
+            φ2
+        ) * math.sin(Δλ / 2) * math.sin(Δλ / 2)
+        return 6371e3 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    indices = []
+    for lat, lon in zip(latitudes, longitudes):
+        best, best_distance, distances = -1, float("inf"), {}
+        for index, cell in enumerate(cells):
+            dist = distance(lat, lon, cell.latitude, cell.longitude)
+            distances[f"{cell.id}"] = dist
+            if dist <= cell.radius and dist < best_distance:
+                best, best_distance = index, dist
+        indices.append(best)
+    return np.array(indices)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ues", type=int, default=1000)
+    parser.add_argument("--cells", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    cells = [
+        Cell(id=i, latitude=lat, longitude=lon, radius=radius)
+        for i, (lat, lon, radius) in enumerate(
+            zip(
+                rng.uniform(37.9, 38.1, args.cells),
+                rng.uniform(23.6, 23.9, args.cells),
+                rng.uniform(100, 1000, args.cells),
+            )
+        )
+    ]
+    latitudes = rng.uniform(37.9, 38.1, args.ues)
+    longitudes = rng.uniform(23.6, 23.9, args.ues)
+
+    start = time.perf_counter()
+    expected = scalar_serving_cells(latitudes.tolist(), longitudes.tolist(), cells)
+    scalar = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indices = serving_cells(latitudes, longitudes, CellTable(cells))
+    vectorized = time.perf_counter() - start
+
+    assert (indices == expected).all()
+    print(f"{args.ues} UEs x {args.cells} cells")
+    print(f"scalar:     {scalar * 1000:9.1f} ms")
+    print(f"vectorized: {vectorized * 1000:9.1f} ms ({scalar / vectorized:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
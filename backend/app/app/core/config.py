@@ -132,6 +132,90 @@ class Settings(BaseSettings):
 
     REPORT_PATH: str
 
+    # Seconds between two write-behind flushes of the moving UEs' state
+    UE_STORE_FLUSH_INTERVAL: float = 5.0
+
+    # Simulated seconds per movement tick and how fast simulated time runs
+    SIMULATION_TICK_INTERVAL: float = 1.0
+    SIMULATION_SPEED: float = 1.0
+
+    # UE speeds in m/s and the spacing in metres of the coverage samples of a path
+    UE_SPEED_LOW: float = 1.5
+    UE_SPEED_HIGH: float = 15.0
+    PATH_SAMPLING_RESOLUTION: float = 5.0
+
+    # Noise power in dBm per resource element: thermal noise over a 15 kHz
+    # subcarrier (-174 dBm/Hz) with a 7 dB UE noise figure
+    RADIO_NOISE_POWER: float = -125.2
+
+    # Path loss model of the owners that did not pick one (see tools/propagation.py),
+    # and the carrier frequency in GHz and antenna heights in metres assumed when a
+    # cell does not set them
+    PROPAGATION_MODEL: str = "legacy"
+    CELL_CARRIER_FREQUENCY: float = 2.6475
+    CELL_ANTENNA_HEIGHT: float = 25.0
+    UE_ANTENNA_HEIGHT: float = 1.5
+
+    # Downtilt and horizontal beamwidth in degrees of the sectorized cells that do
+    # not set them
+    CELL_ANTENNA_TILT: float = 6.0
+    CELL_ANTENNA_BEAMWIDTH: float = 65.0
+
+    # Clutter raster of obstacle heights (see tools/terrain.py, no clutter loss
+    # when None): samples of each UE-cell profile, distance in metres beyond which
+    # pairs are not profiled and profiles cached
+    CLUTTER_RASTER_PATH: Optional[str] = None
+    CLUTTER_PROFILE_SAMPLES: int = 32
+    CLUTTER_MAX_DISTANCE: float = 3000.0
+    CLUTTER_CACHE_SIZE: int = 1_000_000
+
+    # NR carrier of the cells: channel bandwidth in MHz, subcarrier spacing in kHz,
+    # MIMO layers and the CQI table ("qam64" or "qam256") of the throughput model
+    NR_CHANNEL_BANDWIDTH: int = 20
+    NR_SUBCARRIER_SPACING: int = 30
+    NR_MIMO_LAYERS: int = 2
+    NR_CQI_TABLE: str = "qam256"
+
+    # Radio conditions memoized per path point: spacing in metres of the points
+    # UE positions are snapped to and the memory the memo may hold
+    RADIO_MEMO_RESOLUTION: float = 1.0
+    RADIO_MEMO_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Side in metres of the grid buckets the cells are indexed in
+    CELL_INDEX_BUCKET_SIZE: float = 500.0
+
+    # Coverage rasters: pixel size in metres, upper bound of pixels per raster (the
+    # pixels grow beyond it), the RSRP range in dBm of the tile colours and the
+    # directory the rasters are memory mapped from (kept in memory when None)
+    COVERAGE_RESOLUTION: float = 10.0
+    COVERAGE_MAX_PIXELS: int = 4_000_000
+    COVERAGE_MIN_RSRP: float = -120.0
+    COVERAGE_MAX_RSRP: float = -60.0
+    COVERAGE_RASTER_PATH: Optional[str] = "/tmp/coverage"
+
+    # Where the output of the batch simulations started through the API is written
+    # and the seconds a finished simulation and its output are kept
+    BATCH_SIMULATION_PATH: str = "/tmp/batch_simulations"
+    BATCH_SIMULATION_RETENTION: float = 24 * 60 * 60
+
+    # Seconds between two checkpoints of the moving UEs, resumed after a restart
+    MOVEMENT_CHECKPOINT_INTERVAL: float = 10.0
+
+    # Handovers kept per UE and, optionally, the file they are saved to on shutdown
+    HANDOVER_HISTORY_SIZE: int = 1000
+    HANDOVER_HISTORY_PATH: Optional[str] = None
+
+    # How the moving UEs change cell: "a3" when a neighbour's RSRP exceeds the
+    # serving cell's by the hysteresis in dB for time-to-trigger ticks in a row,
+    # "distance" as soon as another cell is closer
+    HANDOVER_ALGORITHM: str = "a3"
+    HANDOVER_HYSTERESIS: float = 3.0
+    HANDOVER_TIME_TO_TRIGGER: int = 3
+
+    # Metres a UE must move before a LOCATION_REPORTING subscription without a
+    # linearDistance reports again in the same cell
+    LOCATION_REPORT_MIN_DISPLACEMENT: float = 50.0
+
     qos: QoSInterfaceSettings = QoSInterfaceSettings()
 
     class Config:
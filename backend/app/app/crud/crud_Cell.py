@@ -1,4 +1,4 @@
-from typing import List
+from typing import Any, Dict, List, Union
 
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
@@ -7,6 +7,8 @@ from sqlalchemy.sql import text
 from app.crud.base import CRUDBase
 from app.models.Cell import Cell
 from app.schemas.Cell import CellCreate, CellUpdate
+from app.tools.spatial_index import cell_index
+from app.tools.topology import topology_versions
 
 
 class CRUD_Cell(CRUDBase[Cell, CellCreate, CellUpdate]):
@@ -18,8 +20,30 @@ class CRUD_Cell(CRUDBase[Cell, CellCreate, CellUpdate]):
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        cell_index.add(db_obj)
+        topology_versions.bump(owner_id)
         return db_obj
 
+    def update(
+        self, db: Session, *, db_obj: Cell, obj_in: Union[CellUpdate, Dict[str, Any]]
+    ) -> Cell:
+        db_obj = super().update(db, db_obj=db_obj, obj_in=obj_in)
+        cell_index.add(db_obj)
+        topology_versions.bump(db_obj.owner_id)
+        return db_obj
+
+    def remove(self, db: Session, *, id: int) -> Cell:
+        obj = super().remove(db, id=id)
+        cell_index.remove(obj)
+        topology_versions.bump(obj.owner_id)
+        return obj
+
+    def remove_all_by_owner(self, db: Session, owner_id: int):
+        result = super().remove_all_by_owner(db, owner_id=owner_id)
+        cell_index.invalidate(owner_id)
+        topology_versions.bump(owner_id)
+        return result
+
     def get_multi_by_owner(
         self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
     ) -> List[Cell]:
@@ -34,6 +58,13 @@ class CRUD_Cell(CRUDBase[Cell, CellCreate, CellUpdate]):
     def get_Cell_id(self, db: Session, id: str) -> Cell:
         return db.query(self.model).filter(self.model.cell_id == id).first()
 
+    def get_owner_Cell_id(self, db: Session, owner_id: int, id: str) -> Cell:
+        return (
+            db.query(self.model)
+            .filter(self.model.owner_id == owner_id, self.model.cell_id == id)
+            .first()
+        )
+
     def get_by_gNB_id(
         self, db: Session, *, gNB_id: int
     ) -> List[Cell]:
@@ -47,6 +78,8 @@ class CRUD_Cell(CRUDBase[Cell, CellCreate, CellUpdate]):
         obj = db.query(self.model).filter(Cell.cell_id == cell_id).first()
         db.delete(obj)
         db.commit()
+        cell_index.remove(obj)
+        topology_versions.bump(obj.owner_id)
         return obj
 
     # def get_by_UE(
@@ -70,6 +70,13 @@ class CRUD_UE(CRUDBase[UE, UECreate, UEUpdate]):
             .first()
         )
 
+    def get_by_path(self, db: Session, *, path_id: int, owner_id: int) -> List[UE]:
+        return (
+            db.query(self.model)
+            .filter(UE.path_id == path_id, UE.owner_id == owner_id)
+            .all()
+        )
+
     def get_by_Cell(self, db: Session, *, cell_id: int) -> List[UE]:
         return db.query(self.model).filter(UE.Cell_id == cell_id).all()
 
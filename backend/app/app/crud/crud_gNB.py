@@ -1,4 +1,4 @@
-from typing import List
+from typing import Any, Dict, List, Union
 
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
@@ -7,6 +7,7 @@ from sqlalchemy.sql.sqltypes import String
 from app.crud.base import CRUDBase
 from app.models.gNB import gNB
 from app.schemas.gNB import gNBCreate, gNBUpdate
+from app.tools.topology import topology_versions
 
 
 class CRUD_gNB(CRUDBase[gNB, gNBCreate, gNBUpdate]):
@@ -18,8 +19,21 @@ class CRUD_gNB(CRUDBase[gNB, gNBCreate, gNBUpdate]):
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        topology_versions.bump(owner_id)
         return db_obj
 
+    def update(
+        self, db: Session, *, db_obj: gNB, obj_in: Union[gNBUpdate, Dict[str, Any]]
+    ) -> gNB:
+        db_obj = super().update(db, db_obj=db_obj, obj_in=obj_in)
+        topology_versions.bump(db_obj.owner_id)
+        return db_obj
+
+    def remove(self, db: Session, *, id: int) -> gNB:
+        obj = super().remove(db, id=id)
+        topology_versions.bump(obj.owner_id)
+        return obj
+
 
 ### Get gNB of specific User
 
@@ -41,6 +55,7 @@ class CRUD_gNB(CRUDBase[gNB, gNBCreate, gNBUpdate]):
         obj = db.query(self.model).filter(gNB.gNB_id == id).first()
         db.delete(obj)
         db.commit()
+        topology_versions.bump(obj.owner_id)
         return obj
 ### Get gNB of specifc Cell
 
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Any, Dict, List, Union
 
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session # this will allow you to declare the type of the db parameters and have better type checks and completion in your functions.
@@ -6,6 +6,7 @@ from sqlalchemy import asc
 from app.crud.base import CRUDBase
 from app.models.path import Path, Points
 from app.schemas.path import PathCreate, PathUpdate
+from app.tools.path_cache import path_cache
 
 
 class CRUD_Path(CRUDBase[Path, PathCreate, PathUpdate]):
@@ -40,6 +41,17 @@ class CRUD_Path(CRUDBase[Path, PathCreate, PathUpdate]):
     def get_description(self, db: Session, description: str) -> Path:
         return db.query(self.model).filter(Path.description == description).first()
 
+    def update(self, db: Session, *, db_obj: Path, obj_in: Union[PathUpdate, Dict[str, Any]]) -> Path:
+        db_obj = super().update(db, db_obj=db_obj, obj_in=obj_in)
+        # After the commit, so a tick does not reload and cache the old points
+        path_cache.invalidate(db_obj.id)
+        return db_obj
+
+    def remove(self, db: Session, *, id: int) -> Path:
+        obj = super().remove(db, id=id)
+        path_cache.invalidate(id)
+        return obj
+
 class CRUD_Points(CRUDBase[Points, PathCreate, PathUpdate]):
     def create(
         self, db: Session, *, obj_in: PathCreate, path_id: int
@@ -53,6 +65,7 @@ class CRUD_Points(CRUDBase[Points, PathCreate, PathUpdate]):
         
         db.commit()
         db.refresh(db_obj)
+        path_cache.invalidate(path_id)
         return db_obj
 
     def get_points(
@@ -70,6 +83,7 @@ class CRUD_Points(CRUDBase[Points, PathCreate, PathUpdate]):
         for obj in objs:
             db.delete(obj)
         db.commit()
+        path_cache.invalidate(path_id)
         return f"Model {self.model.__name__} deleted from db!"
 
 points = CRUD_Points(Points)
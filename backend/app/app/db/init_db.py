@@ -17,6 +17,15 @@ def init_db(db: Session) -> None:
     # the tables un-commenting the next line
     Base.metadata.create_all(bind=engine)
 
+    # create_all does not add columns to existing tables
+    db.execute("ALTER TABLE cell ADD COLUMN IF NOT EXISTS carrier_frequency FLOAT")
+    db.execute("ALTER TABLE cell ADD COLUMN IF NOT EXISTS antenna_height FLOAT")
+    db.execute("ALTER TABLE cell ADD COLUMN IF NOT EXISTS azimuth FLOAT")
+    db.execute("ALTER TABLE cell ADD COLUMN IF NOT EXISTS tilt FLOAT")
+    db.execute("ALTER TABLE cell ADD COLUMN IF NOT EXISTS beamwidth FLOAT")
+    db.execute('ALTER TABLE "user" ADD COLUMN IF NOT EXISTS propagation_model VARCHAR')
+    db.commit()
+
     user = crud.user.get_by_email(db, email=settings.FIRST_SUPERUSER)
     if not user:
         user_in = schemas.UserCreate(
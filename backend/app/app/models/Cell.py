@@ -21,6 +21,15 @@ class Cell(Base):
     latitude = Column(Float, index=True)
     longitude = Column(Float, index=True)
     radius = Column(Float, index=True)
+    # Carrier frequency in GHz and antenna height in metres, used by the path
+    # loss models
+    carrier_frequency = Column(Float, nullable=True)
+    antenna_height = Column(Float, nullable=True)
+    # Sector antenna: azimuth in degrees clockwise from north (omnidirectional when
+    # Null), downtilt and horizontal beamwidth in degrees
+    azimuth = Column(Float, nullable=True)
+    tilt = Column(Float, nullable=True)
+    beamwidth = Column(Float, nullable=True)
 
     #Foreign Keys
     owner_id = Column(Integer, ForeignKey("user.id"))
@@ -3,4 +3,5 @@ from .user import User
 from .Cell import Cell
 from .gNB import gNB
 from .UE import UE
-from .monitoringevent import Monitoring
\ No newline at end of file
+from .monitoringevent import Monitoring
+from .movement import MovementCheckpoint
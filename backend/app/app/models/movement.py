@@ -0,0 +1,17 @@
+from typing import TYPE_CHECKING
+from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from app.db.base_class import Base
+
+if TYPE_CHECKING:
+    from .user import User  # noqa: F401
+
+
+class MovementCheckpoint(Base):
+    # A UE that was moving at the last checkpoint and where it was on its path
+    id = Column(Integer, primary_key=True, index=True)
+    supi = Column(String, unique=True, index=True)
+    distance = Column(Float)
+
+    #Foreign Keys
+    # The user that started the movement
+    owner_id = Column(Integer, ForeignKey("user.id"))
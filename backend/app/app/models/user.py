@@ -32,6 +32,9 @@ class User(Base):
     ## User.is_superuser: Sets type to Boolean, sets default value to False.
     is_superuser = Column(Boolean(), default=False)
 
+    ## User.propagation_model: Path loss model of the user's scenario, the configured default when Null.
+    propagation_model = Column(String, nullable=True)
+
     ## Relationships
     Paths = relationship("Path", back_populates="owner")
     UEs = relationship("UE", back_populates="owner")
@@ -12,6 +12,11 @@ class CellBase(BaseModel):
     latitude: confloat(ge=-90, le=90)
     longitude: confloat(ge=-180, le=180)
     radius: float
+    carrier_frequency: Optional[confloat(gt=0)] = None
+    antenna_height: Optional[confloat(gt=0)] = None
+    azimuth: Optional[confloat(ge=0, lt=360)] = None
+    tilt: Optional[confloat(ge=-90, le=90)] = None
+    beamwidth: Optional[confloat(gt=0, le=360)] = None
     
     
 # Properties to receive on item creation
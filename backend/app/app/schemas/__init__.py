@@ -1,5 +1,15 @@
 from .path import Path, PathCreate, PathUpdate, PathInDB, PathInDBBase, Paths
 from .msg import Msg, SinusoidalParameters
+from .movement import (
+    MovementSelection,
+    UEMovementStatus,
+    MovementBulkResult,
+    Handover,
+    HandoverPage,
+    RadioMeasurementQuery,
+    RadioMeasurementMatrix,
+    RadioMemoStats,
+)
 from .token import Token, TokenPayload
 from .user import User, UserCreate, UserInDB, UserUpdate
 from .gNB import gNB, gNBCreate, gNBInDB, gNBUpdate
@@ -59,3 +69,11 @@ from .analyticsExposure import (
 )
 from .utils import ExtraBaseModel
 from .scenario import scenario
+from .simulation import (
+    SimulationClock,
+    SimulationClockUpdate,
+    SimulationClockAdvance,
+    BatchSimulationCreate,
+    BatchSimulationJob,
+)
+from .coverage import CoverageRaster
@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+
+
+class CoverageRaster(BaseModel):
+    version: int = Field(description="Topology version the raster was computed at")
+    model: str = Field(description="Propagation model of the RSRP")
+    south: float
+    west: float
+    north: float
+    east: float
+    rows: int
+    columns: int
+    step_latitude: float = Field(description="Height of a pixel in degrees")
+    step_longitude: float = Field(description="Width of a pixel in degrees")
@@ -0,0 +1,85 @@
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field, constr, root_validator
+
+
+class MovementSelection(BaseModel):
+    supis: Optional[List[constr(regex=r"^[0-9]{15,16}$")]] = Field(
+        default=None, description="The UEs to start or stop"
+    )
+    path_id: Optional[int] = Field(
+        default=None, description="Select all the UEs of the current user on this path"
+    )
+
+    @root_validator
+    def check_selection(cls, values):
+        if values.get("supis") is not None and values.get("path_id") is not None:
+            raise ValueError("Select the UEs either by SUPI or by path, not both")
+        return values
+
+
+class UEMovementStatus(BaseModel):
+    supi: str
+    status: str = Field(
+        description='"started", "stopped" or the reason why the UE was skipped'
+    )
+
+
+class MovementBulkResult(BaseModel):
+    msg: str
+    results: List[UEMovementStatus]
+
+
+class Handover(BaseModel):
+    tick: int = Field(description="Simulation tick of the handover")
+    timestamp: datetime = Field(description="Simulated time of the handover")
+    from_cell_id: Optional[int] = Field(
+        description="Previous serving cell, null when the UE entered coverage"
+    )
+    to_cell_id: Optional[int]
+
+
+class HandoverPage(BaseModel):
+    total: int = Field(description="Number of handovers in the time window")
+    skip: int
+    limit: int
+    records: List[Handover]
+
+
+RadioQuantity = Literal["distances", "path_losses", "rsrps"]
+
+
+class RadioMeasurementQuery(BaseModel):
+    supis: Optional[List[constr(regex=r"^[0-9]{15,16}$")]] = Field(
+        default=None,
+        description=(
+            "The UEs to measure, all the current user's moving UEs when omitted"
+        ),
+    )
+    quantities: List[RadioQuantity] = Field(
+        default=["distances", "path_losses", "rsrps"],
+        description="The matrices to return",
+    )
+
+
+class RadioMeasurementMatrix(BaseModel):
+    cells: List[int] = Field(description="Cell ids, the columns of the matrices")
+    supis: List[str] = Field(description="The measured UEs, the rows of the matrices")
+    distances: Optional[List[List[float]]] = Field(description="Metres")
+    path_losses: Optional[List[List[float]]] = Field(description="dB")
+    rsrps: Optional[List[List[float]]] = Field(description="dBm")
+    skipped: Dict[str, str] = Field(
+        default={}, description="The requested UEs that were not measured and why"
+    )
+
+
+class RadioMemoStats(BaseModel):
+    entries: int = Field(description="Path points memoized")
+    bytes: int = Field(description="Memory taken by the memoized vectors")
+    max_bytes: int
+    resolution: float = Field(description="Metres between two memoized path points")
+    hits: int
+    misses: int
+    evictions: int
+    hit_rate: Optional[float] = Field(description="Null before the first lookup")
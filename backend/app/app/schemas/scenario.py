@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
 from app import schemas
-from typing import List
+from app.tools.propagation import model_names
+from typing import List, Optional
 
 class scenario(BaseModel):
     gNBs: List[schemas.gNBCreate]
@@ -8,3 +9,11 @@ class scenario(BaseModel):
     UEs: List[schemas.UECreate]
     paths: List[schemas.Path]
     ue_path_association: List[schemas.ue_path]
+    # Path loss model of the scenario, one of tools/propagation.py (default when None)
+    propagation_model: Optional[str] = None
+
+    @validator("propagation_model")
+    def known_propagation_model(cls, value):
+        if value is not None and value not in model_names():
+            raise ValueError(f"must be one of {', '.join(model_names())}")
+        return value
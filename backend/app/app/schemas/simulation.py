@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field, confloat, conint
+
+from app.schemas.scenario import scenario as Scenario
+
+
+class SimulationClock(BaseModel):
+    ticks: int = Field(description="Number of ticks since the simulation started")
+    time: float = Field(description="Simulated seconds since the simulation started")
+    now: datetime = Field(description="Simulated wall clock time")
+    tick_interval: float = Field(description="Simulated seconds per tick")
+    speed: float = Field(description="Simulated seconds per wall clock second")
+    step_mode: bool = Field(
+        description="When set the clock only advances through the advance endpoint"
+    )
+
+
+class SimulationClockUpdate(BaseModel):
+    speed: Optional[confloat(gt=0)] = Field(
+        default=None, description="Time acceleration factor, e.g. 10 or 100"
+    )
+    step_mode: Optional[bool] = None
+
+
+class SimulationClockAdvance(BaseModel):
+    ticks: conint(ge=1, le=100000) = 1
+
+
+class BatchSimulationCreate(BaseModel):
+    ticks: conint(ge=1, le=1000000) = Field(description="Number of ticks to simulate")
+    tick_interval: Optional[confloat(gt=0)] = Field(
+        default=None,
+        description="Simulated seconds per tick, defaults to the live simulation's",
+    )
+    format: Literal["csv", "parquet", "arrow"] = "csv"
+    handover: Optional[Literal["a3", "distance"]] = Field(
+        default=None,
+        description="Handover algorithm of the UEs, defaults to the live simulation's",
+    )
+    supis: Optional[List[str]] = Field(
+        default=None, description="Only simulate these UEs, all of them when omitted"
+    )
+    scenario: Optional[Scenario] = Field(
+        default=None,
+        description="Scenario to simulate, defaults to the current user's scenario",
+    )
+
+
+class BatchSimulationJob(BaseModel):
+    id: str
+    status: Literal["pending", "running", "finished", "failed"]
+    created: datetime
+    finished: Optional[datetime] = None
+    ticks: int
+    tick_interval: float
+    format: str
+    handover: str
+    tables: List[str] = Field(
+        default=[], description="Output tables that can be downloaded once finished"
+    )
+    error: Optional[str] = None
@@ -0,0 +1,49 @@
+import argparse
+import json
+import logging
+
+from app import schemas
+from app.tools.batch_simulation import run_batch_simulation
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run a scenario headless and write its trajectories and handovers"
+    )
+    parser.add_argument("scenario", help="Scenario file, as exported by the UI")
+    parser.add_argument("--ticks", type=int, required=True)
+    parser.add_argument("--tick-interval", type=float, default=1.0)
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"], default="csv")
+    parser.add_argument(
+        "--handover",
+        choices=["a3", "distance"],
+        default=None,
+        help="Handover algorithm, HANDOVER_ALGORITHM when omitted",
+    )
+    parser.add_argument("--output", default=".", help="Output directory")
+    parser.add_argument(
+        "--supi", action="append", help="Only simulate this UE (repeatable)"
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    with open(args.scenario) as fp:
+        scenario = schemas.scenario(**json.load(fp))
+
+    logger.info("Simulating %d ticks of %s", args.ticks, args.scenario)
+    result = run_batch_simulation(
+        scenario, args.ticks, args.tick_interval, args.supi, args.handover
+    )
+
+    for filename in result.write(args.output, args.format):
+        logger.info("Wrote %s", filename)
+
+
+if __name__ == "__main__":
+    main()
@@ -296,7 +296,9 @@ function ui_initialize_map() {
         "cells": cells_lg,
         "cell coverage": cell_coverage_lg,
         "UEs": ues_lg,
-        "paths": paths_lg
+        "paths": paths_lg,
+        "RSRP": coverage_tile_layer('rsrp'),
+        "best server": coverage_tile_layer('server')
     };
 
     L.control.layers(baseLayers, overlays).addTo(mymap);
@@ -307,6 +309,45 @@ function ui_initialize_map() {
 
 
 
+// Coverage raster tiles of the backend ("rsrp" or "server" layer).
+// The tile requests need the authorization header,
+// so the tiles are fetched and then shown as blobs
+function coverage_tile_layer( layer ) {
+
+    var CoverageLayer = L.GridLayer.extend({
+        createTile: function (coords, done) {
+            var tile = document.createElement('img');
+            var url  = app.api_url + '/coverage/tiles/' + layer + '/' +
+                       coords.z + '/' + coords.x + '/' + coords.y + '.png';
+
+            fetch(url, {
+                headers: { "authorization": "Bearer " + app.auth_obj.access_token }
+            })
+            .then(function (response) {
+                if (!response.ok) { throw new Error(response.statusText); }
+                return response.blob();
+            })
+            .then(function (blob) {
+                tile.onload = function () {
+                    URL.revokeObjectURL(tile.src);
+                    done(null, tile);
+                };
+                tile.src = URL.createObjectURL(blob);
+            })
+            .catch(function (err) {
+                done(err, tile);
+            });
+
+            return tile;
+        }
+    });
+
+    return new CoverageLayer({ tileSize: 256, maxZoom: 23 });
+}
+
+
+
+
 // Ajax request to get UEs data
 // on success: paint the UE marks on the map
 // 
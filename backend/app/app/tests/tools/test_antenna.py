@@ -0,0 +1,39 @@
+import numpy as np
+
+from app.tools.antenna import MAX_GAIN, AntennaTables, horizontal_pattern
+from app.tools.distance import haversine
+
+
+def tables(azimuth) -> AntennaTables:
+    return AntennaTables(
+        latitude=[38.0, 38.0],
+        longitude=[23.8, 23.8],
+        height=[25.0, 25.0],
+        azimuth=[azimuth, np.nan],
+        tilt=[6.0, 6.0],
+        beamwidth=[65.0, 65.0],
+    )
+
+
+def test_horizontal_pattern_is_3db_down_at_half_the_beamwidth() -> None:
+    pattern = horizontal_pattern(65.0, step=0.5)
+    angles = np.arange(-180, 180, 0.5) + 0.25
+
+    assert np.isclose(np.interp(32.5, angles, pattern), -3.0, atol=0.05)
+    assert pattern.min() == -30.0
+
+
+def test_sector_gain_follows_the_azimuth_and_omni_cells_have_none() -> None:
+    # UEs 500 m north and 500 m east of the site
+    latitudes = np.array([38.0 + 500 / 111195, 38.0])
+    longitudes = np.array([23.8, 23.8 + 500 / (111195 * np.cos(np.radians(38.0)))])
+    distances = haversine(latitudes, longitudes, 38.0, 23.8)
+    distances = np.repeat(distances.reshape(-1, 1), 2, axis=1)
+
+    gain = tables(azimuth=90.0).gain(latitudes, longitudes, distances)
+
+    # Boresight east, about 3 degrees below the horizon (the tilt is 6)
+    assert MAX_GAIN - 0.2 < gain[1, 0] <= MAX_GAIN
+    # 90 degrees off the boresight
+    assert np.isclose(gain[0, 0], MAX_GAIN - 12 * (90 / 65) ** 2, atol=0.5)
+    assert np.all(gain[:, 1] == 0)
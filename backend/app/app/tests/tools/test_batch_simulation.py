@@ -0,0 +1,111 @@
+import csv
+import importlib.util
+import os
+from datetime import timedelta
+
+from app import schemas
+from app.tools.batch_simulation import (
+    BatchSimulationJob,
+    BatchSimulationJobs,
+    format_available,
+    run_batch_simulation,
+)
+
+
+def make_scenario() -> schemas.scenario:
+    # A straight path running from the coverage of one cell into the next one
+    points = [{"latitude": 37.999, "longitude": 23.80 + i * 0.001} for i in range(20)]
+    return schemas.scenario(
+        gNBs=[{"gNB_id": "AAAAA1", "name": "gNB1"}],
+        cells=[
+            {
+                "cell_id": "AAAAA1001",
+                "name": "cell1",
+                "latitude": 37.998,
+                "longitude": 23.802,
+                "radius": 300,
+            },
+            {
+                "cell_id": "AAAAA1002",
+                "name": "cell2",
+                "latitude": 37.998,
+                "longitude": 23.815,
+                "radius": 300,
+            },
+        ],
+        UEs=[{"supi": "202010000000001", "speed": "HIGH"}],
+        paths=[{"id": 7, "description": "path", "points": points}],
+        ue_path_association=[{"supi": "202010000000001", "path": 7}],
+    )
+
+
+def test_batch_simulation_trajectories_and_handovers(tmp_path) -> None:
+    result = run_batch_simulation(make_scenario(), ticks=120, handover="distance")
+
+    trajectories = result.trajectories
+    assert len(trajectories["tick"]) == 120
+    assert trajectories["distance"][:2].tolist() == [15.0, 30.0]
+    assert trajectories["cell_id"][0] == "AAAAA1001"
+
+    # The UE leaves cell1 about 455 m along the path, mid-way through tick 31
+    handovers = result.handovers
+    transitions = list(zip(handovers["from_cell_id"], handovers["to_cell_id"]))
+    assert transitions[:2] == [("AAAAA1001", ""), ("", "AAAAA1002")]
+    assert handovers["tick"][0] == 31
+    assert abs(handovers["time"][0] - 30.3) < 0.1
+
+    trajectories_file, handovers_file = result.write(str(tmp_path))
+    with open(trajectories_file) as fp:
+        rows = list(csv.DictReader(fp))
+    assert len(rows) == 120
+    assert rows[0]["supi"] == "202010000000001"
+
+
+def test_a3_batch_simulation_hands_over_on_ticks() -> None:
+    result = run_batch_simulation(make_scenario(), ticks=120, handover="a3")
+
+    assert result.trajectories["cell_id"][0] == "AAAAA1001"
+
+    # Out of cell1's radius on tick 31, the first tick past 455 m
+    handovers = result.handovers
+    transitions = list(zip(handovers["from_cell_id"], handovers["to_cell_id"]))
+    assert transitions[:2] == [("AAAAA1001", ""), ("", "AAAAA1002")]
+    assert handovers["tick"][0] == 31
+    assert handovers["time"].tolist() == handovers["tick"].astype(float).tolist()
+
+
+def test_finished_jobs_expire_with_their_output(tmp_path) -> None:
+    jobs = BatchSimulationJobs(directory=str(tmp_path), retention=60)
+    job = jobs.add(
+        BatchSimulationJob(1, make_scenario(), 5, 1.0, "csv", None, str(tmp_path))
+    )
+    job.run()
+    assert job.status == "finished" and os.path.isdir(job.directory)
+    orphan = tmp_path / "orphan"
+    orphan.mkdir()
+    os.utime(orphan, (0, 0))
+
+    assert jobs.expire(job.finished + timedelta(seconds=30)) == []
+    assert jobs.get(job.id) is job and not orphan.exists()
+
+    assert jobs.expire(job.finished + timedelta(seconds=61)) == [job]
+    assert jobs.get(job.id) is None and not os.path.exists(job.directory)
+
+
+def test_only_jobs_that_are_over_can_be_removed(tmp_path) -> None:
+    jobs = BatchSimulationJobs(directory=str(tmp_path))
+    job = jobs.add(
+        BatchSimulationJob(1, make_scenario(), 5, 1.0, "csv", None, str(tmp_path))
+    )
+
+    assert jobs.remove(job.id) is None
+    job.run()
+    assert jobs.remove(job.id) is job
+    assert jobs.by_owner(1) == [] and not os.path.exists(job.directory)
+
+
+def test_binary_formats_need_pyarrow() -> None:
+    assert format_available("csv")
+    pyarrow = importlib.util.find_spec("pyarrow") is not None
+    assert format_available("parquet") == pyarrow
+    assert format_available("arrow") == pyarrow
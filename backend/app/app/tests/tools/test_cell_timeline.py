@@ -0,0 +1,39 @@
+import numpy as np
+
+from app.models.Cell import Cell
+from app.tools.cell_timeline import NO_CELL, build_timeline
+from app.tools.path_cache import PathGeometry
+from app.tools.spatial_index import CellGrid
+
+
+def make_path() -> PathGeometry:
+    # Two sparse points about 877 m apart along a parallel
+    return PathGeometry(1, np.array([38.0, 38.0]), np.array([23.80, 23.81]))
+
+
+def test_path_geometry_interpolates_between_points() -> None:
+    path = make_path()
+
+    assert abs(path.length - 876.2) < 1
+    latitude, longitude = path.interpolate(path.length / 2)
+    assert latitude == 38.0
+    assert abs(longitude - 23.805) < 1e-9
+    assert path.locate(38.0, 23.805) == path.length / 2
+    assert path.locate(38.01, 23.805) is None
+
+
+def test_timeline_locates_cell_edges_exactly() -> None:
+    path = make_path()
+    cell = Cell(id=3, cell_id="AAAAA1001", latitude=38.0, longitude=23.80, radius=100)
+    timeline = build_timeline(path, CellGrid(500, [cell]), version=0, resolution=50)
+
+    assert timeline.cell_ids.tolist() == [3, NO_CELL]
+    assert abs(timeline.starts[1] - 100) < 0.05
+
+    # Leaving the cell mid-way through a 60 m move, re-entering it on the next lap
+    crossings = timeline.crossings(70, 60)
+    assert len(crossings) == 1
+    offset, from_id, to_id = crossings[0]
+    assert abs(offset - 30) < 0.05
+    assert (from_id, to_id) == (3, NO_CELL)
+    assert timeline.crossings(path.length - 10, 20) == [(10.0, NO_CELL, 3)]
@@ -0,0 +1,61 @@
+import struct
+import zlib
+
+import numpy as np
+
+from app.models.Cell import Cell
+from app.tools.coverage import (
+    NO_CELL,
+    TILE_SIZE,
+    compute_raster,
+    encode_png,
+    rsrp_colors,
+    sample_tile,
+)
+from app.tools.rsrp_calculation import measure
+from app.tools.topology import TopologySnapshot
+
+CELLS = [
+    Cell(id=7, latitude=38.000, longitude=23.800, radius=500),
+    Cell(id=9, latitude=38.000, longitude=23.810, radius=500),
+]
+
+
+def test_raster_pixels_hold_the_best_server_and_its_rsrp(tmp_path) -> None:
+    snapshot = TopologySnapshot(1, 3, CELLS, [])
+    raster = compute_raster(snapshot, resolution=20, directory=str(tmp_path))
+
+    assert isinstance(raster.rsrp, np.memmap)
+    assert raster.south < 38.0 < raster.north and raster.west < 23.8 < raster.east
+
+    row, column = 10, 30
+    latitude = raster.south + (row + 0.5) * raster.step_latitude
+    longitude = raster.west + (column + 0.5) * raster.step_longitude
+    radio = measure([latitude], [longitude], snapshot.table)
+
+    best_server, rsrp = raster.sample([latitude], [longitude])
+    assert best_server[0] == snapshot.cell_ids[radio.best_server[0]]
+    assert np.isclose(rsrp[0], radio.rsrp[0], atol=1e-4)
+
+    best_server, rsrp = raster.sample([0.0], [0.0])
+    assert best_server[0] == NO_CELL and np.isnan(rsrp[0])
+
+
+def test_tiles_outside_the_raster_are_empty_pngs() -> None:
+    raster = compute_raster(TopologySnapshot(1, 3, CELLS, []), resolution=50)
+    best_server, rsrp = sample_tile(raster, 10, 0, 0)
+
+    assert best_server.shape == (TILE_SIZE, TILE_SIZE)
+    assert np.all(best_server == NO_CELL)
+
+    png = encode_png(rsrp_colors(rsrp))
+    assert png.startswith(b"\x89PNG\r\n\x1a\n")
+    width, height = struct.unpack(">II", png[16:24])
+    assert (width, height) == (TILE_SIZE, TILE_SIZE)
+
+    idat = png.index(b"IDAT")
+    length = struct.unpack(">I", png[idat - 4 : idat])[0]
+    raw = np.frombuffer(zlib.decompress(png[idat + 4 : idat + 4 + length]), np.uint8)
+    rows = raw.reshape(TILE_SIZE, TILE_SIZE * 4 + 1)
+    pixels = rows[:, 1:].reshape(TILE_SIZE, TILE_SIZE, 4)
+    assert not pixels[..., 3].any()
@@ -0,0 +1,43 @@
+import numpy as np
+
+from app.models.Cell import Cell
+from app.tools.distance import (
+    NO_SERVING_CELL,
+    CellTable,
+    check_distance,
+    distance,
+    serving_cells,
+)
+
+CELLS = [
+    Cell(id=1, latitude=38.000, longitude=23.800, radius=500),
+    Cell(id=2, latitude=38.000, longitude=23.806, radius=500),
+    Cell(id=3, latitude=38.100, longitude=23.900, radius=100),
+]
+
+
+def test_distance() -> None:
+    # One degree of latitude is about 111.2 km
+    assert abs(distance(38.0, 23.8, 39.0, 23.8) - 111195) < 1
+
+
+def test_serving_cells_picks_the_nearest_covering_cell() -> None:
+    latitudes = np.array([38.000, 38.000, 38.050])
+    longitudes = np.array([23.801, 23.804, 23.850])
+
+    indices, distances = serving_cells(
+        latitudes, longitudes, CellTable(CELLS), return_distances=True
+    )
+
+    assert indices.tolist() == [0, 1, NO_SERVING_CELL]
+    assert distances.shape == (3, 3)
+
+
+def test_check_distance_wraps_the_batch_api() -> None:
+    cell, distances = check_distance(38.0, 23.801, CELLS)
+
+    assert cell is CELLS[0]
+    assert list(distances) == ["1", "2", "3"]
+    assert distances["1"] == distance(38.0, 23.801, 38.0, 23.8)
+    assert check_distance(38.05, 23.85, CELLS)[0] is None
+    assert check_distance(38.05, 23.85, []) == (None, {})
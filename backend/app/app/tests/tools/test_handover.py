@@ -0,0 +1,50 @@
+import numpy as np
+
+from app.tools.handover import A3Handover
+
+CELL_IDS = np.array([10, 20])
+COVERED = np.ones((1, 2), dtype=bool)
+
+
+def test_neighbour_must_beat_the_hysteresis_for_time_to_trigger_ticks() -> None:
+    handover = A3Handover(hysteresis=3.0, time_to_trigger=3)
+
+    def tick(rsrp):
+        return handover.evaluate(
+            ["ue"], np.array([0]), CELL_IDS, COVERED, np.array([rsrp])
+        ).tolist()
+
+    # Within the hysteresis: no candidate at all
+    assert tick([-80.0, -78.0]) == [0]
+    # Entering condition met twice, then lost: the count restarts
+    assert tick([-80.0, -76.0]) == [0]
+    assert tick([-80.0, -76.0]) == [0]
+    assert tick([-80.0, -79.0]) == [0]
+    assert tick([-80.0, -76.0]) == [0]
+    assert tick([-80.0, -76.0]) == [0]
+    assert tick([-80.0, -76.0]) == [1]
+
+
+def test_ues_out_of_service_attach_to_the_best_covering_cell() -> None:
+    handover = A3Handover(hysteresis=3.0, time_to_trigger=3)
+    rsrp = np.array([[-80.0, -70.0], [-80.0, -70.0], [-80.0, -70.0]])
+    covered = np.array([[True, True], [True, False], [False, False]])
+
+    serving = handover.evaluate(
+        ["a", "b", "c"], np.array([-1, 1, 0]), CELL_IDS, covered, rsrp
+    )
+    # No cell, serving cell out of range, no cell in range
+    assert serving.tolist() == [1, 0, -1]
+
+
+def test_released_slots_are_reused_and_reset() -> None:
+    handover = A3Handover(hysteresis=0.0, time_to_trigger=2, capacity=1)
+    rsrp = np.array([[-80.0, -70.0], [-80.0, -70.0]])
+    covered = np.ones((2, 2), dtype=bool)
+    handover.evaluate(["a", "b"], np.array([0, 0]), CELL_IDS, covered, rsrp)
+    assert handover.candidate.tolist() == [20, 20]
+
+    handover.release("a")
+    assert len(handover) == 1
+    assert handover.slots(["c"]).tolist() == [0]
+    assert handover.elapsed[0] == 0
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta, timezone
+
+from app.tools.handover_history import HandoverHistory
+
+SUPI = "202010000000001"
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def record_handovers(history: HandoverHistory, count: int) -> None:
+    for tick in range(count):
+        history.record(SUPI, tick, START + timedelta(seconds=tick), tick, tick + 1)
+
+
+def test_handover_history_keeps_the_latest_records() -> None:
+    history = HandoverHistory(capacity=5)
+    record_handovers(history, 8)
+
+    total, records = history.query(SUPI)
+    assert total == 5
+    assert [record["tick"] for record in records] == [3, 4, 5, 6, 7]
+
+
+def test_handover_history_time_window_and_pages() -> None:
+    history = HandoverHistory(capacity=100)
+    record_handovers(history, 50)
+
+    total, records = history.query(
+        SUPI,
+        since=START + timedelta(seconds=10),
+        until=START + timedelta(seconds=20),
+        skip=4,
+        limit=3,
+    )
+    assert total == 10
+    assert [record["tick"] for record in records] == [14, 15, 16]
+    assert history.query("202010000000002") == (0, [])
+
+
+def test_handover_history_persistence(tmp_path) -> None:
+    path = str(tmp_path / "handovers")
+    history = HandoverHistory(capacity=10, path=path)
+    history.record(SUPI, 1, START, None, 4)
+    history.save()
+
+    restored = HandoverHistory(capacity=10, path=path)
+    restored.load()
+    _, records = restored.query(SUPI)
+    assert records == [
+        {"tick": 1, "timestamp": START, "from_cell_id": None, "to_cell_id": 4}
+    ]
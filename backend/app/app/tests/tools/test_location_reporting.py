@@ -0,0 +1,43 @@
+from app.tools.location_reporting import LocationReportFilter
+
+# About 11 m and 111 m north of the origin
+NEAR = 38.0001
+FAR = 38.001
+
+
+def test_periodic_subscriptions_report_every_period() -> None:
+    report = LocationReportFilter({"repPeriod": 10})
+
+    assert report.due(38.0, 23.8, "AAA", 0.0)
+    assert not report.due(FAR, 23.8, "BBB", 5.0)
+    assert report.due(FAR, 23.8, "BBB", 10.0)
+    assert not report.due(FAR, 23.8, "BBB", 19.0)
+
+
+def test_last_known_location_only_reports_cell_changes() -> None:
+    report = LocationReportFilter({"locationType": "LAST_KNOWN_LOCATION"})
+
+    assert report.due(38.0, 23.8, "AAA", 0.0)
+    assert not report.due(FAR, 23.8, "AAA", 1.0)
+    assert report.due(FAR, 23.8, "BBB", 2.0)
+    assert report.due(FAR, 23.8, None, 3.0)
+
+
+def test_current_location_needs_a_minimum_displacement() -> None:
+    report = LocationReportFilter(
+        {"locationType": "CURRENT_LOCATION", "linearDistance": 100}
+    )
+
+    assert report.due(38.0, 23.8, "AAA", 0.0)
+    assert not report.due(NEAR, 23.8, "AAA", 1.0)
+    assert report.due(FAR, 23.8, "AAA", 2.0)
+    # Measured from the last location reported
+    assert not report.due(FAR + 0.0005, 23.8, "AAA", 3.0)
+
+
+def test_minimum_report_interval_holds_back_any_report() -> None:
+    report = LocationReportFilter({"minimumReportInterval": 5})
+
+    assert report.due(38.0, 23.8, "AAA", 0.0)
+    assert not report.due(FAR, 23.8, "BBB", 4.0)
+    assert report.due(FAR, 23.8, "BBB", 5.0)
@@ -0,0 +1,100 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.movement import MovementCheckpoint
+from app.models.user import User
+from app.tools import movement_checkpoint
+from app.tools.movement_checkpoint import MovementCheckpointer
+from app.tools.movement_engine import MovementEngine
+from app.tools.sim_clock import SimulationClock
+
+
+@pytest.fixture
+def session(monkeypatch):
+    # The checkpoints and their owners in an in-memory database
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    User.metadata.create_all(
+        engine, tables=[User.__table__, MovementCheckpoint.__table__]
+    )
+    Session = sessionmaker(bind=engine)
+
+    @contextmanager
+    def db_context():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setattr(movement_checkpoint, "db_context", db_context)
+    db = Session()
+    db.add(User(id=1, email="owner@example.com", hashed_password="-"))
+    db.commit()
+    yield db
+    db.close()
+
+
+def checkpointer() -> MovementCheckpointer:
+    return MovementCheckpointer(MovementEngine(SimulationClock(1.0)), interval=10.0)
+
+
+def saved(db):
+    return sorted(
+        (checkpoint.supi, checkpoint.distance)
+        for checkpoint in db.query(MovementCheckpoint).all()
+    )
+
+
+def test_save_replaces_the_previous_checkpoint(session) -> None:
+    checkpoints = checkpointer()
+    owner = session.query(User).get(1)
+    checkpoints.engine.register("202010000000001", owner, distance=10.0)
+    checkpoints.engine.register("202010000000002", owner, distance=20.0)
+    assert checkpoints.save() == 2
+
+    checkpoints.engine.unregister_many(["202010000000001"])
+    checkpoints.engine.moving["202010000000002"].distance = 25.0
+    assert checkpoints.save() == 1
+    session.expire_all()
+    assert saved(session) == [("202010000000002", 25.0)]
+
+
+def test_empty_checkpoints_are_written_once(session) -> None:
+    checkpoints = checkpointer()
+    session.add(MovementCheckpoint(supi="202010000000001", distance=5.0, owner_id=1))
+    session.commit()
+
+    assert checkpoints.save() == 0
+    assert saved(session) == []
+
+    # Nothing is written while no UE moves
+    session.add(MovementCheckpoint(supi="202010000000001", distance=5.0, owner_id=1))
+    session.commit()
+    assert checkpoints.save() == 0
+    assert saved(session) == [("202010000000001", 5.0)]
+
+
+def test_restore_registers_the_ues_not_already_moving(session) -> None:
+    session.add_all(
+        [
+            MovementCheckpoint(supi="202010000000001", distance=5.0, owner_id=1),
+            MovementCheckpoint(supi="202010000000002", distance=7.0, owner_id=1),
+            MovementCheckpoint(supi="202010000000003", distance=9.0, owner_id=2),
+        ]
+    )
+    session.commit()
+    checkpoints = checkpointer()
+    moving = checkpoints.engine
+    moving.register("202010000000002", session.query(User).get(1), distance=1.0)
+
+    assert checkpoints.restore() == 1
+    assert moving.moving["202010000000001"].distance == 5.0
+    assert moving.moving["202010000000001"].user.id == 1
+    assert moving.moving["202010000000002"].distance == 1.0
+    assert not moving.is_moving("202010000000003")
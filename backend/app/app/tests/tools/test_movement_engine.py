@@ -0,0 +1,85 @@
+import math
+
+import numpy as np
+
+from app.api.api_v1.endpoints.ue_movement import terminate_movements
+from app.models.UE import UE
+from app.models.user import User
+from app.tools.movement_engine import (
+    MovementEngine,
+    MovingUE,
+    may_move,
+    movement_engine,
+    movement_error,
+)
+from app.schemas.movement import MovementSelection
+from app.tools.path_cache import PathGeometry, path_cache
+from app.tools.sim_clock import SimulationClock
+from app.tools.ue_store import UEState
+
+
+def test_owners_and_superusers_may_move_a_ue() -> None:
+    owner = User(id=1, is_superuser=False)
+    other = User(id=2, is_superuser=False)
+    superuser = User(id=3, is_superuser=True)
+    ue = UE(supi="202010000000001", owner_id=1)
+
+    assert may_move(1, owner) and may_move(1, superuser)
+    assert not may_move(1, other)
+    assert movement_error(ue, owner) is None
+    assert movement_error(ue, superuser) is None
+    assert movement_error(ue, other) == "Not enough permissions"
+    assert movement_error(None, owner) == "UE not found"
+
+
+def test_ues_follow_their_edited_path() -> None:
+    engine = MovementEngine(SimulationClock(tick_interval=1.0))
+    old = PathGeometry(7, np.full(11, 38.0), np.linspace(23.800, 23.810, 11))
+    new = PathGeometry(7, np.full(6, 38.0), np.linspace(23.805, 23.810, 6))
+    path_cache._paths[7] = old
+    state = MovingUE("202010000000001", User(id=1, is_superuser=False))
+    state.path, state.distance = old, old.locate(38.0, 23.807)
+    engine.moving[state.supi] = state
+
+    try:
+        assert engine.refresh_paths([state]) == [state]
+        assert state.path is old
+
+        path_cache._paths[7] = new
+        assert engine.refresh_paths([state]) == [state]
+        assert state.path is new and state.timeline is None
+        assert math.isclose(state.distance, new.locate(38.0, 23.807))
+    finally:
+        path_cache.clear()
+
+
+def test_moving_ues_are_owned_by_the_user_who_started_them_until_admitted() -> None:
+    state = MovingUE("202010000000001", User(id=3, is_superuser=True))
+    assert state.owner_id == 3
+
+    state.ue = UEState(UE(id=1, supi="202010000000001", owner_id=1))
+    assert state.owner_id == 1
+
+
+def test_stop_loops_only_stops_the_ues_of_the_current_user() -> None:
+    owner = User(id=1, is_superuser=False)
+    other = User(id=2, is_superuser=False)
+    movement_engine.register("202010000000001", owner)
+    movement_engine.register("202010000000002", other)
+
+    try:
+        response = terminate_movements(
+            selection=MovementSelection(
+                supis=["202010000000001", "202010000000002", "202010000000003"]
+            ),
+            db=None,
+            current_user=owner,
+        )
+        assert [result["status"] for result in response["results"]] == [
+            "stopped",
+            "Not enough permissions",
+            "Not moving",
+        ]
+        assert movement_engine.is_moving("202010000000002")
+    finally:
+        movement_engine.moving.clear()
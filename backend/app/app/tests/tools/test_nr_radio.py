@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from app.tools.nr_radio import NRCarrier, cqi_from_sinr, prb_count
+
+
+def test_prb_count_follows_the_3gpp_tables() -> None:
+    assert prb_count(20, 15) == 106
+    assert prb_count(100, 30) == 273
+    with pytest.raises(ValueError):
+        prb_count(100, 15)
+
+
+def test_cqi_from_sinr() -> None:
+    cqi = cqi_from_sinr([np.nan, -10.0, -6.7, 0.0, 40.0], table="qam64")
+
+    assert cqi.tolist() == [0, 0, 1, 3, 15]
+
+
+def test_peak_rate_matches_the_38306_approximation() -> None:
+    carrier = NRCarrier(bandwidth=100, scs=30, layers=4, table="qam256")
+
+    # 4 layers x 256QAM x 948/1024 x 273 PRBs x 12 / (1 ms / 28 symbols) x 0.86
+    expected = 4 * 7.4063 * 273 * 12 * 28000 * 0.86 / 1e6
+    assert np.isclose(carrier.peak_rate([35.0])[0], expected)
+
+
+def test_cells_are_shared_between_their_ues() -> None:
+    carrier = NRCarrier(bandwidth=20, scs=30, layers=1)
+    sinr = np.array([30.0, 30.0, 30.0, 30.0])
+
+    rates = carrier.throughput(sinr, [3, 3, 5, -1])
+
+    peak = carrier.peak_rate([30.0])[0]
+    assert np.allclose(rates, [peak / 2, peak / 2, peak, 0.0])
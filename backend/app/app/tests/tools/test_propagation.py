@@ -0,0 +1,84 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.models.Cell import Cell
+from app.models.gNB import gNB
+from app.tools.propagation import PROPAGATION_MODELS, propagation_model
+from app.tools.rsrp_calculation import path_loss_matrix
+from app.tools.spatial_index import CellRecord
+from app.tools.topology import GnbRecord, TopologySnapshot
+
+DISTANCES = np.array([[5.0, 50.0, 500.0, 5000.0]])
+
+
+def test_legacy_model_keeps_the_original_loss() -> None:
+    model = propagation_model("legacy")
+    losses = model.path_loss(DISTANCES, model.constants([2.6475] * 4, [25.0] * 4))
+
+    assert np.allclose(losses, path_loss_matrix(DISTANCES))
+
+
+def test_uma_is_line_of_sight_close_to_the_site() -> None:
+    model = propagation_model("UMa")
+    constants = model.constants([3.5], [25.0])
+
+    loss = model.path_loss(np.array([[15.0]]), constants)[0, 0]
+
+    d3d = math.hypot(15.0, 25.0 - 1.5)
+    assert math.isclose(loss, 28.0 + 22 * math.log10(d3d) + 20 * math.log10(3.5))
+
+
+@pytest.mark.parametrize("name", ["UMa", "UMi", "RMa"])
+def test_tr38901_losses_grow_with_distance_and_frequency(name) -> None:
+    model = PROPAGATION_MODELS[name]
+    constants = model.constants([2.0, 2.0, 2.0, 2.0], [25.0, 25.0, 25.0, 25.0])
+    higher = model.constants([6.0, 6.0, 6.0, 6.0], [25.0, 25.0, 25.0, 25.0])
+
+    distances = np.linspace(10, 5000, 400).reshape(-1, 1) * np.ones(4)
+    losses = model.path_loss(distances, constants)
+
+    assert np.all(np.diff(losses[:, 0]) > 0)
+    assert np.all(model.path_loss(distances, higher) > losses)
+
+
+def test_unknown_models_are_rejected() -> None:
+    with pytest.raises(ValueError):
+        propagation_model("free space")
+
+
+def test_snapshot_uses_the_per_cell_frequency_and_height() -> None:
+    cells = [
+        Cell(id=1, latitude=38.0, longitude=23.8, radius=500),
+        Cell(
+            id=2,
+            latitude=38.0,
+            longitude=23.8,
+            radius=500,
+            carrier_frequency=3.5,
+            antenna_height=10.0,
+        ),
+    ]
+    snapshot = TopologySnapshot(1, 1, cells, [], "UMi")
+
+    assert snapshot.carrier_frequency.tolist() == [2.6475, 3.5]
+    assert snapshot.antenna_height.tolist() == [25.0, 10.0]
+
+    model = propagation_model("UMi")
+    losses = snapshot.path_loss(np.array([[300.0, 300.0]]))[0]
+    expected = [
+        model.path_loss(np.array([300.0]), model.constants([f], [h]))[0]
+        for f, h in ((2.6475, 25.0), (3.5, 10.0))
+    ]
+    assert np.allclose(losses, expected)
+
+
+def test_snapshot_holds_records_instead_of_orm_objects() -> None:
+    cells = [Cell(id=2, latitude=38.0, longitude=23.8, radius=500, gNB_id=1)]
+    gnbs = [gNB(id=1, gNB_id="AAAAA1", name="gNB1", owner_id=1)]
+    snapshot = TopologySnapshot(1, 1, cells, gnbs)
+
+    assert snapshot.cells == (CellRecord.from_cell(cells[0]),)
+    assert snapshot.gnbs == (GnbRecord.from_gnb(gnbs[0]),)
+    assert isinstance(snapshot.gnbs[0], GnbRecord)
@@ -0,0 +1,54 @@
+import numpy as np
+
+from app.models.Cell import Cell
+from app.tools.path_cache import PathGeometry
+from app.tools.radio_memo import RadioMemo
+from app.tools.rsrp_calculation import radio_matrices
+from app.tools.topology import TopologySnapshot
+
+CELLS = [
+    Cell(id=1, latitude=38.000, longitude=23.800, radius=500),
+    Cell(id=2, latitude=38.000, longitude=23.810, radius=500),
+]
+
+PATH = PathGeometry(4, np.full(11, 38.001), np.linspace(23.800, 23.810, 11))
+
+
+def test_repeated_points_are_hits_and_match_a_direct_computation() -> None:
+    memo = RadioMemo(max_bytes=1 << 20, resolution=1.0)
+    snapshot = TopologySnapshot(1, 5, CELLS, [])
+
+    distances, rsrps = memo.lookup(snapshot, [PATH, PATH], [100.2, 99.9])
+    assert (memo.misses, memo.hits) == (1, 1)
+    assert np.array_equal(rsrps[0], rsrps[1])
+
+    latitude, longitude = PATH.interpolate(100.0)
+    _, expected_distances, _, expected_rsrps = next(
+        radio_matrices([latitude], [longitude], snapshot.table)
+    )
+    assert np.allclose(distances[0], expected_distances[0])
+    assert np.allclose(rsrps[0], expected_rsrps[0])
+
+    # Next lap, same point
+    memo.lookup(snapshot, [PATH], [100.0 + PATH.length])
+    assert memo.stats()["hits"] == 2
+    memo.lookup(snapshot, [PATH], [100.0])
+    assert memo.stats()["hit_rate"] == 3 / 4
+
+    # A new topology version misses
+    memo.lookup(TopologySnapshot(1, 6, CELLS, []), [PATH], [100.0])
+    assert memo.misses == 2
+
+
+def test_least_recently_used_points_are_evicted() -> None:
+    snapshot = TopologySnapshot(1, 5, CELLS, [])
+    # Two cells: 2 vectors of 2 float64 per point
+    memo = RadioMemo(max_bytes=2 * 32, resolution=1.0)
+
+    memo.lookup(snapshot, [PATH, PATH], [10.0, 20.0])
+    memo.lookup(snapshot, [PATH], [10.0])
+    memo.lookup(snapshot, [PATH], [30.0])
+
+    assert len(memo) == 2 and memo.evictions == 1
+    memo.lookup(snapshot, [PATH], [10.0])
+    assert memo.hits == 2
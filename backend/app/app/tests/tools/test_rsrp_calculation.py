@@ -0,0 +1,50 @@
+import math
+
+import numpy as np
+
+from app.models.Cell import Cell
+from app.tools.distance import CellTable
+from app.tools.rsrp_calculation import check_rsrp, measure, radio_matrices
+
+CELLS = [
+    Cell(id=1, latitude=38.000, longitude=23.800, radius=500),
+    Cell(id=2, latitude=38.000, longitude=23.810, radius=500),
+]
+
+
+def test_measure_matches_the_scalar_rsrp_and_derives_sinr() -> None:
+    latitudes, longitudes = np.array([38.0, 38.0]), np.array([23.802, 23.809])
+
+    radio = measure(latitudes, longitudes, CellTable(CELLS), return_matrix=True)
+
+    assert radio.best_server.tolist() == [0, 1]
+    rsrps = check_rsrp(38.0, 23.802, CELLS)
+    assert np.allclose(radio.matrix[0], [rsrps["1"], rsrps["2"]])
+
+    signal, interference = 10 ** (rsrps["1"] / 10), 10 ** (rsrps["2"] / 10)
+    noise = 10 ** (-125.2 / 10)
+    assert math.isclose(
+        radio.sinr[0], 10 * math.log10(signal / (interference + noise))
+    )
+
+
+def test_measure_uses_the_given_serving_cells() -> None:
+    radio = measure([38.0, 38.0], [23.802, 23.802], CellTable(CELLS), [1, -1])
+
+    assert radio.best_server.tolist() == [0, 0]
+    assert radio.sinr[0] < 0
+    assert np.isnan(radio.rsrp[1]) and np.isnan(radio.sinr[1])
+
+
+def test_radio_matrices_are_yielded_in_blocks_of_ues() -> None:
+    latitudes = np.full(300, 38.0)
+    longitudes = np.linspace(23.801, 23.809, 300)
+
+    blocks = list(radio_matrices(latitudes, longitudes, CellTable(CELLS)))
+
+    assert [rows for rows, *_ in blocks] == [slice(0, 256), slice(256, 300)]
+    rows, distances, losses, rsrps = blocks[1]
+    assert distances.shape == losses.shape == (44, 2)
+    assert np.allclose(rsrps, 30 - losses)
+    rsrp = check_rsrp(latitudes[299], longitudes[299], CELLS)
+    assert np.allclose(rsrps[-1], [rsrp["1"], rsrp["2"]])
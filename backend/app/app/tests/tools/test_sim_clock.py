@@ -0,0 +1,48 @@
+import asyncio
+
+from app.tools.sim_clock import SimulationClock
+
+
+def test_advance_runs_tick_listeners():
+    clock = SimulationClock(tick_interval=1.0)
+    ticks = []
+
+    async def listener():
+        ticks.append(clock.ticks)
+
+    clock.on_tick(listener)
+    asyncio.run(clock.advance(3))
+
+    assert ticks == [1, 2, 3]
+    assert clock.time == 3.0
+
+
+def test_sleep_wakes_up_after_simulated_time():
+    clock = SimulationClock(tick_interval=1.0)
+    woke_at = []
+
+    async def sleeper():
+        await clock.sleep(5)
+        woke_at.append(clock.time)
+
+    async def scenario():
+        task = asyncio.create_task(sleeper())
+        await asyncio.sleep(0)
+        await clock.advance(4)
+        await asyncio.sleep(0)
+        assert woke_at == []
+        await clock.advance(1)
+        await task
+
+    asyncio.run(scenario())
+
+    assert woke_at == [5.0]
+
+
+def test_now_follows_simulated_time():
+    clock = SimulationClock(tick_interval=10.0, speed=100.0)
+    start = clock.now()
+
+    asyncio.run(clock.advance(6))
+
+    assert (clock.now() - start).total_seconds() == 60
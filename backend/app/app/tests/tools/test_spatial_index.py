@@ -0,0 +1,52 @@
+import numpy as np
+
+from app.models.Cell import Cell
+from app.tools.distance import NO_SERVING_CELL, CellTable, serving_cells
+from app.tools.spatial_index import CellGrid, CellRecord
+
+
+def random_cells(count: int) -> list:
+    rng = np.random.default_rng(1)
+    return [
+        Cell(id=i, latitude=lat, longitude=lon, radius=radius)
+        for i, (lat, lon, radius) in enumerate(
+            zip(
+                rng.uniform(37.95, 38.05, count),
+                rng.uniform(23.70, 23.80, count),
+                rng.uniform(50, 800, count),
+            )
+        )
+    ]
+
+
+def test_grid_matches_a_full_scan() -> None:
+    cells = random_cells(300)
+    rng = np.random.default_rng(2)
+    latitudes = rng.uniform(37.95, 38.05, 500)
+    longitudes = rng.uniform(23.70, 23.80, 500)
+
+    indices = serving_cells(latitudes, longitudes, CellTable(cells))
+    expected = [
+        CellRecord.from_cell(cells[i]) if i != NO_SERVING_CELL else None
+        for i in indices
+    ]
+
+    assert CellGrid(250, cells).serving_cells(latitudes, longitudes) == expected
+
+
+def test_grid_incremental_updates() -> None:
+    cell = Cell(id=1, owner_id=1, latitude=38.0, longitude=23.8, radius=300)
+    grid = CellGrid(100, [cell])
+    # The grid keeps copies, not the ORM instances of the caller's session
+    (candidate,) = grid.candidates(38.0, 23.8015)
+    assert isinstance(candidate, CellRecord)
+    assert candidate == CellRecord.from_cell(cell)
+
+    moved = Cell(id=1, owner_id=1, latitude=38.1, longitude=23.8, radius=300)
+    grid.add(moved)
+    assert grid.candidates(38.0, 23.8015) == []
+    assert grid.candidates(38.1, 23.8) == [CellRecord.from_cell(moved)]
+
+    grid.remove(1)
+    assert len(grid) == 0
+    assert grid.serving_cells([38.1], [23.8]) == [None]
@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+
+from app.tools.subscription_index import SubscriptionIndex
+
+
+class Collection:
+    def __init__(self, documents) -> None:
+        self.documents = documents
+
+    def find(self, *args, **kwargs):
+        return iter(self.documents)
+
+
+def subscription(monitoring_type: str, **fields) -> dict:
+    return {"monitoringType": monitoring_type, **fields}
+
+
+def test_index_is_loaded_once_and_kept_current() -> None:
+    index = SubscriptionIndex()
+    index.load(
+        {
+            "MonitoringEvent": Collection(
+                [
+                    {
+                        "_id": 1,
+                        "supi": "202010000000001",
+                        "owner_id": 1,
+                        "subscription": subscription(
+                            "LOCATION_REPORTING",
+                            addnMonTypes=["LOSS_OF_CONNECTIVITY"],
+                            monitorExpireTime="2030-01-01T00:00:00+00:00",
+                        ),
+                    }
+                ]
+            )
+        }
+    )
+
+    (record,) = index.for_supi("202010000000001")
+    assert record.types == ("LOCATION_REPORTING", "LOSS_OF_CONNECTIVITY")
+    assert record.expire_time == datetime(2030, 1, 1, tzinfo=timezone.utc)
+    assert index.for_supi("202010000000002") == []
+
+    index.add(2, "202010000000002", 1, subscription("UE_REACHABILITY"))
+    index.update(1, subscription("LOCATION_REPORTING"))
+    (record,) = index.for_supi("202010000000001")
+    assert record.types == ("LOCATION_REPORTING",)
+    assert record.expire_time is None
+
+    index.remove(1)
+    index.remove(1)
+    assert index.for_supi("202010000000001") == []
+    assert len(index) == 1
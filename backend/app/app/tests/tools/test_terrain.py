@@ -0,0 +1,70 @@
+import numpy as np
+
+from app.tools.distance import haversine
+from app.tools.terrain import ClutterModel, ClutterRaster, knife_edge_loss
+
+CELL = (38.0, 23.8)
+
+
+def clutter_model(tmp_path, heights: np.ndarray) -> ClutterModel:
+    # 10 x 10 pixels of 0.001 degrees, north of the cell
+    filename = str(tmp_path / "clutter.raw")
+    ClutterRaster.write(filename, 38.01, 23.795, 0.001, 0.001, heights)
+    return ClutterModel(ClutterRaster(filename), samples=16, max_distance=3000.0)
+
+
+def loss(model: ClutterModel, latitude: float, longitude: float, cache=True):
+    distances = haversine(np.array([latitude]), np.array([longitude]), *CELL)
+    return model.loss(
+        np.array([CELL[0]]),
+        np.array([CELL[1]]),
+        np.array([25.0]),
+        np.array([3.5]),
+        [latitude],
+        [longitude],
+        distances.reshape(1, 1),
+        cache,
+    )[0, 0]
+
+
+def test_knife_edge_loss_is_6db_at_grazing_incidence() -> None:
+    assert np.isclose(knife_edge_loss(0.0), 6.0, atol=0.1)
+    assert knife_edge_loss(-1.0) == 0.0
+    assert knife_edge_loss(2.0) > knife_edge_loss(1.0)
+
+
+def test_raster_is_memory_mapped_and_empty_outside(tmp_path) -> None:
+    heights = np.arange(100, dtype=np.float32).reshape(10, 10)
+    model = clutter_model(tmp_path, heights)
+
+    assert isinstance(model.raster.heights, np.memmap)
+    # North west pixel, the pixel south of it and a point off the raster
+    samples = model.raster.sample([38.0095, 38.0085, 38.02], [23.7955, 23.7955, 23.8])
+    assert samples.tolist() == [0.0, 10.0, 0.0]
+
+
+def test_obstacles_above_the_line_of_sight_add_a_loss(tmp_path) -> None:
+    heights = np.zeros((10, 10), dtype=np.float32)
+    model = clutter_model(tmp_path, heights)
+    assert loss(model, 38.009, 23.8) == 0.0
+
+    # A 60 m building across the middle of the path
+    heights[5, :] = 60.0
+    model = clutter_model(tmp_path, heights)
+    blocked = loss(model, 38.009, 23.8)
+    assert blocked > 6.0
+    assert np.isclose(loss(model, 38.009, 23.8, cache=False), blocked)
+
+
+def test_profiles_are_cached_per_cell_and_path_point(tmp_path) -> None:
+    heights = np.full((10, 10), 40.0, dtype=np.float32)
+    model = clutter_model(tmp_path, heights)
+
+    first = loss(model, 38.005, 23.8)
+    assert (model.hits, model.misses) == (0, 1)
+    assert loss(model, 38.005, 23.8) == first
+    assert (model.hits, model.misses) == (1, 1)
+
+    # Pairs farther than max_distance are not profiled
+    assert loss(model, 38.05, 23.8) == 0.0
+    assert (model.hits, model.misses) == (1, 1)
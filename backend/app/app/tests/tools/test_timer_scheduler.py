@@ -0,0 +1,53 @@
+import asyncio
+from datetime import timedelta
+
+from app.tools.sim_clock import SimulationClock
+from app.tools.timer_scheduler import TimerScheduler
+
+
+def test_due_timers_fire_in_batches_per_kind():
+    clock = SimulationClock(tick_interval=1.0)
+    scheduler = TimerScheduler(clock)
+    fired = []
+
+    async def handler(timers):
+        fired.append((clock.time, sorted(timers)))
+
+    scheduler.handler("expiry", handler)
+    scheduler.schedule_in("expiry", "a", 2, "A")
+    scheduler.schedule_in("expiry", "b", 2, "B")
+    scheduler.schedule_in("expiry", "c", 3)
+    asyncio.run(clock.advance(3))
+
+    assert fired == [(2.0, [("a", "A"), ("b", "B")]), (3.0, [("c", None)])]
+    assert len(scheduler) == 0
+
+
+def test_cancelled_and_moved_timers_do_not_fire():
+    clock = SimulationClock(tick_interval=1.0)
+    scheduler = TimerScheduler(clock)
+    fired = []
+
+    async def handler(timers):
+        fired.extend(key for key, _ in timers)
+
+    scheduler.handler("detection", handler)
+    scheduler.schedule_in("detection", "a", 1)
+    scheduler.schedule_in("detection", "b", 1)
+    scheduler.schedule_in("detection", "b", 4)
+    assert scheduler.cancel("detection", "a")
+    assert not scheduler.cancel("detection", "a")
+
+    asyncio.run(clock.advance(3))
+    assert fired == []
+    asyncio.run(clock.advance(1))
+    assert fired == ["b"]
+
+
+def test_clock_time_of_a_simulated_wall_clock_time():
+    clock = SimulationClock(tick_interval=1.0)
+    scheduler = TimerScheduler(clock)
+
+    assert scheduler.clock_time(clock.epoch + timedelta(minutes=1)) == 60.0
+    naive = (clock.epoch + timedelta(seconds=30)).astimezone().replace(tzinfo=None)
+    assert scheduler.clock_time(naive) == 30.0
@@ -0,0 +1,23 @@
+from app.models.UE import UE
+from app.tools.ue_store import UEStateStore
+
+
+def test_overlay_returns_rows_without_touching_the_orm_objects() -> None:
+    store = UEStateStore(flush_interval=5.0)
+    moving = UE(id=1, supi="202010000000001", latitude=38.0, longitude=23.8)
+    parked = UE(id=2, supi="202010000000002", latitude=37.9, longitude=23.7)
+    store.update(store.load(moving), 38.1, 23.9, None)
+
+    rows = store.overlay([moving, parked])
+
+    assert (rows[0]["id"], rows[0]["latitude"], rows[0]["longitude"]) == (1, 38.1, 23.9)
+    assert (rows[1]["latitude"], rows[1]["longitude"]) == (37.9, 23.7)
+    assert (moving.latitude, moving.longitude) == (38.0, 23.8)
+
+
+def test_states_remember_the_stored_values() -> None:
+    store = UEStateStore(flush_interval=5.0)
+    state = store.load(UE(id=1, supi="202010000000001", latitude=38.0, longitude=23.8))
+    store.update(state, 38.1, 23.9, None)
+
+    assert state.stored == (38.0, 23.8, None)
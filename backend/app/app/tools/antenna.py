@@ -0,0 +1,93 @@
+import numpy as np
+
+from app.core.config import settings
+
+# 3GPP TR 38.901 table 7.3-1 antenna element: maximum attenuation and side lobe
+# level in dB, vertical half power beamwidth in degrees and maximum gain in dBi
+MAX_ATTENUATION = 30.0
+SIDE_LOBE_LEVEL = 30.0
+VERTICAL_BEAMWIDTH = 65.0
+MAX_GAIN = 8.0
+
+# Width in degrees of the angle buckets of the lookup tables
+HORIZONTAL_STEP = 1.0
+VERTICAL_STEP = 0.1
+
+
+def horizontal_pattern(beamwidth: float, step: float = HORIZONTAL_STEP) -> np.ndarray:
+    """
+    Attenuation in dB (negative) of the azimuth offsets -180 + i * step degrees
+    from the boresight.
+    """
+    angles = np.arange(-180, 180, step) + step / 2
+    return -np.minimum(12 * (angles / beamwidth) ** 2, MAX_ATTENUATION)
+
+
+def vertical_pattern(
+    beamwidth: float = VERTICAL_BEAMWIDTH, step: float = VERTICAL_STEP
+) -> np.ndarray:
+    """Attenuation in dB of the elevation offsets -90 + i * step degrees"""
+    angles = np.linspace(-90, 90, int(round(180 / step)) + 1)
+    return -np.minimum(12 * (angles / beamwidth) ** 2, SIDE_LOBE_LEVEL)
+
+
+class AntennaTables:
+    """
+    Antenna gains of a set of cells, looked up in precomputed pattern tables.
+
+    Cells with an azimuth are sectorized: their gain is the TR 38.901 element
+    pattern, the sum of a horizontal pattern (one table row per distinct
+    beamwidth, indexed by the azimuth offset bucket) and a vertical pattern
+    indexed by the offset between the elevation of the UE and the downtilt.
+    Cells without an azimuth are omnidirectional and keep a 0 dB gain, like
+    before sectors existed.
+    """
+
+    def __init__(
+        self,
+        latitude: np.ndarray,
+        longitude: np.ndarray,
+        height: np.ndarray,
+        azimuth: np.ndarray,
+        tilt: np.ndarray,
+        beamwidth: np.ndarray,
+        ue_height: float = settings.UE_ANTENNA_HEIGHT,
+    ) -> None:
+        self.latitude = np.asarray(latitude, dtype=np.float64)
+        self.longitude = np.asarray(longitude, dtype=np.float64)
+        azimuth = np.asarray(azimuth, dtype=np.float64)
+        self.sectorized = ~np.isnan(azimuth)
+        self.azimuth = np.where(self.sectorized, azimuth, 0.0)
+        self.tilt = np.asarray(tilt, dtype=np.float64)
+        self.height = np.asarray(height, dtype=np.float64) - ue_height
+        # Longitude degrees shrink with the latitude of the site
+        self.scale = np.cos(np.radians(self.latitude))
+
+        beamwidths, self.pattern = np.unique(
+            np.asarray(beamwidth, dtype=np.float64), return_inverse=True
+        )
+        self.horizontal = np.stack([horizontal_pattern(width) for width in beamwidths])
+        self.vertical = vertical_pattern()
+
+    def gain(self, latitudes, longitudes, distances: np.ndarray) -> np.ndarray:
+        """Gain in dBi towards each UE (rows) of each cell (columns)"""
+        latitudes = np.asarray(latitudes, dtype=np.float64).reshape(-1, 1)
+        longitudes = np.asarray(longitudes, dtype=np.float64).reshape(-1, 1)
+
+        bearing = np.degrees(
+            np.arctan2(
+                (longitudes - self.longitude) * self.scale, latitudes - self.latitude
+            )
+        )
+        offset = np.mod(bearing - self.azimuth + 180, 360)
+        columns = np.minimum(
+            (offset / HORIZONTAL_STEP).astype(np.int64), self.horizontal.shape[1] - 1
+        )
+        horizontal = self.horizontal[self.pattern, columns]
+
+        elevation = np.degrees(np.arctan2(self.height, np.maximum(distances, 1.0)))
+        rows = np.rint((elevation - self.tilt + 90) / VERTICAL_STEP).astype(np.int64)
+        vertical = self.vertical[np.clip(rows, 0, len(self.vertical) - 1)]
+
+        gain = MAX_GAIN - np.minimum(-(horizontal + vertical), MAX_ATTENUATION)
+        return np.where(self.sectorized, gain, 0.0)
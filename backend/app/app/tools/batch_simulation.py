@@ -0,0 +1,434 @@
+import csv
+import importlib.util
+import logging
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Literal, Optional
+
+import numpy as np
+
+from app import schemas
+from app.core.config import settings
+from app.models.Cell import Cell
+from app.tools.cell_timeline import NO_CELL, build_timeline
+from app.tools.handover import A3Handover, HandoverAlgorithm
+from app.tools.movement_engine import ue_speed
+from app.tools.path_cache import PathGeometry
+from app.tools.rsrp_calculation import measure, radio_matrices
+from app.tools.spatial_index import CellGrid
+from app.tools.topology import TopologySnapshot
+
+OutputFormat = Literal["csv", "parquet", "arrow"]
+
+OUTPUT_EXTENSIONS = {"csv": "csv", "parquet": "parquet", "arrow": "arrow"}
+
+
+def format_available(fmt: OutputFormat) -> bool:
+    """Whether results can be written in `fmt`, the binary formats need pyarrow"""
+    return fmt == "csv" or importlib.util.find_spec("pyarrow") is not None
+
+
+class BatchSimulationResult:
+    """
+    Columnar output of a batch simulation.
+
+    `trajectories` has one row per UE per tick, with the RSRP and SINR of the
+    serving cell, `handovers` one row per change of serving cell. Both are dicts
+    of equally long NumPy columns.
+    """
+
+    def __init__(
+        self, trajectories: Dict[str, np.ndarray], handovers: Dict[str, np.ndarray]
+    ) -> None:
+        self.trajectories = trajectories
+        self.handovers = handovers
+
+    def write(self, directory: str, fmt: OutputFormat = "csv") -> List[str]:
+        os.makedirs(directory, exist_ok=True)
+
+        files = []
+        for name, columns in (
+            ("trajectories", self.trajectories),
+            ("handovers", self.handovers),
+        ):
+            filename = os.path.join(directory, f"{name}.{OUTPUT_EXTENSIONS[fmt]}")
+            write_table(columns, filename, fmt)
+            files.append(filename)
+
+        return files
+
+
+def write_table(columns: Dict[str, np.ndarray], filename: str, fmt: OutputFormat):
+    if fmt == "csv":
+        with open(filename, "w", newline="") as fp:
+            writer = csv.writer(fp)
+            writer.writerow(columns.keys())
+            writer.writerows(zip(*(column.tolist() for column in columns.values())))
+        return
+
+    # pyarrow is optional, it is only needed for the binary columnar formats
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError(f"pyarrow must be installed to write {fmt} files")
+
+    table = pa.table(columns)
+    if fmt == "parquet":
+        pq.write_table(table, filename)
+    else:
+        feather.write_feather(table, filename)
+
+
+def scenario_cells(scenario: schemas.scenario) -> List[Cell]:
+    """Transient (never persisted) cells, numbered like a freshly imported scenario"""
+    return [
+        Cell(
+            id=index,
+            cell_id=cell.cell_id,
+            name=cell.name,
+            latitude=cell.latitude,
+            longitude=cell.longitude,
+            radius=cell.radius,
+            carrier_frequency=cell.carrier_frequency,
+            antenna_height=cell.antenna_height,
+            azimuth=cell.azimuth,
+            tilt=cell.tilt,
+            beamwidth=cell.beamwidth,
+        )
+        for index, cell in enumerate(scenario.cells, start=1)
+    ]
+
+
+def run_batch_simulation(
+    scenario: schemas.scenario,
+    ticks: int,
+    tick_interval: float = 1.0,
+    supis: Optional[List[str]] = None,
+    handover: Optional[HandoverAlgorithm] = None,
+) -> BatchSimulationResult:
+    """
+    Replay the movement of the scenario's UEs over `ticks` ticks, offline.
+
+    Nothing is read from or written to the databases and no notification is sent,
+    so the run is only bound by the CPU. UEs move exactly like in the movement
+    engine, starting from the beginning of their path, and change cell with the
+    same `handover` algorithm, HANDOVER_ALGORITHM unless given. With "a3" the
+    serving cells are picked tick by tick by an A3 filter over the RSRPs of all
+    the UEs, so handovers happen on a tick. With "distance" they come from the
+    timelines of the paths and are reported at the instant the cell edge was
+    crossed, so their time is not a multiple of the tick interval.
+    """
+    handover = handover or settings.HANDOVER_ALGORITHM
+    cells = scenario_cells(scenario)
+    cells_by_id = {cell.id: cell for cell in cells}
+
+    paths = {
+        path.id: PathGeometry(
+            path.id,
+            np.array([point.latitude for point in path.points or []]),
+            np.array([point.longitude for point in path.points or []]),
+        )
+        for path in scenario.paths
+    }
+    # A transient topology, for the cell table and the scenario's propagation model
+    topology = TopologySnapshot(0, 0, cells, [], scenario.propagation_model)
+    grid = CellGrid(settings.CELL_INDEX_BUCKET_SIZE, cells)
+    timelines = (
+        {
+            path_id: build_timeline(path, grid, version=0)
+            for path_id, path in paths.items()
+            if len(path)
+        }
+        if handover != "a3"
+        else {}
+    )
+    speeds = {ue.supi: ue.speed for ue in scenario.UEs}
+
+    tick_numbers = np.arange(1, ticks + 1)
+    trajectories: Dict[str, list] = {
+        name: []
+        for name in (
+            "tick",
+            "time",
+            "supi",
+            "path_id",
+            "distance",
+            "latitude",
+            "longitude",
+            "cell_id",
+            "rsrp",
+            "sinr",
+        )
+    }
+    handovers: Dict[str, list] = {
+        name: []
+        for name in ("tick", "time", "supi", "from_cell_id", "to_cell_id")
+    }
+
+    # The simulated UEs with their distances along the path and coordinates
+    # at every tick
+    moves = []
+    for association in scenario.ue_path_association:
+        supi = association.supi
+        path = paths.get(association.path)
+        if not path or (supis is not None and supi not in supis):
+            continue
+
+        speed = ue_speed(speeds.get(supi, "LOW"))
+        distances = speed * tick_interval * tick_numbers
+        if path.length > 0:
+            distances %= path.length
+        moves.append((supi, path, speed, distances, *path.interpolate(distances)))
+
+    if handover == "a3":
+        serving_cells = a3_cell_ids(
+            topology,
+            [move[0] for move in moves],
+            np.array([move[4] for move in moves]).reshape(len(moves), ticks),
+            np.array([move[5] for move in moves]).reshape(len(moves), ticks),
+        )
+
+    for row, (supi, path, speed, distances, latitudes, longitudes) in enumerate(moves):
+        if handover == "a3":
+            cell_ids = serving_cells[row]
+            changed = np.flatnonzero(cell_ids[1:] != cell_ids[:-1]) + 1
+            from_ids, to_ids = cell_ids[changed - 1], cell_ids[changed]
+            times = tick_numbers[changed] * tick_interval
+        else:
+            timeline = timelines[path.path_id]
+            cell_ids = timeline.cell_ids_at(distances)
+            crossings = timeline.crossings(0.0, speed * tick_interval * ticks)
+            times = np.array([offset / speed for offset, _, _ in crossings])
+            from_ids = np.array([c for _, c, _ in crossings], dtype=np.int64)
+            to_ids = np.array([c for _, _, c in crossings], dtype=np.int64)
+
+        # Cells are numbered from 1, so the table row of a cell is its id - 1
+        serving = np.where(cell_ids != NO_CELL, cell_ids - 1, -1)
+        radio = measure(
+            latitudes,
+            longitudes,
+            topology.table,
+            serving,
+            path_loss=topology.path_loss,
+            link_gain=topology.link_gain,
+        )
+
+        trajectories["tick"].append(tick_numbers)
+        trajectories["time"].append(tick_numbers * tick_interval)
+        trajectories["supi"].append(np.full(ticks, supi))
+        trajectories["path_id"].append(np.full(ticks, path.path_id))
+        trajectories["distance"].append(distances)
+        trajectories["latitude"].append(latitudes)
+        trajectories["longitude"].append(longitudes)
+        trajectories["cell_id"].append(hex_cell_ids(cell_ids, cells_by_id))
+        trajectories["rsrp"].append(radio.rsrp)
+        trajectories["sinr"].append(radio.sinr)
+
+        handovers["tick"].append(np.ceil(times / tick_interval).astype(np.int64))
+        handovers["time"].append(times)
+        handovers["supi"].append(np.full(len(times), supi))
+        handovers["from_cell_id"].append(hex_cell_ids(from_ids, cells_by_id))
+        handovers["to_cell_id"].append(hex_cell_ids(to_ids, cells_by_id))
+
+    return BatchSimulationResult(
+        {name: _concatenate(parts) for name, parts in trajectories.items()},
+        {name: _concatenate(parts) for name, parts in handovers.items()},
+    )
+
+
+def a3_cell_ids(
+    topology: TopologySnapshot,
+    supis: List[str],
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+) -> np.ndarray:
+    """
+    UEs x ticks ids of the serving cells (NO_CELL when none) picked by an A3
+    filter, from the UEs x ticks coordinates of the UEs. The UEs start without
+    a serving cell, like the UEs admitted by the movement engine.
+    """
+    count, ticks = latitudes.shape
+    cell_ids = np.full((count, ticks), NO_CELL, dtype=np.int64)
+    if not count or not len(topology.cells):
+        return cell_ids
+
+    a3 = A3Handover(capacity=count)
+    serving = np.full(count, -1, dtype=np.int64)
+    for tick in range(ticks):
+        distances = np.empty((count, len(topology.cells)))
+        rsrp = np.empty_like(distances)
+        for block, block_distances, _, block_rsrp in radio_matrices(
+            latitudes[:, tick],
+            longitudes[:, tick],
+            topology.table,
+            path_loss=topology.path_loss,
+            link_gain=topology.link_gain,
+        ):
+            distances[block], rsrp[block] = block_distances, block_rsrp
+
+        serving = a3.evaluate(
+            supis,
+            serving,
+            topology.cell_ids,
+            distances <= topology.table.radius,
+            rsrp,
+        )
+        cell_ids[:, tick] = np.where(
+            serving >= 0, topology.cell_ids[np.maximum(serving, 0)], NO_CELL
+        )
+
+    return cell_ids
+
+
+def hex_cell_ids(cell_ids: np.ndarray, cells: Dict[int, Cell]) -> np.ndarray:
+    return np.array(
+        [cells[c].cell_id if c != NO_CELL else "" for c in cell_ids.tolist()],
+        dtype=str,
+    )
+
+
+def _concatenate(parts: list) -> np.ndarray:
+    return np.concatenate(parts) if parts else np.array([])
+
+
+class BatchSimulationJob:
+    """A batch simulation started through the API, run in a worker thread"""
+
+    def __init__(
+        self,
+        owner_id: int,
+        scenario: schemas.scenario,
+        ticks: int,
+        tick_interval: float,
+        fmt: OutputFormat,
+        supis: Optional[List[str]],
+        directory: str,
+        handover: Optional[HandoverAlgorithm] = None,
+    ) -> None:
+        self.id = uuid.uuid4().hex
+        self.owner_id = owner_id
+        self.scenario = scenario
+        self.ticks = ticks
+        self.tick_interval = tick_interval
+        self.format = fmt
+        self.supis = supis
+        self.handover = handover or settings.HANDOVER_ALGORITHM
+        self.directory = os.path.join(directory, self.id)
+        self.status = "pending"
+        self.created = datetime.now()
+        self.finished: Optional[datetime] = None
+        self.files: Dict[str, str] = {}
+        self.error: Optional[str] = None
+
+    def run(self) -> None:
+        self.status = "running"
+        try:
+            result = run_batch_simulation(
+                self.scenario,
+                self.ticks,
+                self.tick_interval,
+                self.supis,
+                self.handover,
+            )
+            files = result.write(self.directory, self.format)
+            self.files = {
+                os.path.splitext(os.path.basename(filename))[0]: filename
+                for filename in files
+            }
+            self.status = "finished"
+        except Exception as ex:
+            logging.exception("Batch simulation %s failed: %s", self.id, ex)
+            self.error = str(ex)
+            self.status = "failed"
+        finally:
+            # The scenario can be large and is not needed once the run is over
+            self.scenario = None
+            self.finished = datetime.now()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("finished", "failed")
+
+    def remove_output(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class BatchSimulationJobs:
+    """
+    The batch simulations started through the API. Finished and failed jobs,
+    and their output, are removed once they are older than `retention`
+    seconds, or when deleted. So are the outputs left in `directory` by the
+    jobs of a previous run of the server.
+    """
+
+    def __init__(
+        self,
+        directory: str = settings.BATCH_SIMULATION_PATH,
+        retention: float = settings.BATCH_SIMULATION_RETENTION,
+    ) -> None:
+        self.directory = directory
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, BatchSimulationJob] = {}
+
+    def add(self, job: BatchSimulationJob) -> BatchSimulationJob:
+        self.expire()
+        with self._lock:
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[BatchSimulationJob]:
+        self.expire()
+        return self._jobs.get(job_id)
+
+    def by_owner(self, owner_id: int) -> List[BatchSimulationJob]:
+        self.expire()
+        return [job for job in list(self._jobs.values()) if job.owner_id == owner_id]
+
+    def remove(self, job_id: str) -> Optional[BatchSimulationJob]:
+        """Forget a finished or failed job and delete its output"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job.done:
+                return None
+            del self._jobs[job_id]
+        job.remove_output()
+        return job
+
+    def expire(self, now: Optional[datetime] = None) -> List[BatchSimulationJob]:
+        """Remove the jobs finished more than `retention` seconds ago"""
+        deadline = (now or datetime.now()) - timedelta(seconds=self.retention)
+        with self._lock:
+            expired = [
+                job
+                for job in self._jobs.values()
+                if job.done and job.finished is not None and job.finished < deadline
+            ]
+            for job in expired:
+                del self._jobs[job.id]
+            known = set(self._jobs)
+        for job in expired:
+            job.remove_output()
+        self._remove_orphans(known, deadline.timestamp())
+        return expired
+
+    def _remove_orphans(self, known: set, deadline: float) -> None:
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if (
+                entry.name not in known
+                and entry.is_dir(follow_symlinks=False)
+                and entry.stat().st_mtime < deadline
+            ):
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+
+batch_jobs = BatchSimulationJobs()
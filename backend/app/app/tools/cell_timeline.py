@@ -0,0 +1,172 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.tools.path_cache import PathGeometry
+from app.tools.spatial_index import CellGrid, CellRecord, cell_index
+from app.tools.topology import topology_versions
+
+# Marks the stretches of a path that are not covered by any cell
+NO_CELL = -1
+
+
+# Width in metres of the intervals a cell edge is located to
+EDGE_PRECISION = 0.01
+
+
+class ServingCellTimeline:
+    """
+    Serving cell along a path for one version of the cell topology.
+
+    The path is split in stretches served by the same cell: stretch `i` starts
+    `starts[i]` metres along the path and is served by the cell with primary key
+    `cell_ids[i]` (`NO_CELL` when out of coverage). `boundaries` holds the exact
+    distances at which the serving cell changes, including the start of the path
+    when the cell there differs from the one at the end of the loop.
+    """
+
+    def __init__(
+        self,
+        path: PathGeometry,
+        version: int,
+        starts: np.ndarray,
+        cell_ids: np.ndarray,
+        cells: Dict[int, CellRecord],
+    ) -> None:
+        self.path = path
+        self.version = version
+        self.starts = starts
+        self.cell_ids = cell_ids
+        self.cells = cells
+
+        previous = np.roll(cell_ids, 1)
+        changes = np.flatnonzero(cell_ids != previous)
+        self.boundaries = starts[changes]
+        self.from_ids = previous[changes]
+        self.to_ids = cell_ids[changes]
+
+    def cell_ids_at(self, distance):
+        """Serving cell ids at `distance` metres along the path (scalar or array)"""
+        if self.path.length > 0:
+            distance = np.mod(distance, self.path.length)
+        stretch = np.searchsorted(self.starts, distance, side="right") - 1
+        return self.cell_ids[stretch]
+
+    def cell_at(self, distance: float) -> Optional[CellRecord]:
+        return self.cells.get(int(self.cell_ids_at(distance)))
+
+    def crossings(
+        self, start: float, travelled: float
+    ) -> List[Tuple[float, int, int]]:
+        """
+        The cell changes met travelling `travelled` metres from `start`, as
+        (metres from `start`, old cell id, new cell id) in the order they happen.
+        """
+        length = self.path.length
+        if length == 0 or travelled <= 0 or not len(self.boundaries):
+            return []
+
+        crossings = []
+        end = start + travelled
+        lap = np.floor(start / length) * length
+
+        while lap < end:
+            lo = np.searchsorted(self.boundaries, start - lap, side="right")
+            hi = np.searchsorted(self.boundaries, end - lap, side="right")
+            for boundary, from_id, to_id in zip(
+                self.boundaries[lo:hi].tolist(),
+                self.from_ids[lo:hi].tolist(),
+                self.to_ids[lo:hi].tolist(),
+            ):
+                crossings.append((lap + boundary - start, from_id, to_id))
+            lap += length
+
+        return crossings
+
+
+def serving_cell_ids(grid: CellGrid, latitudes, longitudes) -> np.ndarray:
+    return np.array(
+        [
+            cell.id if cell is not None else NO_CELL
+            for cell in grid.serving_cells(latitudes, longitudes)
+        ],
+        dtype=np.int64,
+    )
+
+
+def build_timeline(
+    path: PathGeometry,
+    grid: CellGrid,
+    version: int,
+    resolution: float = settings.PATH_SAMPLING_RESOLUTION,
+) -> ServingCellTimeline:
+    """
+    Sample the serving cell every `resolution` metres (and at every point) of the
+    path, then locate each change of cell between two samples by bisection.
+    """
+    samples = np.union1d(np.arange(0.0, path.length, resolution), path.cumulative)
+    samples = samples[samples < path.length] if path.length > 0 else samples[:1]
+    latitudes, longitudes = path.interpolate(samples)
+
+    sampled_ids = serving_cell_ids(grid, latitudes, longitudes)
+
+    starts, cell_ids = [0.0], [int(sampled_ids[0])]
+    for k in np.flatnonzero(sampled_ids[1:] != sampled_ids[:-1]) + 1:
+        lo, hi = float(samples[k - 1]), float(samples[k])
+        while hi - lo > EDGE_PRECISION:
+            middle = (lo + hi) / 2
+            if serving_cell_ids(grid, *path.interpolate(middle))[0] == cell_ids[-1]:
+                lo = middle
+            else:
+                hi = middle
+        starts.append(hi)
+        cell_ids.append(int(sampled_ids[k]))
+
+    return ServingCellTimeline(
+        path,
+        version,
+        np.array(starts),
+        np.array(cell_ids, dtype=np.int64),
+        dict(grid.cells),
+    )
+
+
+class TimelineCache:
+    """
+    Serving cell timelines keyed by (path, owner), rebuilt lazily whenever the
+    owner's topology version or the path geometry changes.
+    """
+
+    def __init__(self) -> None:
+        self._timelines: Dict[Tuple[int, int], ServingCellTimeline] = {}
+
+    def is_stale(
+        self, timeline: Optional[ServingCellTimeline], path: PathGeometry, owner_id: int
+    ) -> bool:
+        return (
+            timeline is None
+            or timeline.path is not path
+            or timeline.version != topology_versions.version(owner_id)
+        )
+
+    def peek(self, path: PathGeometry, owner_id: int) -> Optional[ServingCellTimeline]:
+        """The cached timeline if it is still valid, without touching the DB"""
+        timeline = self._timelines.get((path.path_id, owner_id))
+        return None if self.is_stale(timeline, path, owner_id) else timeline
+
+    def get(
+        self, db: Session, path: PathGeometry, owner_id: int
+    ) -> ServingCellTimeline:
+        timeline = self.peek(path, owner_id)
+
+        if timeline is None:
+            version = topology_versions.version(owner_id)
+            timeline = build_timeline(path, cell_index.get(db, owner_id), version)
+            self._timelines[(path.path_id, owner_id)] = timeline
+
+        return timeline
+
+
+timeline_cache = TimelineCache()
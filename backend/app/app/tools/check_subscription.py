@@ -4,6 +4,7 @@ import time
 from datetime import date, datetime
 from typing import Optional, Union
 from app.crud import crud_mongo
+from app.tools.sim_clock import sim_clock
 
 
 def check_expiration_time(expire_time: Union[datetime, str]) -> bool:
@@ -13,7 +14,7 @@ def check_expiration_time(expire_time: Union[datetime, str]) -> bool:
     if isinstance(expire_time, str):
         expire_time = datetime.fromisoformat(expire_time)
 
-    now = datetime.now(expire_time.tzinfo) if expire_time.tzinfo else datetime.now()
+    now = sim_clock.now(expire_time.tzinfo)
 
     return now < expire_time
 
@@ -0,0 +1,349 @@
+import functools
+import glob
+import math
+import os
+import struct
+import threading
+import uuid
+import zlib
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.tools.rsrp_calculation import measure
+from app.tools.spatial_index import METRES_PER_DEGREE
+from app.tools.topology import TopologySnapshot
+
+# Stored as best server where there are no cells
+NO_CELL = -1
+
+# Side in pixels of the map tiles
+TILE_SIZE = 256
+
+# Raster rows measured per call
+ROWS_PER_CHUNK = 64
+
+# Raster files of this process, the topology versions restart with the process
+RUN_ID = uuid.uuid4().hex[:8]
+
+
+class CoverageRaster:
+    """
+    Best server and RSRP of an owner's topology on a regular latitude/longitude
+    grid, at one topology version.
+
+    Pixel (row, column) is centred at `south + (row + 0.5) * step_latitude`,
+    `west + (column + 0.5) * step_longitude`. `best_server` holds cell primary
+    keys (`NO_CELL` when there is none) and `rsrp` the RSRP in dBm of the best
+    server; both are usually read-only memory maps of the files the raster was
+    saved to.
+    """
+
+    def __init__(
+        self,
+        owner_id: int,
+        version: int,
+        model: str,
+        south: float,
+        west: float,
+        step_latitude: float,
+        step_longitude: float,
+        best_server: np.ndarray,
+        rsrp: np.ndarray,
+    ) -> None:
+        self.owner_id = owner_id
+        self.version = version
+        self.model = model
+        self.south = south
+        self.west = west
+        self.step_latitude = step_latitude
+        self.step_longitude = step_longitude
+        self.best_server = best_server
+        self.rsrp = rsrp
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.rsrp.shape
+
+    @property
+    def north(self) -> float:
+        return self.south + self.shape[0] * self.step_latitude
+
+    @property
+    def east(self) -> float:
+        return self.west + self.shape[1] * self.step_longitude
+
+    def intersects(self, south, west, north, east) -> bool:
+        return (
+            south < self.north and north > self.south
+            and west < self.east and east > self.west
+        )
+
+    def sample(self, latitudes, longitudes) -> Tuple[np.ndarray, np.ndarray]:
+        """Best server and RSRP of the pixels containing the points"""
+        rows = np.floor((np.asarray(latitudes) - self.south) / self.step_latitude)
+        columns = np.floor((np.asarray(longitudes) - self.west) / self.step_longitude)
+        inside = (
+            (rows >= 0) & (rows < self.shape[0])
+            & (columns >= 0) & (columns < self.shape[1])
+        )
+        rows = np.where(inside, rows, 0).astype(np.int64)
+        columns = np.where(inside, columns, 0).astype(np.int64)
+
+        best_server = np.where(inside, self.best_server[rows, columns], NO_CELL)
+        rsrp = np.where(inside, self.rsrp[rows, columns], np.nan)
+        return best_server, rsrp
+
+    def to_dict(self) -> dict:
+        rows, columns = self.shape
+        return {
+            "version": self.version,
+            "model": self.model,
+            "south": self.south,
+            "west": self.west,
+            "north": self.north,
+            "east": self.east,
+            "rows": rows,
+            "columns": columns,
+            "step_latitude": self.step_latitude,
+            "step_longitude": self.step_longitude,
+        }
+
+
+def raster_grid(
+    snapshot: TopologySnapshot, resolution: float, max_pixels: int
+) -> Optional[Tuple[float, float, float, float, int, int]]:
+    """
+    South-west corner, steps in degrees and shape of a grid covering the cells'
+    discs with pixels of about `resolution` metres, coarser when it would have
+    more than `max_pixels` pixels.
+    """
+    table = snapshot.table
+    if not len(table):
+        return None
+
+    margin = float(table.radius.max()) / METRES_PER_DEGREE
+    south = float(table.latitude.min()) - margin
+    north = float(table.latitude.max()) + margin
+    scale = math.cos(math.radians(min(max(abs(south), abs(north)), 89.9)))
+    west = float(table.longitude.min()) - margin / scale
+    east = float(table.longitude.max()) + margin / scale
+
+    height = (north - south) * METRES_PER_DEGREE
+    width = (east - west) * METRES_PER_DEGREE * scale
+    resolution = max(resolution, math.sqrt(height * width / max_pixels))
+
+    rows = max(int(math.ceil(height / resolution)), 1)
+    columns = max(int(math.ceil(width / resolution)), 1)
+    return south, west, (north - south) / rows, (east - west) / columns, rows, columns
+
+
+def compute_raster(
+    snapshot: TopologySnapshot,
+    resolution: float = settings.COVERAGE_RESOLUTION,
+    max_pixels: int = settings.COVERAGE_MAX_PIXELS,
+    directory: Optional[str] = None,
+) -> Optional[CoverageRaster]:
+    """
+    Measure every pixel of the grid over the snapshot's cells, in chunks of
+    rows. With `directory` the arrays are written to (and then memory mapped
+    from) .npy files there, otherwise they are kept in memory.
+    """
+    grid = raster_grid(snapshot, resolution, max_pixels)
+    if grid is None:
+        return None
+    south, west, step_latitude, step_longitude, rows, columns = grid
+
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+        prefix = os.path.join(
+            directory, f"{snapshot.owner_id}-{RUN_ID}-{snapshot.version}"
+        )
+        best_server = np.lib.format.open_memmap(
+            f"{prefix}.server.npy", mode="w+", dtype=np.int32, shape=(rows, columns)
+        )
+        rsrp = np.lib.format.open_memmap(
+            f"{prefix}.rsrp.npy", mode="w+", dtype=np.float32, shape=(rows, columns)
+        )
+    else:
+        best_server = np.empty((rows, columns), dtype=np.int32)
+        rsrp = np.empty((rows, columns), dtype=np.float32)
+
+    # Pixels are not measured twice, caching their clutter profiles would only
+    # evict those of the paths
+    gain = None
+    if snapshot.link_gain is not None:
+        gain = functools.partial(snapshot.gain, cache=False)
+
+    longitudes = west + (np.arange(columns) + 0.5) * step_longitude
+    for first in range(0, rows, ROWS_PER_CHUNK):
+        last = min(first + ROWS_PER_CHUNK, rows)
+        latitudes = south + (np.arange(first, last) + 0.5) * step_latitude
+        chunk_latitudes, chunk_longitudes = np.meshgrid(
+            latitudes, longitudes, indexing="ij"
+        )
+
+        radio = measure(
+            chunk_latitudes.ravel(),
+            chunk_longitudes.ravel(),
+            snapshot.table,
+            path_loss=snapshot.path_loss,
+            link_gain=gain,
+        )
+        best_server[first:last] = snapshot.cell_ids[radio.best_server].reshape(
+            last - first, columns
+        )
+        rsrp[first:last] = radio.rsrp.reshape(last - first, columns)
+
+    if directory is not None:
+        best_server.flush()
+        rsrp.flush()
+        del best_server, rsrp
+        best_server = np.load(f"{prefix}.server.npy", mmap_mode="r")
+        rsrp = np.load(f"{prefix}.rsrp.npy", mmap_mode="r")
+
+    return CoverageRaster(
+        snapshot.owner_id,
+        snapshot.version,
+        snapshot.model.name,
+        south,
+        west,
+        step_latitude,
+        step_longitude,
+        best_server,
+        rsrp,
+    )
+
+
+class CoverageRasters:
+    """
+    The coverage raster of each owner, computed on first use after the topology
+    version changed. Rasters are saved under `directory`, the files of an
+    owner's previous raster are deleted once a new one is ready.
+    """
+
+    def __init__(self, directory: Optional[str]) -> None:
+        self.directory = directory
+        self._rasters: Dict[int, CoverageRaster] = {}
+        self._lock = threading.Lock()
+
+    def get(self, snapshot: TopologySnapshot) -> Optional[CoverageRaster]:
+        raster = self._rasters.get(snapshot.owner_id)
+        if raster is not None and raster.version == snapshot.version:
+            return raster
+
+        # Endpoints run in a thread pool, only compute a raster once
+        with self._lock:
+            raster = self._rasters.get(snapshot.owner_id)
+            if raster is None or raster.version != snapshot.version:
+                raster = compute_raster(snapshot, directory=self.directory)
+                self._rasters.pop(snapshot.owner_id, None)
+                self._remove_files(snapshot.owner_id, keep=snapshot.version)
+                if raster is not None:
+                    self._rasters[snapshot.owner_id] = raster
+        return raster
+
+    def _remove_files(self, owner_id: int, keep: int) -> None:
+        if self.directory is None:
+            return
+        current = os.path.join(self.directory, f"{owner_id}-{RUN_ID}-{keep}.")
+        for filename in glob.glob(os.path.join(self.directory, f"{owner_id}-*.npy")):
+            if not filename.startswith(current):
+                os.remove(filename)
+
+    def clear(self) -> None:
+        self._rasters.clear()
+
+
+coverage_rasters = CoverageRasters(settings.COVERAGE_RASTER_PATH)
+
+
+# Tiles
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """South, west, north and east of a web mercator tile"""
+    count = 2 ** z
+    west = x / count * 360 - 180
+    east = (x + 1) / count * 360 - 180
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / count))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / count))))
+    return south, west, north, east
+
+
+def tile_pixels(z: int, x: int, y: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Latitudes and longitudes of the pixel centres of a tile, row by row"""
+    count = 2 ** z
+    offsets = (np.arange(TILE_SIZE) + 0.5) / TILE_SIZE
+    longitudes = (x + offsets) / count * 360 - 180
+    latitudes = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + offsets) / count))))
+    return np.meshgrid(latitudes, longitudes, indexing="ij")
+
+
+def sample_tile(
+    raster: Optional[CoverageRaster], z: int, x: int, y: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Best server and RSRP of the pixels of a tile"""
+    if raster is None or not raster.intersects(*tile_bounds(z, x, y)):
+        return (
+            np.full((TILE_SIZE, TILE_SIZE), NO_CELL, dtype=np.int32),
+            np.full((TILE_SIZE, TILE_SIZE), np.nan, dtype=np.float32),
+        )
+    best_server, rsrp = raster.sample(*tile_pixels(z, x, y))
+    return best_server.astype(np.int32), rsrp.astype(np.float32)
+
+
+def rsrp_colors(
+    rsrp: np.ndarray,
+    low: float = settings.COVERAGE_MIN_RSRP,
+    high: float = settings.COVERAGE_MAX_RSRP,
+) -> np.ndarray:
+    """RGBA pixels from red (`low` dBm) to green (`high` dBm), transparent below"""
+    level = np.clip((np.nan_to_num(rsrp, nan=low - 1) - low) / (high - low), 0, 1)
+    pixels = np.empty(rsrp.shape + (4,), dtype=np.uint8)
+    pixels[..., 0] = np.round(255 * np.minimum(1, 2 * (1 - level)))
+    pixels[..., 1] = np.round(255 * np.minimum(1, 2 * level))
+    pixels[..., 2] = 0
+    pixels[..., 3] = np.where(np.nan_to_num(rsrp, nan=-np.inf) >= low, 160, 0)
+    return pixels
+
+
+def server_colors(best_server: np.ndarray) -> np.ndarray:
+    """RGBA pixels with a colour per cell, transparent where there is none"""
+    # Spread consecutive ids over the hue circle with the golden ratio
+    hue = (best_server.astype(np.float64) * 0.618033988749895) % 1.0
+    sector = hue * 6
+    channels = np.stack(
+        (
+            np.clip(np.abs(sector - 3) - 1, 0, 1),
+            np.clip(2 - np.abs(sector - 2), 0, 1),
+            np.clip(2 - np.abs(sector - 4), 0, 1),
+        ),
+        axis=-1,
+    )
+    pixels = np.empty(best_server.shape + (4,), dtype=np.uint8)
+    pixels[..., :3] = np.round(255 * (0.25 + 0.75 * channels))
+    pixels[..., 3] = np.where(best_server != NO_CELL, 140, 0)
+    return pixels
+
+
+def encode_png(pixels: np.ndarray) -> bytes:
+    """An RGBA image (rows x columns x 4 bytes) as a PNG file"""
+    height, width = pixels.shape[:2]
+    # Filter type 0 (none) before each row
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = pixels.reshape(height, width * 4)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+        )
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
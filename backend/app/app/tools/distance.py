@@ -1,41 +1,94 @@
-import math
 from typing import List, Optional
+
+import numpy as np
+
 from app.models.Cell import Cell
 
+# Mean Earth radius in metres
+EARTH_RADIUS = 6371e3
 
-def distance(
-    lat1: float, lon1: float, lat2: float, lon2: float
-) -> float: 
-    # Haversine formula: determines the great-circle distance between two points on a sphere given their longitudes and latitudes.
-    R = 6371e3
-    φ1 = lat1 * math.pi / 180  # φ, λ in radians
-    φ2 = lat2 * math.pi / 180
-    Δλ = (lon2 - lon1) * math.pi / 180
-    Δφ = (lat2 - lat1) * math.pi / 180
+# Returned as serving cell index when no cell covers the UE
+NO_SERVING_CELL = -1
+
+
+def haversine(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Great-circle distance in metres between two points on a sphere given their
+    latitudes and longitudes, element-wise with NumPy broadcasting.
+    """
+    φ1 = np.radians(lat1)  # φ, λ in radians
+    φ2 = np.radians(lat2)
+    Δφ = φ2 - φ1
+    Δλ = np.radians(np.subtract(lon2, lon1))
+
+    a = np.sin(Δφ / 2) ** 2 + np.cos(φ1) * np.cos(φ2) * np.sin(Δλ / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    return EARTH_RADIUS * c
+
+
+class CellTable:
+    """
+    The cells packed in contiguous latitude/longitude/radius arrays.
+
+    Row `i` of the table is `cells[i]`, so the indices returned by
+    `serving_cells` map back to the cell objects.
+    """
 
-    a = math.sin(Δφ / 2) * math.sin(Δφ / 2) + math.cos(φ1) * math.cos(φ2) * math.sin(
-        Δλ / 2
-    ) * math.sin(Δλ / 2)
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    def __init__(self, cells: List[Cell]) -> None:
+        self.cells = list(cells)
+        self.latitude = np.array([cell.latitude for cell in cells], dtype=np.float64)
+        self.longitude = np.array([cell.longitude for cell in cells], dtype=np.float64)
+        self.radius = np.array([cell.radius for cell in cells], dtype=np.float64)
 
-    d = R * c  # in metres
+    def __len__(self) -> int:
+        return len(self.cells)
 
-    return d
+
+def distance_matrix(latitude, longitude, table: CellTable) -> np.ndarray:
+    """Distances in metres from each UE (rows) to each cell (columns)"""
+    latitude = np.asarray(latitude, dtype=np.float64).reshape(-1, 1)
+    longitude = np.asarray(longitude, dtype=np.float64).reshape(-1, 1)
+    return haversine(latitude, longitude, table.latitude, table.longitude)
+
+
+def serving_cells(
+    latitude, longitude, table: CellTable, return_distances: bool = False
+):
+    """
+    Index in `table` of the serving cell of each UE: the nearest cell whose radius
+    covers the UE, `NO_SERVING_CELL` when none does.
+
+    With `return_distances` the UE × cell distance matrix is returned as well.
+    """
+    distances = distance_matrix(latitude, longitude, table)
+
+    if len(table):
+        in_range = np.where(distances <= table.radius, distances, np.inf)
+        nearest = np.argmin(in_range, axis=1)
+        covered = np.isfinite(in_range[np.arange(len(nearest)), nearest])
+        indices = np.where(covered, nearest, NO_SERVING_CELL)
+    else:
+        indices = np.full(len(distances), NO_SERVING_CELL)
+
+    if return_distances:
+        return indices, distances
+    return indices
+
+
+def distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    # Haversine formula: determines the great-circle distance between two points on a sphere given their longitudes and latitudes.
+    return float(haversine(lat1, lon1, lat2, lon2))
 
 
 def check_distance(lat: float, lon: float, cells: List[Cell]) -> tuple[Optional[Cell], dict[str, float]]:
+    table = CellTable(cells)
+    indices, distances = serving_cells(lat, lon, table, return_distances=True)
 
-    # logging.info(f"Current cell {current_cell}")
-    current_cell = None
-    current_cell_dist = float("inf")
-    distances = {}
-    for cell in cells:
-        dist = distance(lat, lon, cell.latitude, cell.longitude)
-        distances[f"{cell.id}"] = dist
-        # print(f"Distance = {dist} meters from Cell {cell.get('description')}")
-        if dist <= cell.radius:
-            if dist < current_cell_dist:
-                current_cell_dist = dist
-                current_cell = cell
+    index = int(indices[0])
+    current_cell = table.cells[index] if index != NO_SERVING_CELL else None
+    distances = {
+        f"{cell.id}": dist for cell, dist in zip(table.cells, distances[0].tolist())
+    }
 
     return current_cell, distances
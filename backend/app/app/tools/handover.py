@@ -0,0 +1,133 @@
+from typing import Dict, List, Literal, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+
+# How the UEs change cell, see HANDOVER_ALGORITHM
+HandoverAlgorithm = Literal["a3", "distance"]
+
+# Candidate of the UEs with no neighbour meeting the entering condition
+NO_CANDIDATE = -1
+
+
+class A3Handover:
+    """
+    Handover decisions of the moving UEs from their RSRP matrix, event A3 style.
+
+    A neighbour becomes the candidate of a UE once its RSRP exceeds the serving
+    cell's by `hysteresis` dB, and the UE is handed over to it after the
+    condition held for `time_to_trigger` ticks in a row; a different candidate
+    restarts the count. UEs without a serving cell, or out of its radius,
+    attach to the strongest cell covering them straight away.
+
+    The filter state of each UE (candidate cell id and ticks the condition has
+    held) is kept in arrays, in the slot the UE was given on first evaluation.
+    """
+
+    def __init__(
+        self,
+        hysteresis: float = settings.HANDOVER_HYSTERESIS,
+        time_to_trigger: int = settings.HANDOVER_TIME_TO_TRIGGER,
+        capacity: int = 1024,
+    ) -> None:
+        self.hysteresis = hysteresis
+        self.time_to_trigger = max(time_to_trigger, 1)
+        self.candidate = np.full(capacity, NO_CANDIDATE, dtype=np.int64)
+        self.elapsed = np.zeros(capacity, dtype=np.int32)
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def slots(self, supis: Sequence[str]) -> np.ndarray:
+        slots = np.empty(len(supis), dtype=np.int64)
+        for row, supi in enumerate(supis):
+            slot = self._slots.get(supi)
+            if slot is None:
+                slot = self._allocate()
+                self._slots[supi] = slot
+            slots[row] = slot
+        return slots
+
+    def _allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+        slot = len(self._slots)
+        if slot == len(self.candidate):
+            grow = len(self.candidate)
+            self.candidate = np.concatenate(
+                (self.candidate, np.full(grow, NO_CANDIDATE, dtype=np.int64))
+            )
+            self.elapsed = np.concatenate(
+                (self.elapsed, np.zeros(grow, dtype=np.int32))
+            )
+        return slot
+
+    def release(self, supi: str) -> None:
+        slot = self._slots.pop(supi, None)
+        if slot is not None:
+            self.candidate[slot] = NO_CANDIDATE
+            self.elapsed[slot] = 0
+            self._free.append(slot)
+
+    def clear(self) -> None:
+        for supi in list(self._slots):
+            self.release(supi)
+
+    def evaluate(
+        self,
+        supis: Sequence[str],
+        serving: np.ndarray,
+        cell_ids: np.ndarray,
+        covered: np.ndarray,
+        rsrp: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Serving cell of each UE after this tick.
+
+        `serving` is the position of each UE's current cell in the columns of
+        the UEs x cells `rsrp` and `covered` matrices (-1 when it has none),
+        `cell_ids` the ids of those cells. Returns the new positions, -1 for the
+        UEs no cell covers.
+        """
+        serving = np.asarray(serving, dtype=np.int64)
+        count = len(serving)
+        if not count:
+            return serving
+        if not rsrp.shape[1]:
+            return np.full(count, -1, dtype=np.int64)
+
+        rows = np.arange(count)
+        usable = np.where(covered, rsrp, -np.inf)
+        best = np.argmax(usable, axis=1)
+        best_rsrp = usable[rows, best]
+        has_best = np.isfinite(best_rsrp)
+
+        in_service = (serving >= 0) & covered[rows, np.maximum(serving, 0)]
+        serving_rsrp = np.where(in_service, usable[rows, np.maximum(serving, 0)], 0.0)
+        entering = (
+            in_service
+            & has_best
+            & (best != serving)
+            & (best_rsrp > serving_rsrp + self.hysteresis)
+        )
+
+        slots = self.slots(supis)
+        best_ids = cell_ids[best]
+        elapsed = np.where(
+            entering,
+            np.where(self.candidate[slots] == best_ids, self.elapsed[slots] + 1, 1),
+            0,
+        )
+        triggered = entering & (elapsed >= self.time_to_trigger)
+
+        self.candidate[slots] = np.where(entering & ~triggered, best_ids, NO_CANDIDATE)
+        self.elapsed[slots] = np.where(triggered, 0, elapsed)
+
+        target = np.where(in_service, serving, np.where(has_best, best, -1))
+        return np.where(triggered, best, target)
+
+
+a3_handover = A3Handover()
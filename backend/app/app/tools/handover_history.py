@@ -0,0 +1,180 @@
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+# Stored in place of the cell when the UE enters coverage
+NO_CELL = -1
+
+
+class HandoverRing:
+    """
+    The last `capacity` handovers of a UE, packed in fixed size arrays.
+
+    `head` is the slot the next record is written to, so once the ring is full
+    the oldest record is overwritten.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.tick = np.zeros(capacity, dtype=np.int64)
+        self.timestamp = np.zeros(capacity, dtype=np.float64)
+        self.from_cell = np.zeros(capacity, dtype=np.int64)
+        self.to_cell = np.zeros(capacity, dtype=np.int64)
+        self.head = 0
+        self.count = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self.tick)
+
+    def append(self, tick: int, timestamp: float, from_cell: int, to_cell: int):
+        self.tick[self.head] = tick
+        self.timestamp[self.head] = timestamp
+        self.from_cell[self.head] = from_cell
+        self.to_cell[self.head] = to_cell
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def order(self) -> np.ndarray:
+        """Slots of the stored records, oldest first"""
+        start = (self.head - self.count) % self.capacity
+        return (start + np.arange(self.count)) % self.capacity
+
+    def columns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        order = self.order()
+        return (
+            self.tick[order],
+            self.timestamp[order],
+            self.from_cell[order],
+            self.to_cell[order],
+        )
+
+
+class HandoverHistory:
+    """
+    Bounded handover history of every UE, queried by time window and page.
+
+    Each UE keeps its last `capacity` handovers. When `path` is set the history
+    is saved there on shutdown and loaded back on startup.
+    """
+
+    def __init__(self, capacity: int, path: Optional[str] = None) -> None:
+        self.capacity = capacity
+        self.path = path
+        self._rings: Dict[str, HandoverRing] = {}
+
+    def record(
+        self,
+        supi: str,
+        tick: int,
+        time: datetime,
+        from_cell: Optional[int],
+        to_cell: Optional[int],
+    ) -> None:
+        ring = self._rings.get(supi)
+        if ring is None:
+            ring = self._rings[supi] = HandoverRing(self.capacity)
+
+        ring.append(
+            tick,
+            time.timestamp(),
+            from_cell if from_cell is not None else NO_CELL,
+            to_cell if to_cell is not None else NO_CELL,
+        )
+
+    def query(
+        self,
+        supi: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> Tuple[int, List[dict]]:
+        """The number of handovers in [since, until) and one page of them"""
+        ring = self._rings.get(supi)
+        if ring is None:
+            return 0, []
+
+        tick, timestamp, from_cell, to_cell = ring.columns()
+
+        # Not a binary search: after a restart the simulated clock may start
+        # before the last handovers that were loaded back
+        window = np.ones(len(timestamp), dtype=bool)
+        if since is not None:
+            window &= timestamp >= since.timestamp()
+        if until is not None:
+            window &= timestamp < until.timestamp()
+
+        selected = np.flatnonzero(window)
+        total = len(selected)
+        page = selected[skip : skip + limit]
+
+        records = [
+            {
+                "tick": t,
+                "timestamp": datetime.fromtimestamp(ts, timezone.utc),
+                "from_cell_id": f if f != NO_CELL else None,
+                "to_cell_id": c if c != NO_CELL else None,
+            }
+            for t, ts, f, c in zip(
+                tick[page].tolist(),
+                timestamp[page].tolist(),
+                from_cell[page].tolist(),
+                to_cell[page].tolist(),
+            )
+        ]
+        return total, records
+
+    def clear(self) -> None:
+        self._rings.clear()
+
+    # Persistence
+    def save(self) -> None:
+        if not self.path or not self._rings:
+            return
+
+        supis, columns = [], [[], [], [], []]
+        for supi, ring in self._rings.items():
+            supis.extend([supi] * ring.count)
+            for column, values in zip(columns, ring.columns()):
+                column.append(values)
+
+        with open(self.path, "wb") as fp:
+            np.savez(
+                fp,
+                supi=np.array(supis),
+                tick=np.concatenate(columns[0]),
+                timestamp=np.concatenate(columns[1]),
+                from_cell=np.concatenate(columns[2]),
+                to_cell=np.concatenate(columns[3]),
+            )
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with np.load(self.path) as data:
+                rows = zip(
+                    data["supi"].tolist(),
+                    data["tick"].tolist(),
+                    data["timestamp"].tolist(),
+                    data["from_cell"].tolist(),
+                    data["to_cell"].tolist(),
+                )
+                for supi, tick, timestamp, from_cell, to_cell in rows:
+                    ring = self._rings.get(supi)
+                    if ring is None:
+                        ring = self._rings[supi] = HandoverRing(self.capacity)
+                    ring.append(tick, timestamp, from_cell, to_cell)
+        except Exception as ex:
+            logging.exception("Failed to load the handover history: %s", ex)
+
+
+handover_history = HandoverHistory(
+    settings.HANDOVER_HISTORY_SIZE, settings.HANDOVER_HISTORY_PATH
+)
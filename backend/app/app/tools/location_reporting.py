@@ -0,0 +1,73 @@
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.schemas.monitoringevent import LocationType
+from app.tools.distance import distance
+
+
+class LocationReportFilter:
+    """
+    Decides when a LOCATION_REPORTING subscription reports the UE's location.
+
+    With a `repPeriod` the subscription reports every period. Otherwise a
+    LAST_KNOWN_LOCATION subscription reports when the UE changes cell, and the
+    others when it changes cell or moves `linearDistance` metres (by default
+    `LOCATION_REPORT_MIN_DISPLACEMENT`) from the last location reported. No
+    two reports are closer than `minimumReportInterval` seconds, and the first
+    location is always reported. Times are in simulated seconds.
+    """
+
+    __slots__ = (
+        "period",
+        "min_interval",
+        "cell_change_only",
+        "min_displacement",
+        "last_time",
+        "last_latitude",
+        "last_longitude",
+        "last_cell",
+    )
+
+    def __init__(self, subscription: Dict) -> None:
+        self.period: Optional[float] = subscription.get("repPeriod")
+        self.min_interval = subscription.get("minimumReportInterval") or 0
+        self.cell_change_only = (
+            subscription.get("locationType") == LocationType.LAST_KNOWN_LOCATION
+        )
+        self.min_displacement = (
+            subscription.get("linearDistance")
+            or settings.LOCATION_REPORT_MIN_DISPLACEMENT
+        )
+        self.last_time: Optional[float] = None
+        self.last_latitude = 0.0
+        self.last_longitude = 0.0
+        self.last_cell: Optional[str] = None
+
+    def due(
+        self, latitude: float, longitude: float, cell_id: Optional[str], now: float
+    ) -> bool:
+        """Whether to report this location, remembered as the last one if so"""
+        if self.last_time is not None:
+            elapsed = now - self.last_time
+            if elapsed < self.min_interval:
+                return False
+
+            if self.period:
+                due = elapsed >= self.period
+            elif cell_id != self.last_cell:
+                due = True
+            elif self.cell_change_only:
+                due = False
+            else:
+                moved = distance(
+                    latitude, longitude, self.last_latitude, self.last_longitude
+                )
+                due = moved >= self.min_displacement
+            if not due:
+                return False
+
+        self.last_time = now
+        self.last_latitude = latitude
+        self.last_longitude = longitude
+        self.last_cell = cell_id
+        return True
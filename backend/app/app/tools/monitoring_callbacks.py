@@ -1,9 +1,10 @@
 import logging
 import asyncio
-from typing import Optional
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
 from collections.abc import Generator
 
 from app import crud
+from app.crud import crud_mongo
 from app.core.notification_responder import notification_responder
 from app.models.UE import UE
 from app.db.session import client
@@ -20,6 +21,16 @@ from app.schemas.monitoringevent import (
 )
 
 from app.api.deps import db_context
+from app.tools.check_subscription import check_numberOfReports
+from app.tools.sim_clock import sim_clock
+from app.tools.subscription_index import (
+    DETECTION_TIMER,
+    EXPIRY_TIMER,
+    REPORT_TIMER,
+    subscription_index,
+)
+from app.tools.timer_scheduler import timer_scheduler
+from app.tools.ue_store import UEState, ue_store
 
 
 def get_subscription_mon_types(sub) -> Generator[MonitoringType]:
@@ -30,10 +41,49 @@ def get_subscription_mon_types(sub) -> Generator[MonitoringType]:
             yield monType
 
 
+async def location_notification(
+    ue: UE, old_cell_id: Optional[str], current_cell_id: Optional[str]
+):
+    # Mongo is only queried when the subscriptions change, and the expired
+    # subscriptions are deleted by their expiry timer
+    for record in subscription_index.for_supi(ue.supi):
+        doc_id = record.doc_id
+        sub = record.subscription
+
+        if not check_numberOfReports(sub.get("maximumNumberOfReports")):
+            crud_mongo.delete_by_uuid(client.fastapi, "MonitoringEvent", doc_id)
+            subscription_index.remove(doc_id)
+            continue
+
+        for monType in record.types:
+            if monType == MonitoringType.LOCATION_REPORTING:
+                # Periodic reports are sent by the report timer
+                if not record.periodic and record.location_filter.due(
+                    ue.latitude, ue.longitude, current_cell_id, sim_clock.time
+                ):
+                    asyncio.create_task(
+                        handle_location_report_callback(sub, ue, doc_id)
+                    )
+
+            elif monType == MonitoringType.LOSS_OF_CONNECTIVITY:
+                handle_loss_connectivity_callback(
+                    sub, ue, doc_id, old_cell_id, current_cell_id
+                )
+
+            elif monType == MonitoringType.UE_REACHABILITY:
+                asyncio.create_task(
+                    handle_ue_reachability_callback(
+                        sub, ue, doc_id, old_cell_id, current_cell_id
+                    )
+                )
+
+
 def update_maximum_reports(sub, id):
     db_mongo = client.fastapi
     if sub.get("maximumNumberOfReports") is not None:
-        db_mongo["MonitoringEvent"].find_one_and_update(
+        # The indexed subscription is the same document, keep it in step
+        sub["maximumNumberOfReports"] -= 1
+        db_mongo["MonitoringEvent"].update_one(
             {"_id": id},
             {"$inc": {"subscription.maximumNumberOfReports": -1}},
         )
@@ -80,30 +130,109 @@ def create_location_event_report(ue: UE) -> MonitoringEventReport:
     return report
 
 
-async def handle_loss_connectivity_callback(
+def handle_loss_connectivity_callback(
     loss_of_connectivity_sub,
     ue: UE,
     doc_id,
     old_cell_id: Optional[str],
     current_cell_id: Optional[str],
 ):
+    if old_cell_id is None and current_cell_id is not None:
+        # Back in coverage before the maximum detection time
+        timer_scheduler.cancel(DETECTION_TIMER, doc_id)
+        return
+
     if old_cell_id is None or current_cell_id is not None:
         return
 
-    lossOfConnectReason = 6  #  6 = UE is deregistered
+    maximum_detection_time = loss_of_connectivity_sub.get("maximumDetectionTime")
+    if maximum_detection_time is not None:
+        timer_scheduler.schedule_in(
+            DETECTION_TIMER,
+            doc_id,
+            maximum_detection_time,
+            (loss_of_connectivity_sub, ue),
+        )
+        return
 
-    if loss_of_connectivity_sub.get("maximumDetectionTime") is not None:
-        await asyncio.sleep(loss_of_connectivity_sub.get("maximumDetectionTime"))
+    asyncio.create_task(
+        send_loss_connectivity_callback(
+            loss_of_connectivity_sub, ue, doc_id, 6  # 6 = UE is deregistered
+        )
+    )
+
+
+def current_ues(supis: Iterable[str]) -> Dict[str, UEState]:
+    """
+    Current state of the UEs: moving UEs are written behind, the store holds
+    their position and cell, the others are read with a single query.
+    """
+    ues: Dict[str, UEState] = {}
+    missing = []
+    for supi in set(supis):
+        state = ue_store.get(supi)
+        if state is not None:
+            ues[supi] = state
+        else:
+            missing.append(supi)
+
+    if missing:
         with db_context() as db:
-            new_ue = crud.ue.get_supi(db=db, supi=ue.supi)
-            if new_ue is None or new_ue.Cell_id is not None:
-                return
+            # Copied while the session is open, the callbacks run after it closed
+            ues.update(
+                (ue.supi, UEState(ue)) for ue in crud.ue.get_supi_multi(db, missing)
+            )
+    return ues
 
-        lossOfConnectReason = 7  # 7 = Maximum detection timer expires
 
-    await send_loss_connectivity_callback(
-        loss_of_connectivity_sub, ue, doc_id, lossOfConnectReason
-    )
+async def fire_detection_timers(timers: List[Tuple[Hashable, Any]]) -> None:
+    ues = current_ues(ue.supi for _, (_, ue) in timers)
+
+    for doc_id, (sub, ue) in timers:
+        new_ue = ues.get(ue.supi)
+        if new_ue is None or new_ue.Cell_id is not None:
+            continue
+
+        asyncio.create_task(
+            send_loss_connectivity_callback(
+                sub, ue, doc_id, 7  # 7 = Maximum detection timer expires
+            )
+        )
+
+
+async def fire_report_timers(timers: List[Tuple[Hashable, Any]]) -> None:
+    records = [subscription_index.get(doc_id) for doc_id, _ in timers]
+    records = [record for record in records if record is not None]
+    ues = current_ues(record.supi for record in records)
+
+    for record in records:
+        sub = record.subscription
+        if not check_numberOfReports(sub.get("maximumNumberOfReports")):
+            crud_mongo.delete_by_uuid(client.fastapi, "MonitoringEvent", record.doc_id)
+            subscription_index.remove(record.doc_id)
+            continue
+
+        timer_scheduler.schedule_in(
+            REPORT_TIMER, record.doc_id, record.location_filter.period
+        )
+        ue = ues.get(record.supi)
+        if ue is not None:
+            asyncio.create_task(
+                handle_location_report_callback(sub, ue, record.doc_id)
+            )
+
+
+async def fire_expiry_timers(timers: List[Tuple[Hashable, Any]]) -> None:
+    doc_ids = [doc_id for doc_id, _ in timers]
+    client.fastapi["MonitoringEvent"].delete_many({"_id": {"$in": doc_ids}})
+    for doc_id in doc_ids:
+        subscription_index.remove(doc_id)
+    logging.info("%d monitoring subscriptions expired", len(doc_ids))
+
+
+timer_scheduler.handler(DETECTION_TIMER, fire_detection_timers)
+timer_scheduler.handler(REPORT_TIMER, fire_report_timers)
+timer_scheduler.handler(EXPIRY_TIMER, fire_expiry_timers)
 
 
 async def send_loss_connectivity_callback(
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy.sql import text
+
+from app import crud
+from app.api.deps import db_context
+from app.core.config import settings
+from app.models.movement import MovementCheckpoint
+from app.tools.movement_engine import MovementEngine, movement_engine
+
+
+class MovementCheckpointer:
+    """
+    Periodically saves which UEs are moving and how far along their path they
+    are, so that the movement engine can resume them after a restart.
+
+    A checkpoint replaces the previous one in a single transaction, every
+    `interval` seconds and on shutdown. Nothing is written while the set of
+    moving UEs stays empty.
+    """
+
+    def __init__(self, engine: MovementEngine, interval: float) -> None:
+        self.engine = engine
+        self.interval = interval
+        self._saved_empty = False
+        self._task: Optional[asyncio.Task] = None
+
+    def save(self) -> int:
+        rows = [
+            {"supi": supi, "distance": state.distance, "owner_id": state.user.id}
+            for supi, state in list(self.engine.moving.items())
+        ]
+        if not rows and self._saved_empty:
+            return 0
+
+        table = MovementCheckpoint.__table__
+        with db_context() as db:
+            db.execute(text(f"DELETE FROM {table.name}"))
+            if rows:
+                db.execute(table.insert(), rows)
+            db.commit()
+
+        self._saved_empty = not rows
+        return len(rows)
+
+    def restore(self) -> int:
+        """Register again the UEs of the last checkpoint, returns how many"""
+        with db_context() as db:
+            checkpoints = db.query(MovementCheckpoint).all()
+            users = {}
+            resumed = 0
+
+            for checkpoint in checkpoints:
+                if checkpoint.owner_id not in users:
+                    users[checkpoint.owner_id] = crud.user.get(
+                        db=db, id=checkpoint.owner_id
+                    )
+                user = users[checkpoint.owner_id]
+
+                if user is not None and not self.engine.is_moving(checkpoint.supi):
+                    self.engine.register(
+                        checkpoint.supi, user, distance=checkpoint.distance
+                    )
+                    resumed += 1
+
+        # The UEs of deleted users and those already moving are skipped
+        logging.info(
+            "Resumed the movement of %d of %d UEs", resumed, len(checkpoints)
+        )
+        return resumed
+
+    def start(self) -> None:
+        try:
+            self.restore()
+        except Exception as ex:
+            logging.exception("Failed to resume the moving UEs: %s", ex)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.save()
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.save()
+            except Exception as ex:
+                logging.exception("Failed to checkpoint the moving UEs: %s", ex)
+
+
+movement_checkpoints = MovementCheckpointer(
+    movement_engine, settings.MOVEMENT_CHECKPOINT_INTERVAL
+)
@@ -0,0 +1,425 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Literal, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.api.deps import db_context
+from app.core.config import settings
+from app.models.UE import UE
+from app.tools.cell_timeline import NO_CELL, ServingCellTimeline, timeline_cache
+from app.tools.handover import a3_handover
+from app.tools.handover_history import handover_history
+from app.tools.monitoring_callbacks import location_notification
+from app.tools.path_cache import PathGeometry, path_cache
+from app.tools.nr_radio import nr_carrier
+from app.tools.radio_memo import radio_memo
+from app.tools.rsrp_calculation import measure_rsrp
+from app.tools.sim_clock import SimulationClock, sim_clock
+from app.tools.spatial_index import CellRecord
+from app.tools.topology import topology_snapshots
+from app.tools.ue_store import UEState, ue_store
+
+Speed = Literal["HIGH", "LOW", "STATIONARY"]
+
+
+def ue_speed(speed: Speed) -> float:
+    """Speed in m/s along the path"""
+    if speed == "LOW":
+        return settings.UE_SPEED_LOW
+
+    if speed == "HIGH":
+        return settings.UE_SPEED_HIGH
+
+    return 0.0
+
+
+def may_move(owner_id: Optional[int], user: models.User) -> bool:
+    """Whether the user may move, or read the movement of, a UE of the owner:
+    its own UEs, or any UE for a superuser, like in the other endpoints"""
+    return user.is_superuser or owner_id == user.id
+
+
+def movement_error(ue: Optional[UE], user: models.User) -> Optional[str]:
+    """Why the user may not move the UE, None if it may"""
+    if ue is None:
+        return "UE not found"
+
+    if not may_move(ue.owner_id, user):
+        return "Not enough permissions"
+
+    return None
+
+
+def validate_ue(
+    *, ue: Optional[UE], user: models.User, db: Session
+) -> Optional[PathGeometry]:
+    """The geometry of the UE's path if the user may move the UE along it"""
+    error = movement_error(ue, user)
+    path = path_cache.get(db, ue.path_id) if error is None else None
+
+    if error is None and path is None:
+        error = "Path not found"
+
+    if error is not None:
+        logging.warning(error)
+
+    return path
+
+
+class MovingUE:
+    """
+    Movement state of a UE registered with the engine.
+
+    A UE is registered as soon as its loop is requested, but it is only admitted
+    (UE loaded, path geometry resolved) at the start of the next tick. Its position
+    is kept as the distance in metres travelled along the looped path.
+    """
+
+    def __init__(
+        self, supi: str, user: models.User, distance: Optional[float] = None
+    ) -> None:
+        self.supi = supi
+        self.user = user
+        self.ue: Optional[UEState] = None
+        self.path: Optional[PathGeometry] = None
+        self.timeline: Optional[ServingCellTimeline] = None
+        # Set before admission when resuming from a checkpoint
+        self.distance = distance
+        # Radio conditions measured at the end of the last tick
+        self.best_cell: Optional[CellRecord] = None
+        self.rsrp: Optional[float] = None
+        self.sinr: Optional[float] = None
+        self.throughput: Optional[float] = None
+
+    @property
+    def admitted(self) -> bool:
+        return self.path is not None
+
+    @property
+    def owner_id(self) -> int:
+        """Owner of the UE, the user who started it until it is admitted"""
+        return self.ue.owner_id if self.ue is not None else self.user.id
+
+    @property
+    def speed(self) -> float:
+        return ue_speed(self.ue.speed)
+
+    def advance(self, seconds: float) -> Tuple[float, float]:
+        """Move for `seconds`, returns the start distance and the metres travelled"""
+        start = self.distance
+        travelled = self.speed * seconds
+        self.distance = start + travelled
+        if self.path.length > 0:
+            self.distance %= self.path.length
+        return start, travelled
+
+    def position(self) -> Tuple[float, float]:
+        return self.path.interpolate(self.distance)
+
+
+class MovementEngine:
+    """
+    Advances every moving UE in a single tick of the simulation clock.
+
+    Each tick moves every UE `speed * tick_interval` metres along its path, then
+    runs its stages over the whole batch. With the "a3" handover algorithm the
+    RSRP/SINR of all the UEs is computed in one vectorized pass and the A3
+    filter picks their serving cells from it. With "distance" the cell edges
+    crossed during the tick are looked up in the precomputed timeline of each
+    path and recorded at the instant they were crossed. The new positions and
+    cells are then written to the in-memory UE store and finally the location
+    notifications are dispatched.
+    The store writes the UE states behind to the DB, so no connection is held by
+    the moving UEs between ticks.
+    """
+
+    def __init__(self, clock: SimulationClock) -> None:
+        self.clock = clock
+        self.moving: Dict[str, MovingUE] = {}
+        clock.on_tick(self.tick)
+
+    # Registry
+    def is_moving(self, supi: str) -> bool:
+        return supi in self.moving
+
+    def register(
+        self, supi: str, user: models.User, distance: Optional[float] = None
+    ) -> None:
+        self.moving[supi] = MovingUE(supi, user, distance)
+
+    def register_many(self, supis: List[str], user: models.User) -> None:
+        # A single update, so a tick sees either none or all of the UEs
+        self.moving.update({supi: MovingUE(supi, user) for supi in supis})
+
+    def unregister(self, supi: str) -> MovingUE:
+        state = self.moving.pop(supi)
+        ue_store.release(supi)
+        a3_handover.release(supi)
+        return state
+
+    def unregister_many(self, supis: List[str]) -> List[str]:
+        """Stop the UEs that are moving, returns their SUPIs"""
+        stopped = [supi for supi in supis if self.moving.pop(supi, None) is not None]
+        for supi in stopped:
+            ue_store.release(supi)
+            a3_handover.release(supi)
+        return stopped
+
+    def clear(self) -> None:
+        for supi in list(self.moving):
+            self.unregister(supi)
+
+    def record_handover(
+        self,
+        supi: str,
+        from_cell_id: Optional[int],
+        to_cell_id: int,
+        time: Optional[datetime] = None,
+    ) -> None:
+        handover_history.record(
+            supi,
+            self.clock.ticks,
+            time or self.clock.now(timezone.utc),
+            from_cell_id,
+            to_cell_id,
+        )
+
+    # Scheduling
+    def start(self) -> None:
+        self.clock.start()
+
+    def shutdown(self) -> None:
+        self.clear()
+        self.clock.shutdown()
+
+    async def tick(self) -> None:
+        if any(not state.admitted for state in list(self.moving.values())):
+            with db_context() as db:
+                self.admit(db)
+
+        batch = [state for state in list(self.moving.values()) if state.admitted]
+        batch = self.refresh_paths(batch)
+        if not batch:
+            return
+
+        moves = [state.advance(self.clock.tick_interval) for state in batch]
+        if settings.HANDOVER_ALGORITHM == "a3":
+            cells = self.measure_radio(batch, handover=True)
+            changes = self.persist(batch, cells, [False] * len(batch))
+        else:
+            self.resolve_timelines(batch)
+            crossed = self.record_crossings(batch, moves)
+            cells = [state.timeline.cell_at(state.distance) for state in batch]
+            changes = self.persist(batch, cells, crossed)
+            self.measure_radio(batch)
+
+        for ue, old_cell, new_cell in changes:
+            await location_notification(ue, old_cell, new_cell)
+
+    # Stages
+    def admit(self, db: Session) -> None:
+        pending = {
+            supi: state
+            for supi, state in list(self.moving.items())
+            if not state.admitted
+        }
+        if not pending:
+            return
+
+        # The UEs started since the last tick are loaded with a single query
+        ues = {ue.supi: ue for ue in crud.ue.get_supi_multi(db, list(pending))}
+
+        for supi, state in pending.items():
+            ue = ues.get(supi)
+            path = validate_ue(ue=ue, user=state.user, db=db)
+
+            if path is None:
+                self.moving.pop(supi, None)
+                continue
+
+            state.ue = ue_store.load(ue)
+            state.path = path
+
+            # Resume from the checkpoint or the current position if it is on the
+            # path, otherwise start from the beginning
+            if state.distance is None:
+                state.distance = path.locate(ue.latitude, ue.longitude) or 0.0
+
+    def refresh_paths(self, batch: List[MovingUE]) -> List[MovingUE]:
+        """
+        Move the UEs whose path was edited since the last tick onto its new
+        geometry, at their current position if it is still on the path, and stop
+        those whose path was deleted. Returns the UEs still moving.
+        """
+        stale = [state for state in batch if not path_cache.is_current(state.path)]
+        if not stale:
+            return batch
+
+        with db_context() as db:
+            for state in stale:
+                path = path_cache.get(db, state.path.path_id)
+                if path is None:
+                    logging.warning("Path of UE %s deleted, loop ended", state.supi)
+                    self.unregister_many([state.supi])
+                    continue
+
+                distance = path.locate(*state.position())
+                state.distance = state.distance if distance is None else distance
+                if path.length > 0:
+                    state.distance %= path.length
+                state.path = path
+                # Rebuilt for the new geometry by resolve_timelines
+                state.timeline = None
+
+        return [state for state in batch if self.moving.get(state.supi) is state]
+
+    def resolve_timelines(self, batch: List[MovingUE]) -> None:
+        # Timelines are only rebuilt (and the DB touched) when the path or the
+        # owner's cells changed since they were computed
+        stale = [
+            state
+            for state in batch
+            if timeline_cache.is_stale(state.timeline, state.path, state.user.id)
+        ]
+        if stale:
+            with db_context() as db:
+                for state in stale:
+                    state.timeline = timeline_cache.get(db, state.path, state.user.id)
+
+    def record_crossings(
+        self, batch: List[MovingUE], moves: List[Tuple[float, float]]
+    ) -> List[bool]:
+        """
+        Record the handovers met by each UE during the tick at the instant the
+        cell edge was crossed. Returns whether each UE crossed an edge.
+        """
+        now = self.clock.now(timezone.utc)
+        crossed = []
+
+        for state, (start, travelled) in zip(batch, moves):
+            crossings = state.timeline.crossings(start, travelled)
+            for offset, from_id, to_id in crossings:
+                if to_id == NO_CELL:
+                    continue
+                # The move spans the last tick_interval seconds at constant speed
+                before = (travelled - offset) / state.speed
+                self.record_handover(
+                    state.supi,
+                    from_id if from_id != NO_CELL else None,
+                    to_id,
+                    now - timedelta(seconds=before),
+                )
+            crossed.append(bool(crossings))
+
+        return crossed
+
+    def persist(
+        self,
+        batch: List[MovingUE],
+        cells: List[Optional[CellRecord]],
+        crossed: List[bool],
+    ) -> List[Tuple[UEState, Optional[str], Optional[str]]]:
+        changes = []
+
+        for state, cell, handovers_recorded in zip(batch, cells, crossed):
+            latitude, longitude = state.position()
+            old_cell, new_cell = self.apply(
+                state.ue,
+                latitude,
+                longitude,
+                cell,
+                record_handover=not handovers_recorded,
+            )
+            changes.append((state.ue, old_cell, new_cell))
+
+        return changes
+
+    def measure_radio(
+        self, batch: List[MovingUE], handover: bool = False
+    ) -> List[Optional[CellRecord]]:
+        """
+        Radio conditions and throughput of all the moving UEs, one pass per owner.
+        With `handover` the A3 filter first picks the serving cells from the RSRPs
+        and the UEs are measured against them. Returns the serving cell of each UE.
+        """
+        by_owner: Dict[int, List[MovingUE]] = {}
+        for state in batch:
+            by_owner.setdefault(state.user.id, []).append(state)
+
+        snapshots = {
+            owner_id: topology_snapshots.peek(owner_id) for owner_id in by_owner
+        }
+        stale = [owner for owner, snapshot in snapshots.items() if snapshot is None]
+        if stale:
+            with db_context() as db:
+                for owner_id in stale:
+                    snapshots[owner_id] = topology_snapshots.get(db, owner_id)
+
+        serving_cells: Dict[str, Optional[CellRecord]] = {}
+        for owner_id, states in by_owner.items():
+            snapshot = snapshots[owner_id]
+            serving = np.array(
+                [snapshot.cell_position(state.ue.Cell_id) for state in states],
+                dtype=np.int64,
+            )
+            distances, rsrp = radio_memo.lookup(
+                snapshot,
+                [state.path for state in states],
+                [state.distance for state in states],
+            )
+            if handover:
+                serving = a3_handover.evaluate(
+                    [state.supi for state in states],
+                    serving,
+                    snapshot.cell_ids,
+                    distances <= snapshot.table.radius,
+                    rsrp,
+                )
+            serving_cells.update(
+                (state.supi, snapshot.cells[position] if position >= 0 else None)
+                for state, position in zip(states, serving.tolist())
+            )
+
+            measurements = measure_rsrp(rsrp, serving)
+
+            # The cells are shared between the owner's moving UEs
+            throughputs = nr_carrier.throughput(measurements.sinr, serving)
+
+            for state, best, rsrp, sinr, throughput in zip(
+                states,
+                measurements.best_server.tolist(),
+                measurements.rsrp.tolist(),
+                measurements.sinr.tolist(),
+                throughputs.tolist(),
+            ):
+                state.best_cell = snapshot.cells[best] if best >= 0 else None
+                state.rsrp = None if np.isnan(rsrp) else rsrp
+                state.sinr = None if np.isnan(sinr) else sinr
+                state.throughput = throughput
+
+        return [serving_cells[state.supi] for state in batch]
+
+    def apply(
+        self,
+        ue: UEState,
+        latitude: float,
+        longitude: float,
+        cell_now: Optional[CellRecord],
+        record_handover: bool = True,
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Move a UE held by the store, returns the old and new cell ids (hex)"""
+        old_cell = ue.Cell.cell_id if ue.Cell is not None else None
+        new_cell = cell_now.cell_id if cell_now is not None else None
+
+        new_cell_id = cell_now.id if cell_now is not None else None
+        if ue.Cell_id != new_cell_id and cell_now and record_handover:
+            self.record_handover(ue.supi, ue.Cell_id, cell_now.id)
+
+        ue_store.update(ue, latitude, longitude, cell_now)
+        return old_cell, new_cell
+
+
+movement_engine = MovementEngine(sim_clock)
@@ -0,0 +1,147 @@
+from typing import Dict, Literal, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+CqiTable = Literal["qam64", "qam256"]
+
+# Maximum transmission bandwidth configuration N_RB per channel bandwidth in
+# MHz, for each subcarrier spacing in kHz: TS 38.101-1 table 5.3.2-1 (FR1, 15 to
+# 60 kHz) and TS 38.101-2 table 5.3.2-1 (FR2, 120 kHz)
+PRB_TABLE: Dict[int, Dict[int, int]] = {
+    15: {5: 25, 10: 52, 15: 79, 20: 106, 25: 133, 30: 160, 40: 216, 50: 270},
+    30: {
+        5: 11, 10: 24, 15: 38, 20: 51, 25: 65, 30: 78, 40: 106,
+        50: 133, 60: 162, 70: 189, 80: 217, 90: 245, 100: 273,
+    },
+    60: {
+        10: 11, 15: 18, 20: 24, 25: 31, 30: 38, 40: 51,
+        50: 65, 60: 79, 70: 93, 80: 107, 90: 121, 100: 135,
+    },
+    120: {50: 32, 100: 66, 200: 132, 400: 264},
+}
+
+# Spectral efficiency in bits per resource element of CQI 1..15,
+# TS 38.214 tables 5.2.2.1-2 (up to 64QAM) and 5.2.2.1-3 (up to 256QAM)
+CQI_EFFICIENCY: Dict[str, np.ndarray] = {
+    "qam64": np.array([
+        0.1523, 0.2344, 0.3770, 0.6016, 0.8770, 1.1758, 1.4766, 1.9141,
+        2.4063, 2.7305, 3.3223, 3.9023, 4.5234, 5.1152, 5.5547,
+    ]),
+    "qam256": np.array([
+        0.1523, 0.3770, 0.8770, 1.4766, 1.9141, 2.4063, 2.7305, 3.3223,
+        3.9023, 4.5234, 5.1152, 5.5547, 6.2266, 6.9141, 7.4063,
+    ]),
+}
+
+# Lowest SINR in dB each CQI is decoded at with a 10% BLER (AWGN link level
+# results); the 256QAM table reuses those of the efficiencies both tables share
+# and extends them by about 2 dB per CQI
+CQI_SINR_THRESHOLD: Dict[str, np.ndarray] = {
+    "qam64": np.array([
+        -6.7, -4.7, -2.3, 0.2, 2.4, 4.3, 5.9, 8.1,
+        10.3, 11.7, 14.1, 16.3, 18.7, 21.0, 22.7,
+    ]),
+    "qam256": np.array([
+        -6.7, -2.3, 2.4, 5.9, 8.1, 10.3, 11.7, 14.1,
+        16.3, 18.7, 21.0, 22.7, 24.9, 27.1, 29.3,
+    ]),
+}
+
+# OFDM symbols per slot with the normal cyclic prefix
+SYMBOLS_PER_SLOT = 14
+
+# Subcarriers per PRB
+SUBCARRIERS_PER_PRB = 12
+
+
+def prb_count(bandwidth: int, scs: int) -> int:
+    """Number of PRBs of a carrier, `bandwidth` in MHz and `scs` in kHz"""
+    try:
+        return PRB_TABLE[int(scs)][int(bandwidth)]
+    except KeyError:
+        raise ValueError(
+            f"A {bandwidth} MHz channel is not defined with {scs} kHz subcarriers"
+        ) from None
+
+
+def cqi_from_sinr(sinr, table: CqiTable = "qam256") -> np.ndarray:
+    """CQI (0 is out of range) of each SINR in dB, NaN SINRs get CQI 0"""
+    sinr = np.nan_to_num(np.asarray(sinr, dtype=np.float64), nan=-np.inf)
+    return np.searchsorted(CQI_SINR_THRESHOLD[table], sinr, side="right")
+
+
+def spectral_efficiency(sinr, table: CqiTable = "qam256") -> np.ndarray:
+    """Bits per resource element of each SINR in dB, through the CQI table"""
+    cqi = cqi_from_sinr(sinr, table)
+    efficiency = np.concatenate(([0.0], CQI_EFFICIENCY[table]))
+    return efficiency[cqi]
+
+
+class NRCarrier:
+    """
+    An NR carrier: channel bandwidth in MHz, subcarrier spacing in kHz, MIMO
+    layers and the fraction of the resources taken by control and reference
+    signals, by default the TS 38.306 downlink overheads (14% in FR1, 18% in FR2).
+    """
+
+    def __init__(
+        self,
+        bandwidth: int = settings.NR_CHANNEL_BANDWIDTH,
+        scs: int = settings.NR_SUBCARRIER_SPACING,
+        layers: int = settings.NR_MIMO_LAYERS,
+        overhead: Optional[float] = None,
+        table: CqiTable = settings.NR_CQI_TABLE,
+    ) -> None:
+        self.bandwidth = bandwidth
+        self.scs = scs
+        self.layers = layers
+        self.prbs = prb_count(bandwidth, scs)
+        if overhead is None:
+            overhead = 0.18 if scs >= 120 else 0.14
+        self.overhead = overhead
+        self.table = table
+
+    @property
+    def symbol_rate(self) -> float:
+        """OFDM symbols per second, 14 per slot and 2^μ slots per millisecond"""
+        return SYMBOLS_PER_SLOT * 1000 * self.scs / 15
+
+    @property
+    def resource_elements(self) -> float:
+        """Resource elements per second carrying data over the whole carrier"""
+        return (
+            self.prbs * SUBCARRIERS_PER_PRB * self.symbol_rate * (1 - self.overhead)
+        )
+
+    def peak_rate(self, sinr) -> np.ndarray:
+        """Rate in Mbps a single UE gets with the whole carrier at each SINR"""
+        return (
+            self.layers
+            * spectral_efficiency(sinr, self.table)
+            * self.resource_elements
+            / 1e6
+        )
+
+    def throughput(self, sinr, serving) -> np.ndarray:
+        """
+        Rate in Mbps of each UE once the PRBs of its serving cell are shared.
+
+        `serving` is any integer label of the serving cell of each UE (negative
+        when out of coverage, the UE then gets nothing). The cell's resources
+        are split evenly between the UEs it serves, as a round robin scheduler
+        would on average.
+        """
+        serving = np.asarray(serving, dtype=np.int64)
+        covered = serving >= 0
+        shares = np.zeros(len(serving))
+        if covered.any():
+            _, inverse, counts = np.unique(
+                serving[covered], return_inverse=True, return_counts=True
+            )
+            shares[covered] = 1 / counts[inverse]
+        return self.peak_rate(sinr) * shares
+
+
+nr_carrier = NRCarrier()
@@ -0,0 +1,182 @@
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import asc
+from sqlalchemy.orm import Session
+
+from app.models.path import Points
+from app.tools.distance import haversine
+
+# A UE further than this from its path (in metres) is not considered on it
+LOCATE_TOLERANCE = 1.0
+
+_revisions = itertools.count()
+
+
+class PathGeometry:
+    """
+    The points of a path held as contiguous float64 latitude/longitude arrays.
+
+    `cumulative` holds the distance in metres along the polyline from the first
+    point to each point, so positions can be addressed in metres and interpolated
+    between the points. UEs loop over the path: past `length` they start again
+    from the first point.
+
+    A geometry is immutable once built and is shared by every UE on the path.
+    Its `revision` tells apart the geometries built for the same path before
+    and after its points changed.
+    """
+
+    def __init__(self, path_id: int, latitude: np.ndarray, longitude: np.ndarray):
+        self.path_id = path_id
+        self.revision = next(_revisions)
+        self.latitude = np.ascontiguousarray(latitude, dtype=np.float64)
+        self.longitude = np.ascontiguousarray(longitude, dtype=np.float64)
+        segments = haversine(
+            self.latitude[:-1],
+            self.longitude[:-1],
+            self.latitude[1:],
+            self.longitude[1:],
+        )
+        self.cumulative = np.concatenate(([0.0], np.cumsum(segments)))[: len(self)]
+        for array in (self.latitude, self.longitude, self.cumulative):
+            array.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.latitude)
+
+    @property
+    def length(self) -> float:
+        """Length of the path in metres"""
+        return float(self.cumulative[-1]) if len(self) else 0.0
+
+    def point(self, index: int) -> Tuple[float, float]:
+        return float(self.latitude[index]), float(self.longitude[index])
+
+    def interpolate(self, distance):
+        """
+        Coordinates at `distance` metres along the (looped) path.
+
+        Accepts a scalar or an array of distances.
+        """
+        if self.length > 0:
+            distance = np.mod(distance, self.length)
+
+        latitude, longitude = self._along(distance)
+        if np.ndim(latitude) == 0:
+            return float(latitude), float(longitude)
+        return latitude, longitude
+
+    def locate(
+        self, latitude: Optional[float], longitude: Optional[float]
+    ) -> Optional[float]:
+        """Distance along the path of these coordinates, None if they are not on it"""
+        if latitude is None or longitude is None or not len(self):
+            return None
+
+        if len(self) == 1:
+            distances = np.zeros(1)
+        else:
+            # Project onto every segment in a local equirectangular plane
+            scale = np.cos(np.radians(latitude))
+            x0 = self.longitude[:-1] * scale
+            y0 = self.latitude[:-1]
+            dx = self.longitude[1:] * scale - x0
+            dy = self.latitude[1:] - y0
+            norm = dx**2 + dy**2
+            fraction = np.divide(
+                (longitude * scale - x0) * dx + (latitude - y0) * dy,
+                norm,
+                out=np.zeros_like(norm),
+                where=norm > 0,
+            ).clip(0, 1)
+            distances = self.cumulative[:-1] + fraction * np.diff(self.cumulative)
+
+        offsets = haversine(latitude, longitude, *self._along(distances))
+        nearest = int(np.argmin(offsets))
+        if offsets[nearest] > LOCATE_TOLERANCE:
+            return None
+        return float(distances[nearest])
+
+    def _along(self, distance):
+        """Linear interpolation between the points, `distance` within [0, length]"""
+        if len(self) == 1:
+            index = np.zeros_like(distance, dtype=np.int64)
+            return self.latitude[index], self.longitude[index]
+
+        segment = np.clip(
+            np.searchsorted(self.cumulative, distance, side="right") - 1,
+            0,
+            len(self) - 2,
+        )
+        start = self.cumulative[segment]
+        span = self.cumulative[segment + 1] - start
+        fraction = np.divide(
+            np.subtract(distance, start),
+            span,
+            out=np.zeros_like(span),
+            where=span > 0,
+        )
+
+        latitude = self.latitude[segment] + fraction * (
+            self.latitude[segment + 1] - self.latitude[segment]
+        )
+        longitude = self.longitude[segment] + fraction * (
+            self.longitude[segment + 1] - self.longitude[segment]
+        )
+        return latitude, longitude
+
+    def to_list(self) -> List[dict]:
+        return [
+            {"latitude": latitude, "longitude": longitude}
+            for latitude, longitude in zip(
+                self.latitude.tolist(), self.longitude.tolist()
+            )
+        ]
+
+
+class PathCache:
+    """
+    Builds each path geometry once and shares it until the path changes.
+
+    Entries are invalidated by the path/points CRUD operations; the holders of
+    a geometry check it is still current and get the path again if not.
+    """
+
+    def __init__(self) -> None:
+        self._paths: Dict[int, PathGeometry] = {}
+
+    def get(self, db: Session, path_id: int) -> Optional[PathGeometry]:
+        geometry = self._paths.get(path_id)
+        if geometry is None:
+            geometry = self._load(db, path_id)
+            if geometry is not None:
+                self._paths[path_id] = geometry
+        return geometry
+
+    def is_current(self, geometry: PathGeometry) -> bool:
+        return self._paths.get(geometry.path_id) is geometry
+
+    def invalidate(self, path_id: int) -> None:
+        self._paths.pop(path_id, None)
+
+    def clear(self) -> None:
+        self._paths.clear()
+
+    def _load(self, db: Session, path_id: int) -> Optional[PathGeometry]:
+        # Only the coordinates are selected, no ORM objects are materialized
+        rows = (
+            db.query(Points.latitude, Points.longitude)
+            .filter(Points.path_id == path_id)
+            .order_by(asc(Points.id))
+            .all()
+        )
+        if not rows:
+            return None
+
+        coordinates = np.array(rows, dtype=np.float64)
+        return PathGeometry(path_id, coordinates[:, 0], coordinates[:, 1])
+
+
+path_cache = PathCache()
@@ -0,0 +1,268 @@
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+# Speed of light in m/s
+SPEED_OF_LIGHT = 3e8
+
+# Distances are clamped to this many metres, the legacy model diverges at the cell site
+MIN_DISTANCE = 1.0
+
+# Per-cell constants of a model, one array entry per cell
+Constants = Dict[str, np.ndarray]
+
+
+def legacy_path_loss(distances, fc=2.6475) -> np.ndarray:
+    """Path loss in dB of the original emulator model for distances in metres"""
+    distances = np.maximum(distances, MIN_DISTANCE)
+    return 28 + 22 * np.log(distances) + 20 * np.log(fc)
+
+
+class PropagationModel:
+    """
+    A path loss model evaluated on whole UEs x cells distance matrices.
+
+    `constants` precomputes everything that only depends on the cells (carrier
+    frequency in GHz and antenna height in metres) once per topology, and
+    `path_loss` broadcasts them over the cell axis, the last one, of a matrix of
+    2D distances in metres.
+    """
+
+    name: str = ""
+
+    def constants(self, frequency: np.ndarray, height: np.ndarray) -> Constants:
+        return {"frequency": np.asarray(frequency, dtype=np.float64)}
+
+    def path_loss(self, distances: np.ndarray, constants: Constants) -> np.ndarray:
+        raise NotImplementedError
+
+
+class LegacyModel(PropagationModel):
+    """The emulator's original model, it ignores the antenna heights"""
+
+    name = "legacy"
+
+    def path_loss(self, distances: np.ndarray, constants: Constants) -> np.ndarray:
+        return legacy_path_loss(distances, constants["frequency"])
+
+
+class TR38901Model(PropagationModel):
+    """
+    Common part of the 3GPP TR 38.901 (table 7.4.1-1) models.
+
+    Subclasses give the LOS and NLOS losses and the LOS probability. The loss
+    returned is their average weighted by the LOS probability, so that it stays
+    deterministic and continuous along a path. 2D distances are clamped to the
+    10 m the models are defined from.
+    """
+
+    min_distance = 10.0
+
+    def __init__(self, ue_height: float = settings.UE_ANTENNA_HEIGHT) -> None:
+        self.ue_height = ue_height
+
+    def constants(self, frequency: np.ndarray, height: np.ndarray) -> Constants:
+        frequency = np.asarray(frequency, dtype=np.float64)
+        height = np.asarray(height, dtype=np.float64)
+        return {
+            "frequency": frequency,
+            "height": height,
+            "log_frequency": np.log10(frequency),
+            "height_difference": (height - self.ue_height) ** 2,
+        }
+
+    def path_loss(self, distances: np.ndarray, constants: Constants) -> np.ndarray:
+        distances_2d = np.maximum(distances, self.min_distance)
+        distances_3d = np.sqrt(distances_2d ** 2 + constants["height_difference"])
+
+        los = self.los(distances_2d, distances_3d, constants)
+        nlos = np.maximum(los, self.nlos(distances_3d, constants))
+        probability = self.los_probability(distances_2d)
+        return probability * los + (1 - probability) * nlos
+
+    def effective_breakpoint(self, constants: Constants) -> np.ndarray:
+        """Breakpoint distance of the urban models, 1 m above ground is the reference"""
+        return (
+            4 * (constants["height"] - 1) * (self.ue_height - 1)
+            * constants["frequency"] * 1e9 / SPEED_OF_LIGHT
+        )
+
+    def los(self, distances_2d, distances_3d, constants: Constants) -> np.ndarray:
+        raise NotImplementedError
+
+    def nlos(self, distances_3d, constants: Constants) -> np.ndarray:
+        raise NotImplementedError
+
+    def los_probability(self, distances_2d) -> np.ndarray:
+        raise NotImplementedError
+
+
+class UrbanMacroModel(TR38901Model):
+    """UMa, macro cells above the rooftops"""
+
+    name = "UMa"
+
+    def constants(self, frequency: np.ndarray, height: np.ndarray) -> Constants:
+        constants = super().constants(frequency, height)
+        breakpoint = constants["breakpoint"] = self.effective_breakpoint(constants)
+        constants["breakpoint_loss"] = 9 * np.log10(
+            breakpoint ** 2 + constants["height_difference"]
+        )
+        return constants
+
+    def los(self, distances_2d, distances_3d, constants: Constants) -> np.ndarray:
+        log_distance = np.log10(distances_3d)
+        frequency_loss = 20 * constants["log_frequency"]
+        near = 28.0 + 22 * log_distance + frequency_loss
+        far = 28.0 + 40 * log_distance + frequency_loss - constants["breakpoint_loss"]
+        return np.where(distances_2d <= constants["breakpoint"], near, far)
+
+    def nlos(self, distances_3d, constants: Constants) -> np.ndarray:
+        return (
+            13.54
+            + 39.08 * np.log10(distances_3d)
+            + 20 * constants["log_frequency"]
+            - 0.6 * (self.ue_height - 1.5)
+        )
+
+    def los_probability(self, distances_2d) -> np.ndarray:
+        height_factor = (
+            0.0 if self.ue_height <= 13 else ((self.ue_height - 13) / 10) ** 1.5
+        )
+        probability = (
+            18 / distances_2d + np.exp(-distances_2d / 63) * (1 - 18 / distances_2d)
+        ) * (
+            1
+            + height_factor * 5 / 4 * (distances_2d / 100) ** 3
+            * np.exp(-distances_2d / 150)
+        )
+        return np.where(distances_2d <= 18, 1.0, probability)
+
+
+class UrbanMicroModel(TR38901Model):
+    """UMi street canyon, small cells below the rooftops"""
+
+    name = "UMi"
+
+    def constants(self, frequency: np.ndarray, height: np.ndarray) -> Constants:
+        constants = super().constants(frequency, height)
+        breakpoint = constants["breakpoint"] = self.effective_breakpoint(constants)
+        constants["breakpoint_loss"] = 9.5 * np.log10(
+            breakpoint ** 2 + constants["height_difference"]
+        )
+        return constants
+
+    def los(self, distances_2d, distances_3d, constants: Constants) -> np.ndarray:
+        log_distance = np.log10(distances_3d)
+        frequency_loss = 20 * constants["log_frequency"]
+        near = 32.4 + 21 * log_distance + frequency_loss
+        far = 32.4 + 40 * log_distance + frequency_loss - constants["breakpoint_loss"]
+        return np.where(distances_2d <= constants["breakpoint"], near, far)
+
+    def nlos(self, distances_3d, constants: Constants) -> np.ndarray:
+        return (
+            22.4
+            + 35.3 * np.log10(distances_3d)
+            + 21.3 * constants["log_frequency"]
+            - 0.3 * (self.ue_height - 1.5)
+        )
+
+    def los_probability(self, distances_2d) -> np.ndarray:
+        probability = 18 / distances_2d + np.exp(-distances_2d / 36) * (
+            1 - 18 / distances_2d
+        )
+        return np.where(distances_2d <= 18, 1.0, probability)
+
+
+class RuralMacroModel(TR38901Model):
+    """RMa, with the default average building height and street width"""
+
+    name = "RMa"
+
+    def __init__(
+        self,
+        ue_height: float = settings.UE_ANTENNA_HEIGHT,
+        building_height: float = 5.0,
+        street_width: float = 20.0,
+    ) -> None:
+        super().__init__(ue_height)
+        self.building_height = building_height
+        self.street_width = street_width
+
+    def constants(self, frequency: np.ndarray, height: np.ndarray) -> Constants:
+        constants = super().constants(frequency, height)
+        constants["breakpoint"] = (
+            2 * math.pi * constants["height"] * self.ue_height
+            * constants["frequency"] * 1e9 / SPEED_OF_LIGHT
+        )
+        constants["breakpoint_loss"] = self._near(constants["breakpoint"], constants)
+
+        # Everything of the NLOS loss but the distance term
+        log_height = np.log10(constants["height"])
+        h = self.building_height
+        constants["nlos_offset"] = (
+            161.04
+            - 7.1 * math.log10(self.street_width)
+            + 7.5 * math.log10(h)
+            - (24.37 - 3.7 * (h / constants["height"]) ** 2) * log_height
+            + 20 * constants["log_frequency"]
+            - (3.2 * math.log10(11.75 * self.ue_height) ** 2 - 4.97)
+        )
+        constants["nlos_slope"] = 43.42 - 3.1 * log_height
+        return constants
+
+    def _near(self, distances_3d, constants: Constants) -> np.ndarray:
+        h = self.building_height
+        return (
+            20 * np.log10(40 * math.pi * distances_3d * constants["frequency"] / 3)
+            + min(0.03 * h ** 1.72, 10) * np.log10(distances_3d)
+            - min(0.044 * h ** 1.72, 14.77)
+            + 0.002 * math.log10(h) * distances_3d
+        )
+
+    def los(self, distances_2d, distances_3d, constants: Constants) -> np.ndarray:
+        near = self._near(distances_3d, constants)
+        far = constants["breakpoint_loss"] + 40 * np.log10(
+            distances_3d / constants["breakpoint"]
+        )
+        return np.where(distances_2d <= constants["breakpoint"], near, far)
+
+    def nlos(self, distances_3d, constants: Constants) -> np.ndarray:
+        return constants["nlos_offset"] + constants["nlos_slope"] * (
+            np.log10(distances_3d) - 3
+        )
+
+    def los_probability(self, distances_2d) -> np.ndarray:
+        return np.where(
+            distances_2d <= 10, 1.0, np.exp(-(distances_2d - 10) / 1000)
+        )
+
+
+PROPAGATION_MODELS: Dict[str, PropagationModel] = {}
+
+
+def register_model(model: PropagationModel) -> PropagationModel:
+    PROPAGATION_MODELS[model.name] = model
+    return model
+
+
+register_model(LegacyModel())
+register_model(UrbanMacroModel())
+register_model(UrbanMicroModel())
+register_model(RuralMacroModel())
+
+
+def model_names() -> List[str]:
+    return list(PROPAGATION_MODELS)
+
+
+def propagation_model(name: Optional[str] = None) -> PropagationModel:
+    """The registered model called `name`, the configured default if None"""
+    name = name or settings.PROPAGATION_MODEL
+    try:
+        return PROPAGATION_MODELS[name]
+    except KeyError:
+        raise ValueError(f"Unknown propagation model {name!r}") from None
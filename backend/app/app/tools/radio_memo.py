@@ -0,0 +1,158 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.tools.path_cache import PathGeometry
+from app.tools.rsrp_calculation import radio_matrices
+from app.tools.topology import TopologySnapshot
+
+# (owner id, path geometry revision, point index, topology version)
+MemoKey = Tuple[int, int, int, int]
+
+
+class RadioPoint:
+    """Distances in metres and RSRPs in dBm from one path point to every cell"""
+
+    __slots__ = ("best_server", "distances", "rsrp")
+
+    def __init__(self, distances: np.ndarray, rsrp: np.ndarray) -> None:
+        self.distances = distances
+        self.rsrp = rsrp
+        self.best_server = int(np.argmax(rsrp)) if len(rsrp) else -1
+
+    @property
+    def nbytes(self) -> int:
+        return self.distances.nbytes + self.rsrp.nbytes
+
+
+class RadioMemo:
+    """
+    Size bounded LRU memo of the radio conditions at the points of the paths.
+
+    Positions along a path are snapped to points every `resolution` metres, so
+    UEs looping over a path, or sharing it, keep hitting the same entries. An
+    entry is only valid for the topology version in its key; the entries of
+    older versions are never hit again and age out. The least recently used
+    entries are evicted once the vectors held take more than `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int, resolution: float) -> None:
+        self.max_bytes = max_bytes
+        self.resolution = resolution
+        self._entries: "OrderedDict[MemoKey, RadioPoint]" = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def index(self, path: PathGeometry, distance: float) -> int:
+        if path.length > 0:
+            distance %= path.length
+        return int(round(distance / self.resolution))
+
+    def lookup(
+        self,
+        snapshot: TopologySnapshot,
+        paths: Sequence[PathGeometry],
+        distances: Sequence[float],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        UEs x cells distance and RSRP matrices of UEs at `distances` metres along
+        `paths`, measured against the snapshot's cells. The missing points are
+        computed together in one pass.
+        """
+        keys = [
+            (
+                snapshot.owner_id,
+                path.revision,
+                self.index(path, distance),
+                snapshot.version,
+            )
+            for path, distance in zip(paths, distances)
+        ]
+
+        points: List[Optional[RadioPoint]] = [None] * len(keys)
+        missing: Dict[MemoKey, List[int]] = {}
+        for row, key in enumerate(keys):
+            point = self._entries.get(key)
+            if point is not None:
+                self._entries.move_to_end(key)
+                points[row] = point
+                self.hits += 1
+            elif key in missing:
+                # Computed once for all the UEs at this point
+                missing[key].append(row)
+                self.hits += 1
+            else:
+                missing[key] = [row]
+                self.misses += 1
+
+        if missing:
+            latitudes, longitudes = [], []
+            for (_, _, index, _), rows in missing.items():
+                latitude, longitude = paths[rows[0]].interpolate(
+                    index * self.resolution
+                )
+                latitudes.append(latitude)
+                longitudes.append(longitude)
+
+            new_points = []
+            for _, block_distances, _, block_rsrp in radio_matrices(
+                latitudes,
+                longitudes,
+                snapshot.table,
+                path_loss=snapshot.path_loss,
+                link_gain=snapshot.link_gain,
+            ):
+                # Copies, so an entry does not keep its whole block alive
+                new_points.extend(
+                    RadioPoint(distance_row.copy(), rsrp_row.copy())
+                    for distance_row, rsrp_row in zip(block_distances, block_rsrp)
+                )
+
+            for (key, rows), point in zip(missing.items(), new_points):
+                for row in rows:
+                    points[row] = point
+                self._put(key, point)
+
+        count = len(snapshot)
+        if not points:
+            return np.empty((0, count)), np.empty((0, count))
+        return (
+            np.stack([point.distances for point in points]),
+            np.stack([point.rsrp for point in points]),
+        )
+
+    def _put(self, key: MemoKey, point: RadioPoint) -> None:
+        self._entries[key] = point
+        self.nbytes += point.nbytes
+        while self.nbytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "resolution": self.resolution,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+
+radio_memo = RadioMemo(settings.RADIO_MEMO_MAX_BYTES, settings.RADIO_MEMO_RESOLUTION)
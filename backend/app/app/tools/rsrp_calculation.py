@@ -1,7 +1,23 @@
-import math
-from typing import List
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
 from app.models.Cell import Cell
-from app.tools.distance import distance
+from app.tools.distance import CellTable, distance, distance_matrix
+from app.tools.propagation import legacy_path_loss
+
+PathLoss = Callable[[np.ndarray], np.ndarray]
+
+# Gain in dB (antenna gains minus clutter losses) of the cells (columns) towards
+# UEs (rows) at these latitudes, longitudes and distances
+LinkGain = Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]
+
+# Transmit power in dBm of the cells
+TX_POWER = 30
+
+# Rows of UEs per matrix block, bounds the memory of UEs x cells matrices
+BLOCK_SIZE = 256
 
 
 def cartesian_from_haversine(lat, lng, lat0, lng0):
@@ -16,27 +32,182 @@ def cartesian_from_haversine(lat, lng, lat0, lng0):
     return x, y
 
 
-def check_path_loss(ue_lat: float, ue_long: float, cells: List[Cell]):
-    losses_by_cell = {}
-    for cell in cells:
-        loss = calc_path_loss(ue_lat, ue_long, cell.latitude, cell.longitude)
-        losses_by_cell[cell.id] = loss
-    return losses_by_cell
+def path_loss_matrix(distances: np.ndarray, fc=2.6475) -> np.ndarray:
+    """Path loss in dB for an array of distances in metres"""
+    return legacy_path_loss(distances, fc)
+
+
+def check_path_loss(
+    ue_lat: float,
+    ue_long: float,
+    cells: List[Cell],
+    path_loss: PathLoss = path_loss_matrix,
+):
+    losses = path_loss(distance_matrix(ue_lat, ue_long, CellTable(cells)))[0]
+    return {cell.id: loss for cell, loss in zip(cells, losses.tolist())}
 
 
 def calc_path_loss(
     ue_lat: float, ue_long: float, cell_lat: float, cell_long: float, fc=2.6475
 ):
     distance_3d = distance(ue_lat, ue_long, cell_lat, cell_long)
-    path_loss = 28 + 22 * math.log(distance_3d) + 20 * math.log(fc)
-    return path_loss
+    return float(path_loss_matrix(distance_3d, fc))
+
+
+def check_rsrp(
+    ue_lat: float,
+    ue_long: float,
+    cells: List[Cell],
+    power=TX_POWER,
+    path_loss: PathLoss = path_loss_matrix,
+    link_gain: Optional[LinkGain] = None,
+):
+    distances = distance_matrix(ue_lat, ue_long, CellTable(cells))
+    rsrps = power - path_loss(distances)
+    if link_gain is not None:
+        rsrps += link_gain(ue_lat, ue_long, distances)
+    rsrps = rsrps[0]
+    return {f"{cell.id}": rsrp for cell, rsrp in zip(cells, rsrps.tolist())}
+
+
+def radio_matrices(
+    latitudes,
+    longitudes,
+    table: CellTable,
+    power: float = TX_POWER,
+    path_loss: PathLoss = path_loss_matrix,
+    link_gain: Optional[LinkGain] = None,
+) -> Iterator[Tuple[slice, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Distances, path losses and RSRPs of many UEs against the cells of `table`,
+    yielded as (rows, distances, losses, rsrps) in blocks of `BLOCK_SIZE` UEs.
+    The RSRPs include the link gains when `link_gain` is given.
+    """
+    latitudes = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+    longitudes = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+
+    for start in range(0, len(latitudes), BLOCK_SIZE):
+        block = slice(start, min(start + BLOCK_SIZE, len(latitudes)))
+        distances = distance_matrix(latitudes[block], longitudes[block], table)
+        losses = path_loss(distances)
+        rsrps = power - losses
+        if link_gain is not None:
+            rsrps += link_gain(latitudes[block], longitudes[block], distances)
+        yield block, distances, losses, rsrps
+
+
+class RadioMeasurements:
+    """
+    Per-UE radio conditions computed in one pass over a UEs x cells matrix.
+
+    `best_server` is the index in the cell table of the strongest cell, `rsrp`
+    the RSRP in dBm received from the serving cell (the best server unless the
+    serving cells were given) and `sinr` its SINR in dB against every other cell
+    plus noise. UEs without a serving cell get NaN RSRP and SINR.
+    """
+
+    def __init__(
+        self,
+        best_server: np.ndarray,
+        rsrp: np.ndarray,
+        sinr: np.ndarray,
+        matrix: Optional[np.ndarray] = None,
+    ) -> None:
+        self.best_server = best_server
+        self.rsrp = rsrp
+        self.sinr = sinr
+        self.matrix = matrix
+
+
+def measure(
+    latitudes,
+    longitudes,
+    table: CellTable,
+    serving: Optional[np.ndarray] = None,
+    power: float = TX_POWER,
+    noise: float = settings.RADIO_NOISE_POWER,
+    return_matrix: bool = False,
+    path_loss: PathLoss = path_loss_matrix,
+    link_gain: Optional[LinkGain] = None,
+) -> RadioMeasurements:
+    """
+    RSRP, best server and SINR of many UEs against the cells of `table`.
+
+    `serving` optionally gives the index in the table of each UE's serving cell
+    (-1 when out of coverage). With `return_matrix` the full UEs x cells RSRP
+    matrix is kept in the result. `path_loss` maps blocks of the UEs x cells
+    distance matrix to losses, e.g. a topology snapshot's propagation model,
+    and `link_gain` adds the gains of sectorized cells and the clutter losses.
+    """
+    latitudes = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+    longitudes = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+    count = len(latitudes)
+
+    best_server = np.full(count, -1, dtype=np.int64)
+    rsrp = np.full(count, np.nan)
+    sinr = np.full(count, np.nan)
+    matrix = np.empty((count, len(table))) if return_matrix else None
+    if not len(table):
+        return RadioMeasurements(best_server, rsrp, sinr, matrix)
+
+    noise_mw = 10 ** (noise / 10)
+
+    for start in range(0, count, BLOCK_SIZE):
+        block = slice(start, start + BLOCK_SIZE)
+        distances = distance_matrix(latitudes[block], longitudes[block], table)
+        block_rsrp = power - path_loss(distances)
+        if link_gain is not None:
+            block_rsrp += link_gain(latitudes[block], longitudes[block], distances)
+        if matrix is not None:
+            matrix[block] = block_rsrp
+
+        block_serving = None if serving is None else np.asarray(serving)[block]
+        best_server[block], rsrp[block], sinr[block] = _measure_block(
+            block_rsrp, block_serving, noise_mw
+        )
+
+    return RadioMeasurements(best_server, rsrp, sinr, matrix)
+
+
+def measure_rsrp(
+    matrix: np.ndarray,
+    serving: Optional[np.ndarray] = None,
+    noise: float = settings.RADIO_NOISE_POWER,
+) -> RadioMeasurements:
+    """Like `measure`, from an already computed UEs x cells RSRP matrix"""
+    count = len(matrix)
+    best_server = np.full(count, -1, dtype=np.int64)
+    rsrp = np.full(count, np.nan)
+    sinr = np.full(count, np.nan)
+    if not count or not matrix.shape[1]:
+        return RadioMeasurements(best_server, rsrp, sinr)
+
+    noise_mw = 10 ** (noise / 10)
+    for start in range(0, count, BLOCK_SIZE):
+        block = slice(start, start + BLOCK_SIZE)
+        block_serving = None if serving is None else np.asarray(serving)[block]
+        best_server[block], rsrp[block], sinr[block] = _measure_block(
+            matrix[block], block_serving, noise_mw
+        )
+
+    return RadioMeasurements(best_server, rsrp, sinr)
+
 
+def _measure_block(
+    block_rsrp: np.ndarray, serving: Optional[np.ndarray], noise_mw: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Best server, serving RSRP and SINR of a block of RSRP matrix rows"""
+    rows = np.arange(len(block_rsrp))
+    best = np.argmax(block_rsrp, axis=1)
+    signal = best if serving is None else serving
+    covered = signal >= 0
 
-def check_rsrp(ue_lat: float, ue_long: float, cells: List[Cell], power=30):
-    rsrps_by_cell = {}
-    losses = check_path_loss(ue_lat, ue_long, cells)
-    for key in losses:
-        rsrp = power - losses[key]
-        rsrps_by_cell[f"{key}"] = rsrp
-    return rsrps_by_cell
+    received_mw = 10 ** (block_rsrp / 10)
+    signal_mw = received_mw[rows, signal]
+    interference_mw = received_mw.sum(axis=1) - signal_mw
 
+    rsrp = np.where(covered, block_rsrp[rows, signal], np.nan)
+    sinr = np.where(
+        covered, 10 * np.log10(signal_mw / (interference_mw + noise_mw)), np.nan
+    )
+    return best, rsrp, sinr
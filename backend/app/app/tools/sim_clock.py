@@ -0,0 +1,127 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from app.core.config import settings
+
+TickListener = Callable[[], Awaitable[None]]
+
+
+class SimulationClock:
+    """
+    Simulated time shared by the movement engine and the monitoring timers.
+
+    Time advances in ticks of `tick_interval` simulated seconds. In real-time mode a
+    tick is scheduled every `tick_interval / speed` wall seconds, so a speed of 100
+    replays 100 simulated seconds per wall second. In step mode the clock is frozen
+    and only moves when `advance` is called, which makes runs fully deterministic.
+    """
+
+    def __init__(self, tick_interval: float = 1.0, speed: float = 1.0) -> None:
+        self.tick_interval = tick_interval
+        self.speed = speed
+        self.ticks = 0
+        self.epoch = datetime.now(timezone.utc)
+        self._listeners: List[TickListener] = []
+        self._sleepers: List[Tuple[float, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._step_mode = False
+        # Created on the running loop, see `run`
+        self._resume: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def time(self) -> float:
+        """Simulated seconds elapsed since the clock started"""
+        return self.ticks * self.tick_interval
+
+    @property
+    def step_mode(self) -> bool:
+        return self._step_mode
+
+    def now(self, tz: Optional[timezone] = None) -> datetime:
+        """Simulated wall clock time, naive (local) unless a timezone is given"""
+        now = self.epoch + timedelta(seconds=self.time)
+        return now.astimezone(tz) if tz else now.astimezone().replace(tzinfo=None)
+
+    def on_tick(self, listener: TickListener) -> None:
+        self._listeners.append(listener)
+
+    def set_speed(self, speed: float) -> None:
+        if speed <= 0:
+            raise ValueError("The simulation speed must be positive")
+        self.speed = speed
+
+    def set_step_mode(self, step_mode: bool) -> None:
+        self._step_mode = step_mode
+        if not step_mode and self._resume is not None:
+            self._resume.set()
+
+    async def sleep(self, seconds: float) -> None:
+        """Suspend the caller for `seconds` of simulated time"""
+        future = asyncio.get_event_loop().create_future()
+        heapq.heappush(
+            self._sleepers, (self.time + seconds, next(self._sequence), future)
+        )
+        await future
+
+    async def advance(self, ticks: int = 1) -> None:
+        """Run `ticks` ticks back to back, regardless of the speed factor"""
+        for _ in range(ticks):
+            await self._tick()
+
+    async def _tick(self) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        # Ticks triggered by `advance` and by the real-time loop must not interleave
+        async with self._lock:
+            self.ticks += 1
+
+            for listener in self._listeners:
+                try:
+                    await listener()
+                except Exception as ex:
+                    logging.exception("Simulation tick listener failed: %s", ex)
+
+            while self._sleepers and self._sleepers[0][0] <= self.time:
+                _, _, future = heapq.heappop(self._sleepers)
+                if not future.done():
+                    future.set_result(None)
+
+    # Scheduling
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def run(self) -> None:
+        loop = asyncio.get_event_loop()
+        self._resume = asyncio.Event()
+
+        while True:
+            if self.step_mode:
+                self._resume.clear()
+                await self._resume.wait()
+
+            next_tick = loop.time()
+
+            while not self.step_mode:
+                await self._tick()
+
+                # Schedule against a fixed timeline so ticks do not drift
+                next_tick += self.tick_interval / self.speed
+                await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+
+sim_clock = SimulationClock(
+    tick_interval=settings.SIMULATION_TICK_INTERVAL, speed=settings.SIMULATION_SPEED
+)
@@ -0,0 +1,214 @@
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.Cell import Cell
+from app.tools.distance import NO_SERVING_CELL, CellTable, serving_cells
+
+# Metres per degree of latitude (and of longitude at the equator)
+METRES_PER_DEGREE = 111320.0
+
+Bucket = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class CellRecord:
+    """
+    Immutable copy of a `Cell` row, with the same attributes.
+
+    The indexes and snapshots outlive the sessions the cells were read in, so
+    they hold these instead of ORM instances, which a commit in their session
+    would expire and which would then fail to load once it is closed.
+    """
+
+    id: int
+    cell_id: Optional[str]
+    name: Optional[str]
+    description: Optional[str]
+    latitude: float
+    longitude: float
+    radius: float
+    carrier_frequency: Optional[float]
+    antenna_height: Optional[float]
+    azimuth: Optional[float]
+    tilt: Optional[float]
+    beamwidth: Optional[float]
+    owner_id: Optional[int]
+    gNB_id: Optional[int]
+
+    @classmethod
+    def from_cell(cls, cell: Union[Cell, "CellRecord"]) -> "CellRecord":
+        if isinstance(cell, CellRecord):
+            return cell
+        return cls(
+            id=cell.id,
+            cell_id=cell.cell_id,
+            name=cell.name,
+            description=cell.description,
+            latitude=cell.latitude,
+            longitude=cell.longitude,
+            radius=cell.radius,
+            carrier_frequency=cell.carrier_frequency,
+            antenna_height=cell.antenna_height,
+            azimuth=cell.azimuth,
+            tilt=cell.tilt,
+            beamwidth=cell.beamwidth,
+            owner_id=cell.owner_id,
+            gNB_id=cell.gNB_id,
+        )
+
+
+class CellGrid:
+    """
+    Uniform grid of `size` × `size` metre buckets over the cells of one owner.
+
+    Rows are bands of latitude; within a row longitudes are scaled by the cosine
+    of the row's latitude so buckets stay roughly square. Each cell is listed in
+    every bucket its coverage disc (bounding box) overlaps, so the cells that may
+    serve a point are the ones of the point's bucket.
+    """
+
+    def __init__(self, size: float, cells: List[Cell] = ()) -> None:
+        self.size = size
+        self.cells: Dict[int, CellRecord] = {}
+        self._buckets: Dict[Bucket, Set[int]] = {}
+        self._cell_buckets: Dict[int, List[Bucket]] = {}
+        # Packed candidate tables per bucket, dropped when the bucket changes
+        self._tables: Dict[Bucket, CellTable] = {}
+
+        for cell in cells:
+            self.add(cell)
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    # Projection
+    def row(self, latitude):
+        return np.floor(np.asarray(latitude) * METRES_PER_DEGREE / self.size).astype(
+            np.int64
+        )
+
+    def column(self, row, longitude):
+        # Scale of the row's centre latitude
+        latitude = (np.asarray(row) + 0.5) * self.size / METRES_PER_DEGREE
+        scale = np.cos(np.radians(np.clip(latitude, -89.9, 89.9)))
+        return np.floor(
+            np.asarray(longitude) * METRES_PER_DEGREE * scale / self.size
+        ).astype(np.int64)
+
+    def bucket(self, latitude: float, longitude: float) -> Bucket:
+        row = int(self.row(latitude))
+        return row, int(self.column(row, longitude))
+
+    def _covered_buckets(self, cell: CellRecord) -> List[Bucket]:
+        radius = max(cell.radius or 0.0, 0.0)
+        lat_span = radius / METRES_PER_DEGREE
+        lat_max = min(abs(cell.latitude) + lat_span, 89.9)
+        lon_span = radius / (METRES_PER_DEGREE * math.cos(math.radians(lat_max)))
+
+        buckets = []
+        first_row = int(self.row(cell.latitude - lat_span))
+        last_row = int(self.row(cell.latitude + lat_span))
+        for row in range(first_row, last_row + 1):
+            first = int(self.column(row, cell.longitude - lon_span))
+            last = int(self.column(row, cell.longitude + lon_span))
+            buckets.extend((row, column) for column in range(first, last + 1))
+        return buckets
+
+    # Incremental maintenance
+    def add(self, cell: Union[Cell, CellRecord]) -> None:
+        cell = CellRecord.from_cell(cell)
+        if cell.id in self.cells:
+            self.remove(cell.id)
+
+        buckets = self._covered_buckets(cell)
+        self.cells[cell.id] = cell
+        self._cell_buckets[cell.id] = buckets
+        for bucket in buckets:
+            self._buckets.setdefault(bucket, set()).add(cell.id)
+            self._tables.pop(bucket, None)
+
+    def remove(self, cell_id: int) -> None:
+        self.cells.pop(cell_id, None)
+        for bucket in self._cell_buckets.pop(cell_id, []):
+            members = self._buckets.get(bucket)
+            if members is not None:
+                members.discard(cell_id)
+                if not members:
+                    del self._buckets[bucket]
+            self._tables.pop(bucket, None)
+
+    # Queries
+    def candidates(self, latitude: float, longitude: float) -> List[CellRecord]:
+        """The cells whose radius may cover the point"""
+        return self._table(self.bucket(latitude, longitude)).cells
+
+    def _table(self, bucket: Bucket) -> CellTable:
+        table = self._tables.get(bucket)
+        if table is None:
+            ids = sorted(self._buckets.get(bucket, ()))
+            table = self._tables[bucket] = CellTable([self.cells[i] for i in ids])
+        return table
+
+    def serving_cells(self, latitudes, longitudes) -> List[Optional[CellRecord]]:
+        """Serving cell of each point, only evaluating the cells of its bucket"""
+        latitudes = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+        longitudes = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+        rows = self.row(latitudes)
+        keys = np.stack((rows, self.column(rows, longitudes)), axis=1)
+
+        result: List[Optional[CellRecord]] = [None] * len(latitudes)
+        buckets, inverse = np.unique(keys, axis=0, return_inverse=True)
+        for group, (row, column) in enumerate(buckets.tolist()):
+            table = self._table((row, column))
+            if not len(table):
+                continue
+            members = np.flatnonzero(inverse.ravel() == group)
+            indices = serving_cells(latitudes[members], longitudes[members], table)
+            for member, index in zip(members.tolist(), indices.tolist()):
+                if index != NO_SERVING_CELL:
+                    result[member] = table.cells[index]
+        return result
+
+
+class CellIndex:
+    """
+    The cell grid of every owner, built from the DB on first use and then kept
+    up to date by the cell CRUD operations. The grids hold `CellRecord` copies,
+    never the ORM instances of the session they were loaded in.
+    """
+
+    def __init__(self, size: float) -> None:
+        self.size = size
+        self._grids: Dict[int, CellGrid] = {}
+
+    def get(self, db: Session, owner_id: int) -> CellGrid:
+        grid = self._grids.get(owner_id)
+        if grid is None:
+            cells = db.query(Cell).filter(Cell.owner_id == owner_id).all()
+            grid = self._grids[owner_id] = CellGrid(self.size, cells)
+        return grid
+
+    def add(self, cell: Cell) -> None:
+        # Grids that are not loaded yet will read the cell from the DB
+        grid = self._grids.get(cell.owner_id)
+        if grid is not None:
+            grid.add(cell)
+
+    def remove(self, cell: Cell) -> None:
+        grid = self._grids.get(cell.owner_id)
+        if grid is not None:
+            grid.remove(cell.id)
+
+    def invalidate(self, owner_id: int) -> None:
+        self._grids.pop(owner_id, None)
+
+    def clear(self) -> None:
+        self._grids.clear()
+
+
+cell_index = CellIndex(settings.CELL_INDEX_BUCKET_SIZE)
@@ -0,0 +1,192 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.db.session import client
+from app.schemas.monitoringevent import MonitoringType
+from app.tools.location_reporting import LocationReportFilter
+from app.tools.timer_scheduler import timer_scheduler
+
+COLLECTION = "MonitoringEvent"
+
+# Timers of the indexed subscriptions, keyed by document id: monitorExpireTime,
+# the next report of the periodic location reporting and the maximum detection
+# time of a loss of connectivity (see tools/monitoring_callbacks.py)
+EXPIRY_TIMER = "expiry"
+REPORT_TIMER = "report"
+DETECTION_TIMER = "detection"
+
+
+class SubscriptionRecord:
+    """
+    A MonitoringEvent subscription compiled for the callbacks: its monitoring
+    types and expiry time are resolved once instead of on every report, and
+    `location_filter` holds the state of its location reports.
+
+    `subscription` is the stored JSON document, shared with the callbacks so the
+    report counter they decrement stays in step with the index.
+    """
+
+    __slots__ = (
+        "doc_id",
+        "supi",
+        "owner_id",
+        "subscription",
+        "types",
+        "expire_time",
+        "location_filter",
+    )
+
+    def __init__(
+        self, doc_id: Any, supi: str, owner_id: int, subscription: Dict
+    ) -> None:
+        self.doc_id = doc_id
+        self.supi = supi
+        self.owner_id = owner_id
+        self.compile(subscription)
+
+    def compile(self, subscription: Dict) -> None:
+        self.subscription = subscription
+        self.types = (subscription["monitoringType"],) + tuple(
+            subscription.get("addnMonTypes") or ()
+        )
+        expire_time = subscription.get("monitorExpireTime")
+        if isinstance(expire_time, str):
+            expire_time = datetime.fromisoformat(expire_time)
+        self.expire_time: Optional[datetime] = expire_time
+        self.location_filter = LocationReportFilter(subscription)
+
+    @property
+    def periodic(self) -> bool:
+        """Whether its location reports are sent by the report timer"""
+        return (
+            MonitoringType.LOCATION_REPORTING in self.types
+            and bool(self.location_filter.period)
+        )
+
+    def schedule(self) -> None:
+        if self.expire_time is not None:
+            timer_scheduler.schedule(
+                EXPIRY_TIMER, self.doc_id, timer_scheduler.clock_time(self.expire_time)
+            )
+        else:
+            timer_scheduler.cancel(EXPIRY_TIMER, self.doc_id)
+
+        if self.periodic:
+            if not timer_scheduler.scheduled(REPORT_TIMER, self.doc_id):
+                timer_scheduler.schedule_in(
+                    REPORT_TIMER, self.doc_id, self.location_filter.period
+                )
+        else:
+            timer_scheduler.cancel(REPORT_TIMER, self.doc_id)
+
+    def unschedule(self) -> None:
+        for kind in (EXPIRY_TIMER, REPORT_TIMER, DETECTION_TIMER):
+            timer_scheduler.cancel(kind, self.doc_id)
+
+
+class SubscriptionIndex:
+    """
+    In-process index of the MonitoringEvent subscriptions by SUPI.
+
+    Loaded from Mongo once, on startup or first use, then kept current by the
+    endpoints that create, update and delete subscriptions, so the moving UEs
+    look their subscriptions up without a query per UE per tick. The expiry and
+    periodic report timers of the indexed subscriptions are kept scheduled.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._by_supi: Dict[str, Dict[Any, SubscriptionRecord]] = {}
+        self._by_id: Dict[Any, SubscriptionRecord] = {}
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def load(self, db_mongo=None) -> None:
+        db_mongo = db_mongo if db_mongo is not None else client.fastapi
+        documents = db_mongo[COLLECTION].find(
+            {}, {"supi": True, "owner_id": True, "subscription": True}
+        )
+        with self._lock:
+            for record in self._by_id.values():
+                record.unschedule()
+            self._by_supi.clear()
+            self._by_id.clear()
+            for doc in documents:
+                self._add(
+                    doc["_id"], doc["supi"], doc.get("owner_id"), doc["subscription"]
+                )
+            self.loaded = True
+        logging.info("%d monitoring subscriptions indexed", len(self._by_id))
+
+    def _ensure_loaded(self) -> None:
+        if not self.loaded:
+            self.load()
+
+    def _add(
+        self, doc_id, supi: str, owner_id: int, subscription: Dict
+    ) -> SubscriptionRecord:
+        record = SubscriptionRecord(doc_id, str(supi), owner_id, subscription)
+        self._by_id[doc_id] = record
+        self._by_supi.setdefault(record.supi, {})[doc_id] = record
+        record.schedule()
+        return record
+
+    def add(
+        self, doc_id, supi: str, owner_id: int, subscription: Dict
+    ) -> SubscriptionRecord:
+        self._ensure_loaded()
+        with self._lock:
+            self._remove(doc_id)
+            return self._add(doc_id, supi, owner_id, subscription)
+
+    def update(self, doc_id, subscription: Dict) -> None:
+        self._ensure_loaded()
+        with self._lock:
+            record = self._by_id.get(doc_id)
+            if record is not None:
+                record.unschedule()
+                record.compile(subscription)
+                record.schedule()
+
+    def _remove(self, doc_id) -> None:
+        record = self._by_id.pop(doc_id, None)
+        if record is None:
+            return
+        record.unschedule()
+        records = self._by_supi.get(record.supi)
+        if records is not None:
+            records.pop(doc_id, None)
+            if not records:
+                del self._by_supi[record.supi]
+
+    def remove(self, doc_id) -> None:
+        with self._lock:
+            self._remove(doc_id)
+
+    def get(self, doc_id) -> Optional[SubscriptionRecord]:
+        self._ensure_loaded()
+        return self._by_id.get(doc_id)
+
+    def for_supi(self, supi: str) -> List[SubscriptionRecord]:
+        """The subscriptions of the UE, empty without touching Mongo if it has none"""
+        self._ensure_loaded()
+        records = self._by_supi.get(str(supi))
+        if not records:
+            return []
+        with self._lock:
+            return list(records.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            for record in self._by_id.values():
+                record.unschedule()
+            self._by_supi.clear()
+            self._by_id.clear()
+            self.loaded = False
+
+
+subscription_index = SubscriptionIndex()
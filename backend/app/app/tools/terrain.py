@@ -0,0 +1,227 @@
+import logging
+import struct
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+# Header of the raster files: magic, rows, columns, latitude of the north edge,
+# longitude of the west edge, pixel height and width in degrees
+HEADER = struct.Struct("<8sIIdddd")
+MAGIC = b"NEFCLUT1"
+
+# Cell and path point coordinates are rounded to this many decimals (about 1 m)
+# in the keys of the profile cache
+KEY_DECIMALS = 5
+
+
+class ClutterRaster:
+    """
+    Obstacle (building, vegetation) heights in metres above the ground, read
+    through a memory map so only the pages sampled are loaded.
+
+    The file is a `HEADER` followed by rows x columns little-endian float32
+    values, row by row from the north edge. Points outside the raster have no
+    obstacle.
+    """
+
+    def __init__(self, filename: str) -> None:
+        with open(filename, "rb") as fp:
+            header = fp.read(HEADER.size)
+        magic, rows, columns, north, west, step_lat, step_lon = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a clutter raster")
+
+        self.north = north
+        self.west = west
+        self.step_latitude = step_lat
+        self.step_longitude = step_lon
+        self.heights = np.memmap(
+            filename, dtype="<f4", mode="r", offset=HEADER.size, shape=(rows, columns)
+        )
+
+    @staticmethod
+    def write(
+        filename: str,
+        north: float,
+        west: float,
+        step_latitude: float,
+        step_longitude: float,
+        heights: np.ndarray,
+    ) -> None:
+        rows, columns = heights.shape
+        with open(filename, "wb") as fp:
+            fp.write(
+                HEADER.pack(
+                    MAGIC, rows, columns, north, west, step_latitude, step_longitude
+                )
+            )
+            fp.write(np.ascontiguousarray(heights, dtype="<f4").tobytes())
+
+    def sample(self, latitudes, longitudes) -> np.ndarray:
+        rows = np.floor((self.north - np.asarray(latitudes)) / self.step_latitude)
+        columns = np.floor((np.asarray(longitudes) - self.west) / self.step_longitude)
+        inside = (
+            (rows >= 0) & (rows < self.heights.shape[0])
+            & (columns >= 0) & (columns < self.heights.shape[1])
+        )
+        rows = np.where(inside, rows, 0).astype(np.int64)
+        columns = np.where(inside, columns, 0).astype(np.int64)
+        return np.where(inside, self.heights[rows, columns], 0.0)
+
+
+def knife_edge_loss(v: np.ndarray) -> np.ndarray:
+    """Single knife edge diffraction loss in dB, ITU-R P.526 approximation"""
+    v = np.asarray(v, dtype=np.float64)
+    loss = 6.9 + 20 * np.log10(np.sqrt((v - 0.1) ** 2 + 1) + v - 0.1)
+    return np.where(v > -0.78, loss, 0.0)
+
+
+class ClutterModel:
+    """
+    Clutter loss between cells and UEs from the obstacles of a raster.
+
+    The raster is sampled at `samples` points of the straight line from the UE
+    to the cell and the most obstructing sample is treated as a knife edge. Only
+    the pairs closer than `max_distance` metres are profiled, beyond that the
+    cell is an interferer whose loss is dominated by the distance anyway.
+
+    Losses are cached per (cell, path point), so a UE coming back to a point
+    does not sample the raster again, and a change to one cell does not evict
+    the profiles of the others.
+    """
+
+    def __init__(
+        self,
+        raster: ClutterRaster,
+        samples: int = settings.CLUTTER_PROFILE_SAMPLES,
+        max_distance: float = settings.CLUTTER_MAX_DISTANCE,
+        cache_size: int = settings.CLUTTER_CACHE_SIZE,
+        ue_height: float = settings.UE_ANTENNA_HEIGHT,
+    ) -> None:
+        self.raster = raster
+        self.max_distance = max_distance
+        self.cache_size = cache_size
+        self.ue_height = ue_height
+        self.fractions = (np.arange(samples) + 1) / (samples + 1)
+        self._cache: "OrderedDict[Tuple, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def profile_loss(
+        self,
+        ue_latitude: np.ndarray,
+        ue_longitude: np.ndarray,
+        cell_latitude: np.ndarray,
+        cell_longitude: np.ndarray,
+        cell_height: np.ndarray,
+        frequency: np.ndarray,
+        distance: np.ndarray,
+    ) -> np.ndarray:
+        """Loss in dB of each UE-cell pair (1-d arrays), sampling the raster"""
+        t = self.fractions.reshape(1, -1)
+        column = (slice(None), None)
+        latitudes = ue_latitude[column] + t * (cell_latitude - ue_latitude)[column]
+        longitudes = ue_longitude[column] + t * (cell_longitude - ue_longitude)[column]
+        obstacles = self.raster.sample(latitudes, longitudes)
+
+        line = self.ue_height + t * (cell_height - self.ue_height)[column]
+        distance = np.maximum(distance, 1.0)[column]
+        d1, d2 = t * distance, (1 - t) * distance
+        wavelength = (0.299792458 / frequency)[column]
+        v = (obstacles - line) * np.sqrt(2 * distance / (wavelength * d1 * d2))
+        return knife_edge_loss(v.max(axis=1))
+
+    def loss(
+        self,
+        cell_latitude: np.ndarray,
+        cell_longitude: np.ndarray,
+        cell_height: np.ndarray,
+        frequency: np.ndarray,
+        latitudes,
+        longitudes,
+        distances: np.ndarray,
+        cache: bool = True,
+    ) -> np.ndarray:
+        """Clutter loss in dB towards each UE (rows) of each cell (columns)"""
+        latitudes = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+        longitudes = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+        losses = np.zeros(distances.shape)
+
+        ues, cells = np.nonzero(distances <= self.max_distance)
+        if not len(ues):
+            return losses
+        if not cache:
+            losses[ues, cells] = self.profile_loss(
+                latitudes[ues],
+                longitudes[ues],
+                cell_latitude[cells],
+                cell_longitude[cells],
+                cell_height[cells],
+                frequency[cells],
+                distances[ues, cells],
+            )
+            return losses
+
+        point_keys = list(
+            zip(
+                np.round(latitudes, KEY_DECIMALS).tolist(),
+                np.round(longitudes, KEY_DECIMALS).tolist(),
+            )
+        )
+        cell_keys = list(
+            zip(
+                np.round(cell_latitude, KEY_DECIMALS).tolist(),
+                np.round(cell_longitude, KEY_DECIMALS).tolist(),
+                cell_height.tolist(),
+                frequency.tolist(),
+            )
+        )
+
+        missing: Dict[Tuple, list] = {}
+        for ue, cell in zip(ues.tolist(), cells.tolist()):
+            key = (cell_keys[cell], point_keys[ue])
+            loss = self._cache.get(key)
+            if loss is None:
+                missing.setdefault(key, []).append((ue, cell))
+                continue
+            self._cache.move_to_end(key)
+            self.hits += 1
+            losses[ue, cell] = loss
+
+        if missing:
+            self.misses += len(missing)
+            pairs = np.array([rows[0] for rows in missing.values()])
+            ue, cell = pairs[:, 0], pairs[:, 1]
+            computed = self.profile_loss(
+                latitudes[ue],
+                longitudes[ue],
+                cell_latitude[cell],
+                cell_longitude[cell],
+                cell_height[cell],
+                frequency[cell],
+                distances[ue, cell],
+            )
+            for (key, rows), loss in zip(missing.items(), computed.tolist()):
+                for ue, cell in rows:
+                    losses[ue, cell] = loss
+                self._cache[key] = loss
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return losses
+
+
+def open_clutter_model(filename: Optional[str]) -> Optional[ClutterModel]:
+    if not filename:
+        return None
+    try:
+        return ClutterModel(ClutterRaster(filename))
+    except (OSError, ValueError) as ex:
+        logging.error("Clutter raster %s not loaded: %s", filename, ex)
+        return None
+
+
+clutter_model = open_clutter_model(settings.CLUTTER_RASTER_PATH)
@@ -0,0 +1,111 @@
+import heapq
+import itertools
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+
+from app.tools.sim_clock import SimulationClock, sim_clock
+
+# Timers of one kind fired on the same tick, as (key, payload) pairs
+TimerHandler = Callable[[List[Tuple[Hashable, Any]]], Awaitable[None]]
+
+
+class TimerScheduler:
+    """
+    Deadlines in simulated seconds, kept in a single heap and fired in batches
+    on the ticks of the simulation clock.
+
+    A timer is identified by its kind and key: scheduling the key again moves
+    the timer and cancelling it is a dict removal, the stale heap entries are
+    skipped when popped and dropped when they outnumber the live timers. The
+    timers of each kind due on a tick are passed together to the kind's handler.
+    """
+
+    def __init__(self, clock: SimulationClock) -> None:
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._heap: List[Tuple[float, int, str, Hashable]] = []
+        # (kind, key) -> (sequence of its heap entry, payload)
+        self._timers: Dict[Tuple[str, Hashable], Tuple[int, Any]] = {}
+        self._handlers: Dict[str, TimerHandler] = {}
+        self._sequence = itertools.count()
+        clock.on_tick(self.fire)
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def handler(self, kind: str, handler: TimerHandler) -> None:
+        self._handlers[kind] = handler
+
+    def clock_time(self, when: datetime) -> float:
+        """Simulated seconds at which the simulated wall clock reaches `when`"""
+        if when.tzinfo is None:
+            when = when.astimezone()
+        return (when - self.clock.epoch).total_seconds()
+
+    def schedule(
+        self, kind: str, key: Hashable, deadline: float, payload: Any = None
+    ) -> None:
+        with self._lock:
+            sequence = next(self._sequence)
+            self._timers[(kind, key)] = (sequence, payload)
+            heapq.heappush(self._heap, (deadline, sequence, kind, key))
+
+    def schedule_in(
+        self, kind: str, key: Hashable, seconds: float, payload: Any = None
+    ) -> None:
+        self.schedule(kind, key, self.clock.time + seconds, payload)
+
+    def cancel(self, kind: str, key: Hashable) -> bool:
+        with self._lock:
+            cancelled = self._timers.pop((kind, key), None) is not None
+            if len(self._heap) > 64 and len(self._heap) > 2 * len(self._timers):
+                self._compact()
+            return cancelled
+
+    def scheduled(self, kind: str, key: Hashable) -> bool:
+        return (kind, key) in self._timers
+
+    def _compact(self) -> None:
+        self._heap = [
+            entry
+            for entry in self._heap
+            if self._timers.get((entry[2], entry[3]), (None,))[0] == entry[1]
+        ]
+        heapq.heapify(self._heap)
+
+    def due(self) -> Dict[str, List[Tuple[Hashable, Any]]]:
+        """Pop the timers due by now, grouped by kind"""
+        now = self.clock.time
+        fired: Dict[str, List[Tuple[Hashable, Any]]] = defaultdict(list)
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, sequence, kind, key = heapq.heappop(self._heap)
+                timer = self._timers.get((kind, key))
+                # Cancelled or moved since it was pushed
+                if timer is None or timer[0] != sequence:
+                    continue
+                del self._timers[(kind, key)]
+                fired[kind].append((key, timer[1]))
+        return fired
+
+    async def fire(self) -> None:
+        for kind, timers in self.due().items():
+            handler = self._handlers.get(kind)
+            if handler is None:
+                logging.warning("No handler for %d %s timers", len(timers), kind)
+                continue
+            try:
+                await handler(timers)
+            except Exception as ex:
+                logging.exception("%s timers failed: %s", kind, ex)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._heap.clear()
+            self._timers.clear()
+
+
+timer_scheduler = TimerScheduler(sim_clock)
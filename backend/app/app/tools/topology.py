@@ -0,0 +1,247 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.Cell import Cell
+from app.models.gNB import gNB
+from app.models.user import User
+from app.tools.antenna import AntennaTables
+from app.tools.distance import CellTable
+from app.tools.propagation import propagation_model
+from app.tools.rsrp_calculation import LinkGain
+from app.tools.spatial_index import CellRecord, cell_index
+from app.tools.terrain import clutter_model
+
+
+class TopologyVersions:
+    """
+    Monotonic version of each owner's cell topology.
+
+    The version changes whenever one of the owner's cells or gNBs is created,
+    updated or deleted, so anything derived from the cells can be cached per version and
+    rebuilt lazily once it is stale.
+    """
+
+    def __init__(self) -> None:
+        self._counter = 0
+        self._floor = 0
+        self._versions: Dict[int, int] = {}
+
+    def version(self, owner_id: int) -> int:
+        return max(self._versions.get(owner_id, 0), self._floor)
+
+    def bump(self, owner_id: int) -> None:
+        self._counter += 1
+        self._versions[owner_id] = self._counter
+
+    def bump_all(self) -> None:
+        """Invalidate every owner's topology, e.g. after the tables were truncated"""
+        self._counter += 1
+        self._floor = self._counter
+
+
+topology_versions = TopologyVersions()
+
+
+@dataclass(frozen=True)
+class GnbRecord:
+    """Immutable copy of a `gNB` row, held by the snapshots like `CellRecord`"""
+
+    id: int
+    gNB_id: Optional[str]
+    name: Optional[str]
+    description: Optional[str]
+    location: Optional[str]
+    owner_id: Optional[int]
+
+    @classmethod
+    def from_gnb(cls, gnb: Union[gNB, "GnbRecord"]) -> "GnbRecord":
+        if isinstance(gnb, GnbRecord):
+            return gnb
+        return cls(
+            id=gnb.id,
+            gNB_id=gnb.gNB_id,
+            name=gnb.name,
+            description=gnb.description,
+            location=gnb.location,
+            owner_id=gnb.owner_id,
+        )
+
+
+class TopologySnapshot:
+    """
+    Immutable view of an owner's cells and gNBs at one topology version.
+
+    Cells and gNBs are copied to `CellRecord` and `GnbRecord` values, so the
+    snapshot does not depend on the session they were read in. They are sorted
+    by primary key and their attributes are packed into read-only arrays:
+    `table` holds the cells' coordinates and radii and `cell_gnb` the position
+    in `gnbs` of each cell's gNB (-1 when it has none).
+    The constants the owner's propagation model needs per cell are computed once
+    here, so `path_loss` only evaluates the distance dependent terms. When some
+    cells are sectorized, or a clutter raster is configured, `link_gain` adds
+    the antenna gains looked up in the pattern tables built here and subtracts
+    the clutter losses, otherwise it is None.
+    """
+
+    def __init__(
+        self,
+        owner_id: int,
+        version: int,
+        cells: List[Union[Cell, CellRecord]],
+        gnbs: List[Union[gNB, GnbRecord]],
+        model: Optional[str] = None,
+    ) -> None:
+        self.owner_id = owner_id
+        self.version = version
+        self.cells: Tuple[CellRecord, ...] = tuple(
+            sorted(map(CellRecord.from_cell, cells), key=lambda cell: cell.id)
+        )
+        self.gnbs: Tuple[GnbRecord, ...] = tuple(
+            sorted(map(GnbRecord.from_gnb, gnbs), key=lambda gnb: gnb.id)
+        )
+
+        self.table = CellTable(list(self.cells))
+        self.cell_ids = np.array([cell.id for cell in self.cells], dtype=np.int64)
+        self.gnb_ids = np.array([gnb.id for gnb in self.gnbs], dtype=np.int64)
+        gnb_positions = {gnb.id: i for i, gnb in enumerate(self.gnbs)}
+        self.cell_gnb = np.array(
+            [gnb_positions.get(cell.gNB_id, -1) for cell in self.cells],
+            dtype=np.int64,
+        )
+
+        self.carrier_frequency = np.array(
+            [
+                cell.carrier_frequency or settings.CELL_CARRIER_FREQUENCY
+                for cell in self.cells
+            ],
+            dtype=np.float64,
+        )
+        self.antenna_height = np.array(
+            [
+                cell.antenna_height or settings.CELL_ANTENNA_HEIGHT
+                for cell in self.cells
+            ],
+            dtype=np.float64,
+        )
+        self.model = propagation_model(model)
+        self.propagation = self.model.constants(
+            self.carrier_frequency, self.antenna_height
+        )
+
+        self.antenna = None
+        self.clutter = clutter_model
+        if any(cell.azimuth is not None for cell in self.cells):
+            self.antenna = AntennaTables(
+                self.table.latitude,
+                self.table.longitude,
+                self.antenna_height,
+                [
+                    cell.azimuth if cell.azimuth is not None else np.nan
+                    for cell in self.cells
+                ],
+                [
+                    cell.tilt if cell.tilt is not None else settings.CELL_ANTENNA_TILT
+                    for cell in self.cells
+                ],
+                [
+                    cell.beamwidth or settings.CELL_ANTENNA_BEAMWIDTH
+                    for cell in self.cells
+                ],
+            )
+        self.link_gain: Optional[LinkGain] = None
+        if self.antenna is not None or self.clutter is not None:
+            self.link_gain = self.gain
+
+        for array in (
+            self.table.latitude,
+            self.table.longitude,
+            self.table.radius,
+            self.cell_ids,
+            self.gnb_ids,
+            self.cell_gnb,
+            self.carrier_frequency,
+            self.antenna_height,
+            *self.propagation.values(),
+        ):
+            array.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def path_loss(self, distances: np.ndarray) -> np.ndarray:
+        """Path loss in dB of a UEs x cells matrix of distances in metres"""
+        return self.model.path_loss(distances, self.propagation)
+
+    def gain(
+        self, latitudes, longitudes, distances: np.ndarray, cache: bool = True
+    ) -> np.ndarray:
+        """
+        Antenna gains minus clutter losses in dB of a UEs x cells matrix. Without
+        `cache` the clutter profiles are neither looked up nor kept, e.g. for
+        grids of points that are never measured again.
+        """
+        if self.antenna is not None:
+            gain = self.antenna.gain(latitudes, longitudes, distances)
+        else:
+            gain = np.zeros(distances.shape)
+        if self.clutter is not None:
+            gain -= self.clutter.loss(
+                self.table.latitude,
+                self.table.longitude,
+                self.antenna_height,
+                self.carrier_frequency,
+                latitudes,
+                longitudes,
+                distances,
+                cache,
+            )
+        return gain
+
+    def cell_position(self, cell_id: Optional[int]) -> int:
+        """Position of the cell in `cells` and `table`, -1 if it is not there"""
+        if cell_id is None:
+            return -1
+        position = int(np.searchsorted(self.cell_ids, cell_id))
+        if position < len(self.cell_ids) and self.cell_ids[position] == cell_id:
+            return position
+        return -1
+
+
+class TopologySnapshots:
+    """
+    The latest snapshot of each owner's topology, rebuilt on first use after the
+    topology version changed. The cells come from the in-memory cell index, so a
+    rebuild only queries the gNBs and the owner's propagation model.
+    """
+
+    def __init__(self) -> None:
+        self._snapshots: Dict[int, TopologySnapshot] = {}
+
+    def peek(self, owner_id: int) -> Optional[TopologySnapshot]:
+        """The snapshot if it is still current, without touching the DB"""
+        snapshot = self._snapshots.get(owner_id)
+        if snapshot is None or snapshot.version != topology_versions.version(owner_id):
+            return None
+        return snapshot
+
+    def get(self, db: Session, owner_id: int) -> TopologySnapshot:
+        version = topology_versions.version(owner_id)
+        snapshot = self._snapshots.get(owner_id)
+
+        if snapshot is None or snapshot.version != version:
+            cells = list(cell_index.get(db, owner_id).cells.values())
+            gnbs = db.query(gNB).filter(gNB.owner_id == owner_id).all()
+            model = (
+                db.query(User.propagation_model).filter(User.id == owner_id).scalar()
+            )
+            snapshot = TopologySnapshot(owner_id, version, cells, gnbs, model)
+            self._snapshots[owner_id] = snapshot
+
+        return snapshot
+
+
+topology_snapshots = TopologySnapshots()
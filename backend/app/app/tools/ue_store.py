@@ -0,0 +1,211 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.sql import text
+
+from app.api.deps import db_context
+from app.core.config import settings
+from app.models.UE import UE
+from app.tools.spatial_index import CellRecord
+
+
+class UEState:
+    """
+    Authoritative in-memory state of a moving UE.
+
+    Exposes the same attributes as the `UE` model that the movement engine and
+    the monitoring callbacks read, so it can be used in place of an ORM object.
+    """
+
+    def __init__(self, ue: UE) -> None:
+        self.id = ue.id
+        self.supi = ue.supi
+        self.name = ue.name
+        self.owner_id = ue.owner_id
+        self.external_identifier = ue.external_identifier
+        self.speed = ue.speed
+        self.path_id = ue.path_id
+        self.latitude = ue.latitude
+        self.longitude = ue.longitude
+        self.Cell_id = ue.Cell_id
+        # A copy, the store outlives the session the UE was read in
+        self.Cell: Optional[CellRecord] = (
+            CellRecord.from_cell(ue.Cell) if ue.Cell is not None else None
+        )
+        # Position and cell as last read from or written to the DB
+        self.stored: Tuple[Optional[float], Optional[float], Optional[int]] = (
+            ue.latitude,
+            ue.longitude,
+            ue.Cell_id,
+        )
+
+
+class UEStateStore:
+    """
+    Holds the state of the moving UEs in memory and writes it behind to Postgres.
+
+    Position and cell updates only touch memory and mark the UE as dirty. Every
+    `flush_interval` seconds the dirty UEs are written with a single bulk UPDATE,
+    so the DB sees one statement per interval instead of one commit per UE per tick.
+    A UE is only written if its row still holds the values the store last read or
+    wrote, so the changes made meanwhile by the UE endpoints are not overwritten.
+    """
+
+    def __init__(self, flush_interval: float) -> None:
+        self.flush_interval = flush_interval
+        self._states: Dict[str, UEState] = {}
+        self._dirty: Set[str] = set()
+        self._released: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def load(self, ue: UE) -> UEState:
+        state = UEState(ue)
+        self._states[ue.supi] = state
+        self._released.discard(ue.supi)
+        return state
+
+    def get(self, supi: str) -> Optional[UEState]:
+        return self._states.get(supi)
+
+    def update(
+        self,
+        state: UEState,
+        latitude: float,
+        longitude: float,
+        cell: Optional[CellRecord],
+    ) -> None:
+        state.latitude = latitude
+        state.longitude = longitude
+        state.Cell_id = cell.id if cell is not None else None
+        state.Cell = cell
+        self._dirty.add(state.supi)
+
+    def release(self, supi: str) -> None:
+        """Drop the UE from the store once its pending changes have been flushed"""
+        if supi in self._dirty:
+            self._released.add(supi)
+        else:
+            self._states.pop(supi, None)
+
+    def overlay(self, ues: List[UE]) -> List[Dict[str, Any]]:
+        """
+        The columns of UEs read from the DB, with the in-memory position of the
+        moving ones. The ORM objects, and so their session, are left untouched.
+        """
+        rows = []
+        for ue in ues:
+            row = {
+                column.name: getattr(ue, column.name) for column in UE.__table__.columns
+            }
+            state = self._states.get(ue.supi)
+            if state is not None:
+                row.update(
+                    latitude=state.latitude,
+                    longitude=state.longitude,
+                    Cell_id=state.Cell_id,
+                )
+            rows.append(row)
+        return rows
+
+    # Write-behind
+    def flush(self) -> int:
+        dirty, self._dirty = self._dirty, set()
+        rows = [self._states[supi] for supi in dirty if supi in self._states]
+        updated: Set[int] = set()
+
+        if rows:
+            params = {}
+            values = []
+            written = {}
+            for i, state in enumerate(rows):
+                values.append(
+                    f"(:id{i}, :lat{i}, :lon{i}, CAST(:cell{i} AS INTEGER), "
+                    f"CAST(:old_lat{i} AS FLOAT), CAST(:old_lon{i} AS FLOAT), "
+                    f"CAST(:old_cell{i} AS INTEGER))"
+                )
+                params.update(
+                    {
+                        f"id{i}": state.id,
+                        f"lat{i}": state.latitude,
+                        f"lon{i}": state.longitude,
+                        f"cell{i}": state.Cell_id,
+                        f"old_lat{i}": state.stored[0],
+                        f"old_lon{i}": state.stored[1],
+                        f"old_cell{i}": state.stored[2],
+                    }
+                )
+                written[state.id] = (
+                    state,
+                    (state.latitude, state.longitude, state.Cell_id),
+                )
+
+            # Rows changed since the store last read or wrote them are skipped
+            statement = text(
+                "UPDATE ue SET latitude = v.latitude, longitude = v.longitude, "
+                '"Cell_id" = v.cell_id '
+                f"FROM (VALUES {', '.join(values)}) "
+                "AS v(id, latitude, longitude, cell_id, "
+                "old_latitude, old_longitude, old_cell_id) "
+                "WHERE ue.id = v.id "
+                "AND ue.latitude IS NOT DISTINCT FROM v.old_latitude "
+                "AND ue.longitude IS NOT DISTINCT FROM v.old_longitude "
+                'AND ue."Cell_id" IS NOT DISTINCT FROM v.old_cell_id '
+                "RETURNING ue.id"
+            )
+
+            try:
+                with db_context() as db:
+                    updated = {row.id for row in db.execute(statement, params)}
+                    db.commit()
+            except Exception:
+                # Keep the changes so that they are written on the next flush
+                self._dirty |= dirty
+                raise
+
+            for ue_id in updated:
+                state, values = written[ue_id]
+                state.stored = values
+
+            skipped = [ue_id for ue_id in written if ue_id not in updated]
+            if skipped:
+                logging.info(
+                    "%d UEs changed since they were read, not written", len(skipped)
+                )
+                # The next changes of the UEs still moving are written over the
+                # values they were changed to
+                with db_context() as db:
+                    current = (
+                        db.query(UE.id, UE.latitude, UE.longitude, UE.Cell_id)
+                        .filter(UE.id.in_(skipped))
+                        .all()
+                    )
+                for ue_id, latitude, longitude, cell_id in current:
+                    written[ue_id][0].stored = (latitude, longitude, cell_id)
+
+        for supi in self._released:
+            self._states.pop(supi, None)
+        self._released.clear()
+
+        return len(updated)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.flush()
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as ex:
+                logging.exception("Failed to flush UE states: %s", ex)
+
+
+ue_store = UEStateStore(settings.UE_STORE_FLUSH_INTERVAL)